@@ -8,7 +8,8 @@ Usage:
       --out outputs/cases
 
 Optional:
-  --mode rule|llm
+  --mode rule|llm|hybrid
+  --no-llm-cache   bypass the on-disk LLM response cache
 """
 from __future__ import annotations
 import argparse
@@ -23,7 +24,17 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--ir", required=True, help="normalized IR file or directory")
     parser.add_argument("--out", required=True, help="output directory for case.json")
-    parser.add_argument("--mode", default=None, help="case builder mode: rule or llm (default from env, default=llm)")
+    parser.add_argument(
+        "--mode",
+        default=None,
+        help="case builder mode: rule, llm or hybrid "
+        "(default from env, default=llm)",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="bypass the on-disk LLM response cache",
+    )
     args = parser.parse_args()
 
     ir_path = Path(args.ir)
@@ -34,7 +45,11 @@ def main():
     for f in files:
         data = json.loads(f.read_text(encoding="utf-8"))
         document_ir = DocumentIR.model_validate(data)
-        case = generate_case(document_ir, mode=args.mode)
+        case = generate_case(
+            document_ir,
+            mode=args.mode,
+            llm_cache=False if args.no_llm_cache else None,
+        )
         out_file = out_dir / f"{document_ir.case_id}_case.json"
         out_file.write_text(json.dumps(case, ensure_ascii=False, indent=2), encoding="utf-8")
         print(f"[ok] {f.name} -> {out_file}")
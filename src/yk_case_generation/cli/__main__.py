@@ -1,13 +1,27 @@
+"""``ykcg`` CLI.
+
+Commands import services (and through them pydantic-settings, httpx, OCR/PDF/DOCX
+libraries, jsonschema, structlog) inside their bodies, so ``--help`` and lightweight
+commands such as ``inspect-run`` start without loading them;
+``tests/unit/test_import_time.py`` holds the startup budget.
+"""
+from contextlib import nullcontext
 from pathlib import Path
 import json
 import csv
 from datetime import datetime, timezone
+from typing import Any, Dict
 import typer
 
-from yk_case_generation.services.case_response_builder import build_case_response
-from yk_case_generation.services.pipeline_runner import run_project_pipeline
-
 app = typer.Typer(help="YK case generation CLI")
+runs_app = typer.Typer(help="SQLite catalog of finished runs.")
+app.add_typer(runs_app, name="runs")
+
+_NO_LLM_CACHE_HELP = "Bypass the on-disk LLM response cache."
+_CASSETTE_HELP = "Record/replay external I/O: off | record | replay (default IO_CASSETTE_MODE)."
+_REPLAY_LATENCY_HELP = "Replay with the recorded latency or none: original | zero."
+_CATALOG_HELP = "Catalog file (default RUN_CATALOG_PATH or <output dir>/run_catalog.sqlite)."
+_PROFILE_HELP = "Profile each step into runs/<pid>/profile/: cpu | mem | cpu,mem."
 
 
 @app.command()
@@ -16,13 +30,23 @@ def project_run(
     output_dir: Path = Path("runs"),
     mode: str | None = None,
     skip_ocr: bool = False,
+    no_llm_cache: bool = typer.Option(False, "--no-llm-cache", help=_NO_LLM_CACHE_HELP),
+    cassette: str | None = typer.Option(None, help=_CASSETTE_HELP),
+    replay_latency: str | None = typer.Option(None, help=_REPLAY_LATENCY_HELP),
+    profile: str | None = typer.Option(None, help=_PROFILE_HELP),
 ):
     """Main command: run full pipeline from project number to frontend JSON."""
+    from yk_case_generation.services.pipeline_runner import run_project_pipeline
+
+    _configure_cassettes(cassette, replay_latency)
+    _check_profile(profile)
     result = run_project_pipeline(
         project_number=project_number,
         output_root=output_dir,
         mode=mode,
         skip_ocr=skip_ocr,
+        llm_cache=False if no_llm_cache else None,
+        profile=profile,
     )
     typer.echo(f"status={result.get('status')} run_dir={output_dir / project_number}")
 
@@ -36,8 +60,35 @@ def project_run_batch(
     project_column: str = "projectNumber",
     limit: int | None = None,
     fail_fast: bool = False,
+    no_llm_cache: bool = typer.Option(False, "--no-llm-cache", help=_NO_LLM_CACHE_HELP),
+    llm_batch: bool = typer.Option(
+        False, "--llm-batch", help="Pack small projects into shared LLM requests (llm mode only)."
+    ),
+    llm_batch_window: int = typer.Option(
+        16, "--llm-batch-window", help="Projects ingested per batching window."
+    ),
+    cassette: str | None = typer.Option(None, help=_CASSETTE_HELP),
+    replay_latency: str | None = typer.Option(None, help=_REPLAY_LATENCY_HELP),
+    profile: str | None = typer.Option(None, help=_PROFILE_HELP),
+    metrics_file: Path | None = typer.Option(
+        None, help="Metrics textfile for a node-exporter textfile collector (METRICS_TEXTFILE)."
+    ),
+    metrics_interval: float | None = typer.Option(
+        None, help="Seconds between metrics textfile flushes (METRICS_FLUSH_INTERVAL_S)."
+    ),
 ):
     """Batch runner: execute full pipeline for all project IDs in a CSV column."""
+    from yk_case_generation.config import settings
+    from yk_case_generation.services.concurrency import limiter_snapshot
+    from yk_case_generation.services.llm_metrics import summarize_llm_calls
+    from yk_case_generation.services.pipeline_runner import (
+        run_project_pipeline,
+        run_projects_batched,
+    )
+    from yk_case_generation.services.run_metrics import MetricsTextfile
+
+    _configure_cassettes(cassette, replay_latency)
+    _check_profile(profile)
     if not csv_file.exists():
         raise typer.BadParameter(f"csv not found: {csv_file}")
 
@@ -45,7 +96,12 @@ def project_run_batch(
     if not project_ids:
         raise typer.BadParameter(f"no project ids found in column '{project_column}'")
 
-    summary = {
+    metrics_path = metrics_file or (
+        Path(settings.metrics_textfile) if settings.metrics_textfile else None
+    )
+    interval = metrics_interval or settings.metrics_flush_interval_s
+
+    summary: Dict[str, Any] = {
         "started_at": _now_iso(),
         "csv_file": str(csv_file),
         "project_column": project_column,
@@ -58,33 +114,41 @@ def project_run_batch(
         "results": [],
     }
 
-    for pid in project_ids:
-        result = run_project_pipeline(
-            project_number=pid,
-            output_root=output_dir,
-            mode=mode,
-            skip_ocr=skip_ocr,
-        )
-        status = result.get("status", "failed")
-        summary["results"].append(
-            {
-                "project_number": pid,
-                "status": status,
-                "run_dir": str(output_dir / pid),
-                "error": result.get("error"),
-            }
-        )
-        if status == "success":
-            summary["success"] += 1
-        elif status == "partial":
-            summary["partial"] += 1
-        else:
-            summary["failed"] += 1
-            if fail_fast:
+    llm_cache = False if no_llm_cache else None
+    batched = llm_batch and (mode or settings.llm_mode) == "llm"
+    summary["llm_batch"] = batched
+    window = max(1, llm_batch_window) if batched else 1
+    llm_calls: list[dict] = []
+    with MetricsTextfile(metrics_path, interval) if metrics_path else nullcontext():
+        for start in range(0, len(project_ids), window):
+            chunk = project_ids[start : start + window]
+            if batched:
+                results = run_projects_batched(
+                    chunk,
+                    output_root=output_dir,
+                    skip_ocr=skip_ocr,
+                    llm_cache=llm_cache,
+                    profile=profile,
+                )
+            else:
+                results = [
+                    run_project_pipeline(
+                        project_number=chunk[0],
+                        output_root=output_dir,
+                        mode=mode,
+                        skip_ocr=skip_ocr,
+                        llm_cache=llm_cache,
+                        profile=profile,
+                    )
+                ]
+            for result in results:
+                llm_calls.extend((result.get("llm") or {}).get("calls", []))
+            if not _record_results(summary, chunk, results, output_dir) and fail_fast:
                 break
-        typer.echo(f"[{status}] {pid}")
 
     summary["ended_at"] = _now_iso()
+    summary["llm_usage"] = summarize_llm_calls(llm_calls)
+    summary["concurrency"] = limiter_snapshot()
     summary_path = output_dir / f"batch_summary_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
     summary_path.parent.mkdir(parents=True, exist_ok=True)
     summary_path.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -96,10 +160,238 @@ def project_run_batch(
     )
 
 
+@app.command("mock-llm")
+def mock_llm(
+    host: str = "127.0.0.1",
+    port: int = 8099,
+    latency_ms: float = 200.0,
+    jitter_ms: float = 50.0,
+    distribution: str = typer.Option("uniform", help="fixed | uniform | lognormal"),
+    error_rate: float = 0.0,
+    rate_limit_rate: float = typer.Option(0.0, help="Share of requests answered with 429."),
+    max_inflight: int = typer.Option(0, help="Answer 429 above this many concurrent requests."),
+    canned: Path | None = typer.Option(None, help="JSON file returned for every request."),
+    seed: int | None = None,
+):
+    """Dev helper: serve an offline OpenAI-compatible chat-completions endpoint."""
+    import uvicorn
+
+    from yk_case_generation.services.mock_llm_server import (
+        MOCK_ROUTE,
+        MockLLMConfig,
+        create_mock_llm_app,
+    )
+
+    config = MockLLMConfig(
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        distribution=distribution,
+        error_rate=error_rate,
+        rate_limit_rate=rate_limit_rate,
+        max_inflight=max_inflight,
+        canned=json.loads(canned.read_text(encoding="utf-8")) if canned else None,
+        seed=seed,
+    )
+    typer.echo(f"LLM_ENDPOINT=http://{host}:{port}{MOCK_ROUTE}")
+    uvicorn.run(create_mock_llm_app(config), host=host, port=port, log_level="warning")
+
+
+@app.command("load-test")
+def load_test(
+    ir_path: Path,
+    concurrency: int = 4,
+    mode: str = "llm",
+    repeat: int = 1,
+    mock: bool = typer.Option(
+        True, "--mock/--no-mock", help="Run against an in-process mock LLM server."
+    ),
+    latency_ms: float = 200.0,
+    jitter_ms: float = 50.0,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    use_llm_cache: bool = typer.Option(
+        False, "--use-llm-cache", help="Allow LLM response cache hits."
+    ),
+    output: Path | None = None,
+):
+    """Measure case_builder throughput and latency percentiles over normalized IR files."""
+    from yk_case_generation.services.load_test import (
+        find_ir_files,
+        llm_endpoint_settings,
+        run_load_test,
+    )
+    from yk_case_generation.services.mock_llm_server import MockLLMConfig, serve_mock_llm
+
+    files = find_ir_files(ir_path)
+    if not files:
+        raise typer.BadParameter(f"no *_normalized_ir.json found in {ir_path}")
+    server = (
+        serve_mock_llm(
+            MockLLMConfig(
+                latency_ms=latency_ms,
+                jitter_ms=jitter_ms,
+                error_rate=error_rate,
+                rate_limit_rate=rate_limit_rate,
+            )
+        )
+        if mock
+        else nullcontext(None)
+    )
+    with server as endpoint, llm_endpoint_settings(endpoint):
+        report = run_load_test(
+            files,
+            concurrency=concurrency,
+            mode=mode,
+            repeat=repeat,
+            llm_cache=None if use_llm_cache else False,
+        )
+    report["mock"] = mock
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        output.write_text(text, encoding="utf-8")
+    typer.echo(text)
+
+
+@app.command("bench")
+def bench(
+    work_dir: Path = Path("bench_runs"),
+    projects: int = 3,
+    pdfs: int = 1,
+    pdf_pages: int = 3,
+    docx: int = 1,
+    docx_paragraphs: int = 40,
+    images: int = 2,
+    archives: int = 1,
+    ocr_lines: int = 25,
+    seed: int = 0,
+    repeat: int = 1,
+    mode: str = "llm",
+    llm_latency_ms: float = 0.0,
+    output: Path = Path("bench_results.json"),
+    baseline: Path | None = typer.Option(None, help="Baseline results file to compare against."),
+    threshold: list[str] = typer.Option(
+        [], help="Regression threshold override as metric=ratio, e.g. wall_s=0.3 (repeatable)."
+    ),
+    update_baseline: bool = typer.Option(
+        False, "--update-baseline", help="Write these results (and thresholds) as the baseline."
+    ),
+):
+    """Benchmark the full pipeline on synthetic projects against local stand-in services."""
+    from yk_case_generation.services.bench_fixtures import FixtureSpec
+    from yk_case_generation.services.benchmark import (
+        DEFAULT_THRESHOLDS,
+        compare_results,
+        parse_thresholds,
+        run_benchmark,
+    )
+
+    try:
+        thresholds = parse_thresholds(threshold)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    spec = FixtureSpec(
+        projects=projects,
+        pdfs=pdfs,
+        pdf_pages=pdf_pages,
+        docx=docx,
+        docx_paragraphs=docx_paragraphs,
+        images=images,
+        archives=archives,
+        ocr_lines=ocr_lines,
+        seed=seed,
+    )
+    results = run_benchmark(
+        work_dir, spec, repeat=repeat, mode=mode, llm_latency_ms=llm_latency_ms
+    )
+    output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    for name, row in {**results["steps"], "total": results["total"]}.items():
+        typer.echo(
+            f"{name:<24} wall={row.get('wall_s', 0):.3f}s cpu={row.get('cpu_s', 0):.3f}s "
+            f"rss={row.get('peak_rss_mb', 0):.1f}MB written={row.get('bytes_written', 0)}B"
+        )
+    typer.echo(f"results: {output}")
+
+    if baseline and update_baseline:
+        stored = {**results, "thresholds": {**DEFAULT_THRESHOLDS, **thresholds}}
+        baseline.write_text(json.dumps(stored, ensure_ascii=False, indent=2), encoding="utf-8")
+        typer.echo(f"baseline updated: {baseline}")
+        return
+    if baseline:
+        if not baseline.exists():
+            raise typer.BadParameter(f"baseline not found: {baseline} (use --update-baseline)")
+        reference = json.loads(baseline.read_text(encoding="utf-8"))
+        if reference.get("spec") != results["spec"] or reference.get("mode") != mode:
+            typer.echo("warning: baseline was recorded with a different fixture spec or mode")
+        regressions = compare_results(results, reference, thresholds)
+        for reg in regressions:
+            typer.echo(
+                f"REGRESSION {reg['scope']} {reg['metric']}: {reg['baseline']} -> "
+                f"{reg['current']} (+{reg['change']:.0%} > {reg['threshold']:.0%})"
+            )
+        if regressions:
+            raise typer.Exit(code=1)
+        typer.echo("no regressions against baseline")
+
+
+@app.command("microbench")
+def microbench(
+    dimension: str = typer.Option("lines", help="Size to scale: lines | pages | sources."),
+    sizes: str = typer.Option("50,100,200,400,800", help="Comma-separated sizes."),
+    target: list[str] = typer.Option([], help="Targets to run (default: all, repeatable)."),
+    sources: int = 3,
+    pages_per_source: int = 2,
+    lines_per_page: int = 40,
+    checkbox_density: float = 0.1,
+    vertical_page_ratio: float = 0.1,
+    seed: int = 0,
+    repeat: int = 3,
+    max_exponent: float = typer.Option(
+        1.3, help="Flag targets whose log-log scaling exponent exceeds this."
+    ),
+    output: Path | None = None,
+):
+    """Time the IR/case stages on synthetic DocumentIRs of growing size; exit 1 if superlinear."""
+    from yk_case_generation.services.microbench import run_microbench
+    from yk_case_generation.services.synthetic_ir import IRSpec
+
+    spec = IRSpec(
+        sources=sources,
+        pages_per_source=pages_per_source,
+        lines_per_page=lines_per_page,
+        checkbox_density=checkbox_density,
+        vertical_page_ratio=vertical_page_ratio,
+        seed=seed,
+    )
+    try:
+        report = run_microbench(
+            spec,
+            dimension,
+            [int(x) for x in sizes.split(",") if x.strip()],
+            targets=target or None,
+            repeat=repeat,
+            max_exponent=max_exponent,
+        )
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    if output:
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    typer.echo(f"{dimension}: {report['sizes']} (total lines {report['lines_total']})")
+    for name, row in report["targets"].items():
+        times = " ".join(f"{t * 1000:.2f}" for t in row["times_s"])
+        flag = "  SUPERLINEAR" if row["superlinear"] else ""
+        typer.echo(f"{name:<24} exponent={row['exponent']}  ms=[{times}]{flag}")
+    if report["superlinear"]:
+        raise typer.Exit(code=1)
+
+
 @app.command()
 def inspect_run(
     project_number: str,
     output_dir: Path = Path("runs"),
+    profile: bool = typer.Option(
+        False, "--profile", help="Summarise the per-step profiles recorded with --profile."
+    ),
+    top: int = typer.Option(10, help="Functions/allocations listed per step with --profile."),
 ):
     """Debug helper: print concise run status and failed steps from run_meta."""
     run_meta = output_dir / project_number / "run_meta.json"
@@ -112,23 +404,349 @@ def inspect_run(
             typer.echo(
                 f"  step={step.get('name')} status={step.get('status')} error={step.get('error')}"
             )
+    if profile:
+        _echo_profile(run_meta.parent / "profile", top)
+
+
+@app.command("trace-export")
+def trace_export(
+    project_number: str,
+    output_dir: Path = Path("runs"),
+    output: Path | None = typer.Option(None, help="Default: <run dir>/trace.json"),
+):
+    """Export the spans in run_meta.json as Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+    from yk_case_generation.services.spans import to_chrome_trace
+
+    run_meta = output_dir / project_number / "run_meta.json"
+    if not run_meta.exists():
+        raise typer.BadParameter(f"run meta not found: {run_meta}")
+    meta = json.loads(run_meta.read_text(encoding="utf-8"))
+    if not meta.get("spans"):
+        raise typer.BadParameter(f"no spans recorded in {run_meta}")
+    target = output or run_meta.parent / "trace.json"
+    trace = to_chrome_trace(meta["spans"], process_name=f"ykcg {project_number}")
+    target.write_text(json.dumps(trace, ensure_ascii=False), encoding="utf-8")
+    typer.echo(f"trace: {target} ({len(trace['traceEvents'])} events)")
+
+
+@app.command("batch-report")
+def batch_report(
+    output_dir: Path = typer.Argument(Path("runs"), help="Batch output dir (run_meta.json files)."),
+    output: Path | None = typer.Option(None, help="Default: <output dir>/batch_report.json"),
+    compare: Path | None = typer.Option(
+        None, help="Baseline batch output dir or saved batch_report.json to compare against."
+    ),
+    threshold: float = typer.Option(0.2, help="Relative increase that counts as a regression."),
+    slowest: int = 10,
+    bucket_minutes: int = typer.Option(10, help="Throughput bucket width."),
+):
+    """Aggregate per-step latency, throughput and failures over all run_meta.json files."""
+    from yk_case_generation.services.batch_report import (
+        build_batch_report,
+        compare_reports,
+        load_report,
+    )
+
+    if not output_dir.is_dir():
+        raise typer.BadParameter(f"output dir not found: {output_dir}")
+    if compare is not None and not compare.exists():
+        raise typer.BadParameter(f"baseline not found: {compare}")
+    report = build_batch_report(output_dir, slowest=slowest, bucket_minutes=bucket_minutes)
+    regressions = None
+    if compare is not None:
+        regressions = compare_reports(report, load_report(compare), threshold)
+        report["comparison"] = {"baseline": str(compare), "regressions": regressions}
+    target = output or output_dir / "batch_report.json"
+    target.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    status = " ".join(f"{k}={v}" for k, v in report["status"].items())
+    throughput = report["throughput"]
+    typer.echo(f"projects={report['projects']} {status}")
+    typer.echo(
+        f"throughput={throughput.get('projects_per_hour')}/h wall={throughput.get('wall_s')}s "
+        f"pages~duration r={report['correlation']['pages_vs_duration']} "
+        f"s/page p50={report['correlation']['seconds_per_page']}"
+    )
+    typer.echo(f"{'step':<24}{'n':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'failed':>8}")
+    for name, row in {**report["steps"], "(project)": report["project_duration_s"]}.items():
+        cells = [_seconds(row.get(key)) for key in ("p50", "p90", "p99", "max")]
+        typer.echo(
+            f"{name:<24}{row['count']:>7}{''.join(f'{c:>9}' for c in cells)}"
+            f"{row.get('failed', ''):>8}"
+        )
+    for p in report["slowest_projects"]:
+        typer.echo(f"slow {p['project_number']} {p['duration_s']:.1f}s pages={p['pages']}")
+    for category, count in list(report["failure_categories"].items())[:10]:
+        typer.echo(f"failure {count:>5} {category}")
+    typer.echo(f"report: {target}")
+    if regressions is None:
+        return
+    for reg in regressions:
+        change = f"+{reg['change']:.0%}" if reg["change"] is not None else "new"
+        typer.echo(
+            f"REGRESSION {reg['scope']} {reg['metric']}: {reg['baseline']} -> "
+            f"{reg['current']} ({change} > {reg['threshold']:.0%})"
+        )
+    if regressions:
+        raise typer.Exit(code=1)
+    typer.echo("no regressions against baseline")
+
+
+@runs_app.command("backfill")
+def runs_backfill(
+    roots: list[Path] = typer.Argument(None, help="Run output dirs to index (default: runs)."),
+    catalog: Path | None = typer.Option(None, help=_CATALOG_HELP),
+    force: bool = typer.Option(False, "--force", help="Re-index unchanged run_meta.json files."),
+):
+    """Index existing run_meta.json files into the run catalog."""
+    from yk_case_generation.config import settings
+    from yk_case_generation.services.run_catalog import backfill, default_catalog
+
+    roots = roots or [Path("runs")]
+    missing = [str(root) for root in roots if not root.is_dir()]
+    if missing:
+        raise typer.BadParameter(f"output dir not found: {', '.join(missing)}")
+    target = catalog or default_catalog(roots[0], settings.run_catalog_path)
+    counts = backfill(target, roots, force=force)
+    typer.echo(" ".join(f"{k}={v}" for k, v in counts.items()) + f" catalog={target}")
+
+
+@runs_app.command("query")
+def runs_query(
+    output_dir: Path = Path("runs"),
+    catalog: Path | None = typer.Option(None, help=_CATALOG_HELP),
+    status: list[str] = typer.Option([], help="success | partial | failed (repeatable)."),
+    failed_step: str | None = typer.Option(None, help="Only runs where this step failed."),
+    slow_step: str | None = typer.Option(None, help="With --min-step-s: step to check."),
+    min_step_s: float | None = None,
+    min_duration_s: float | None = None,
+    max_duration_s: float | None = None,
+    since: str | None = typer.Option(None, help="Started at or after (ISO date/time, UTC)."),
+    until: str | None = typer.Option(None, help="Started before (ISO date/time, UTC)."),
+    project: str | None = typer.Option(None, help="Project number, or a pattern with % wildcards."),
+    order: str = typer.Option("started_at", help="started_at | duration_s (descending)."),
+    limit: int = 100,
+    as_json: bool = typer.Option(False, "--json", help="Print rows as JSON lines."),
+):
+    """Filter catalogued runs by status, failed/slow steps, duration and start date."""
+    from yk_case_generation.config import settings
+    from yk_case_generation.services.run_catalog import RunQuery, default_catalog, query_runs
+
+    if order not in ("started_at", "duration_s"):
+        raise typer.BadParameter(f"order must be started_at or duration_s, got {order!r}")
+    target = catalog or default_catalog(output_dir, settings.run_catalog_path)
+    if not target.exists():
+        raise typer.BadParameter(f"catalog not found: {target} (run `ykcg runs backfill`)")
+    rows = query_runs(
+        target,
+        RunQuery(
+            status=status,
+            failed_step=failed_step,
+            slow_step=slow_step,
+            min_step_s=min_step_s,
+            min_duration_s=min_duration_s,
+            max_duration_s=max_duration_s,
+            since=since,
+            until=until,
+            project=project,
+            limit=limit,
+            order=order,
+        ),
+    )
+    for row in rows:
+        if as_json:
+            typer.echo(json.dumps(row, ensure_ascii=False))
+            continue
+        duration = "-" if row["duration_s"] is None else f"{row['duration_s']:.1f}s"
+        typer.echo(
+            f"{row['project_number']:<16} {row['status'] or '-':<8} {row['started_at'] or '-':<33}"
+            f" {duration:>9} failed_steps={row['failed_steps'] or '-'}"
+        )
+    if not as_json:
+        typer.echo(f"{len(rows)} run(s)")
 
 
 @app.command()
 def build_response(
     case_json: Path,
     output: Path | None = None,
+    workers: int | None = typer.Option(
+        None, help="Directory mode: worker processes (default: CPU count)."
+    ),
+    force: bool = typer.Option(False, help="Directory mode: rebuild unchanged cases too."),
+    layout: str | None = typer.Option(
+        None, help="Response layout: v1 | v2 (shared evidence table); default RESPONSE_LAYOUT."
+    ),
 ):
-    """Debug helper: convert one internal case.json to frontend response JSON."""
+    """Convert an internal case.json to frontend response JSON.
+
+    Given a directory, rebuilds the response of every *_case.json under it in parallel,
+    skipping cases whose content and builder version are unchanged since the last run.
+    """
+    from yk_case_generation.config import settings
+    from yk_case_generation.services.case_response_builder import RESPONSE_LAYOUTS
+
+    layout = layout or settings.response_layout
+    if layout not in RESPONSE_LAYOUTS:
+        raise typer.BadParameter(f"--layout must be one of {', '.join(RESPONSE_LAYOUTS)}")
     if not case_json.exists():
         raise typer.BadParameter(f"case json not found: {case_json}")
+    if case_json.is_dir():
+        from yk_case_generation.services.response_batch import build_responses
+
+        if output is not None:
+            raise typer.BadParameter("--output applies to a single case file")
+        result = build_responses(case_json, workers=workers, force=force, layout=layout)
+        for key, error in result["errors"].items():
+            typer.echo(f"failed {key}: {error}", err=True)
+        typer.echo(
+            f"{result['total']} case(s): built={result['built']} skipped={result['skipped']}"
+            f" failed={result['failed']} in {result['elapsed_s']:.1f}s"
+            f" ({result['built_per_s'] or 0} built/s, {result['workers']} worker(s),"
+            f" builder {result['builder']})"
+        )
+        if result["failed"]:
+            raise typer.Exit(code=1)
+        return
+
+    from yk_case_generation.services.case_response_builder import build_case_response
+
     case = json.loads(case_json.read_text(encoding="utf-8"))
-    response = build_case_response(case)
+    response = build_case_response(case, layout=layout)
     target = output or case_json.with_name(case_json.name.replace("_case.json", "_frontend.json"))
     target.write_text(json.dumps(response, ensure_ascii=False, indent=2), encoding="utf-8")
     typer.echo(f"written {target}")
 
 
+@app.command()
+def export(
+    roots: list[Path] = typer.Argument(None, help="Run output dirs to export (default: runs)."),
+    output_dir: Path = typer.Option(Path("exports"), "--output-dir", "-o"),
+    fmt: str | None = typer.Option(
+        None, "--format", help="parquet | jsonl (default: parquet when pyarrow is installed)."
+    ),
+    force: bool = typer.Option(False, "--force", help="Drop the export and rewrite every run."),
+    rows_per_file: int = typer.Option(100_000, help="Maximum rows per part file."),
+):
+    """Export runs as facts/ and runs/ datasets partitioned by start date; reruns add changes."""
+    from yk_case_generation.services.run_export import export_runs
+
+    roots = roots or [Path("runs")]
+    missing = [str(root) for root in roots if not root.is_dir()]
+    if missing:
+        raise typer.BadParameter(f"output dir not found: {', '.join(missing)}")
+    try:
+        result = export_runs(roots, output_dir, fmt=fmt, force=force, rows_per_file=rows_per_file)
+    except (ValueError, RuntimeError) as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    typer.echo(
+        f"runs: found={result['runs_found']} exported={result['runs_exported']}"
+        f" unchanged={result['runs_unchanged']} unreadable={result['unreadable']}"
+        f" partitions_rewritten={result['partitions_rewritten']}"
+        f" carried_over={result['runs_carried_over']}"
+    )
+    typer.echo(
+        f"rows: facts={result['rows']['facts']} runs={result['rows']['runs']}"
+        f" in {result['files']} {result['format']} file(s) under {output_dir}"
+    )
+
+
+@app.command()
+def response_sizes(
+    root: Path,
+    limit: int | None = typer.Option(None, help="Measure at most this many cases."),
+):
+    """Compare saved response sizes of the v1 and v2 (evidence table) layouts over a run tree."""
+    from yk_case_generation.services.response_batch import compare_layouts
+
+    if not root.is_dir():
+        raise typer.BadParameter(f"not a directory: {root}")
+    result = compare_layouts(root, limit=limit)
+    for layout, size in result["bytes"].items():
+        typer.echo(f"{layout}: {size / 1024:.1f} KiB")
+    typer.echo(
+        f"{result['cases']} case(s), {result['skipped']} skipped; v2/v1 = {result['v2_vs_v1']}"
+    )
+
+
+def _record_results(
+    summary: dict, project_ids: list[str], results: list[dict], output_dir: Path
+) -> bool:
+    """Add run results to the batch summary; False if any project failed."""
+    ok = True
+    for pid, result in zip(project_ids, results):
+        status = result.get("status", "failed")
+        summary["results"].append(
+            {
+                "project_number": pid,
+                "status": status,
+                "run_dir": str(output_dir / pid),
+                "error": result.get("error"),
+                "llm_usage": ((result.get("llm") or {}).get("usage") or {}).get("totals"),
+            }
+        )
+        if status == "success":
+            summary["success"] += 1
+        elif status == "partial":
+            summary["partial"] += 1
+        else:
+            summary["failed"] += 1
+            ok = False
+        typer.echo(f"[{status}] {pid}")
+    return ok
+
+
+def _seconds(value: float | None) -> str:
+    return "-" if value is None else f"{value:.2f}"
+
+
+def _check_profile(profile: str | None) -> None:
+    from yk_case_generation.services.step_profiler import parse_profile_modes
+
+    try:
+        parse_profile_modes(profile)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+
+
+def _echo_profile(profile_dir: Path, top: int) -> None:
+    from yk_case_generation.services.step_profiler import summarize_profile
+
+    if not (profile_dir / "index.json").exists():
+        raise typer.BadParameter(f"no profile recorded in {profile_dir}")
+    for row in summarize_profile(profile_dir, top):
+        typer.echo(f"profile step={row['step']}")
+        cpu = row.get("cpu")
+        if cpu:
+            typer.echo(f"  cpu total={cpu['total_s']:.3f}s hottest (cumulative / own):")
+            for fn in cpu["by_cumulative"]:
+                typer.echo(
+                    f"    {fn['cumtime_s']:9.4f}s {fn['tottime_s']:9.4f}s "
+                    f"{fn['calls']:>8} {fn['function']}"
+                )
+        mem = row.get("mem")
+        if mem:
+            typer.echo(
+                f"  mem peak={mem['peak_bytes'] / 1024:.1f}KiB "
+                f"net={mem['net_bytes'] / 1024:.1f}KiB biggest live allocations:"
+            )
+            for alloc in mem["top_allocations"]:
+                size_kib = alloc["size_bytes"] / 1024
+                typer.echo(f"    {size_kib:10.1f}KiB {alloc['count']:>8} {alloc['where']}")
+
+
+def _configure_cassettes(cassette: str | None, replay_latency: str | None) -> None:
+    if cassette is None and replay_latency is None:
+        return
+    from yk_case_generation.config import settings
+    from yk_case_generation.services.cassette import configure_cassettes
+
+    try:
+        configure_cassettes(cassette or settings.io_cassette_mode, replay_latency)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+
+
 def _read_project_ids(csv_file: Path, project_column: str, limit: int | None) -> list[str]:
     out: list[str] = []
     seen: set[str] = set()
@@ -8,14 +8,61 @@ class Settings(BaseSettings):
     tencent_region: str = Field(default="ap-beijing", env="TENCENT_REGION")
     tencent_ocr_endpoint: str = Field(default="ocr.tencentcloudapi.com", env="TENCENT_OCR_ENDPOINT")
     ocr_region: str = Field(default="ap-beijing")
+    lims_base_url: str = Field(
+        default="https://newlims-api.yikongenomics.cn/RD/getProjectInfo", env="LIMS_BASE_URL"
+    )
     low_confidence_threshold: float = Field(default=0.6)
     boilerplate_repeat_threshold: int = Field(default=3)
     storage_dir: str = Field(default="outputs")
+    # Upper bounds for the adaptive (AIMD) per-service concurrency limits; the LLM
+    # endpoint uses LLM_MAX_CONCURRENCY.
+    lims_max_concurrency: int = Field(default=4, env="LIMS_MAX_CONCURRENCY")
+    download_max_concurrency: int = Field(default=8, env="DOWNLOAD_MAX_CONCURRENCY")
+    ocr_max_concurrency: int = Field(default=5, env="OCR_MAX_CONCURRENCY")
+    # Jittered exponential retry backoff: random wait up to base * 2^attempt, capped.
+    backoff_base_s: float = Field(default=0.5, env="BACKOFF_BASE_S")
+    backoff_max_s: float = Field(default=30.0, env="BACKOFF_MAX_S")
+    # Record/replay of external I/O: off | record | replay; replay latency: original | zero
+    io_cassette_mode: str = Field(default="off", env="IO_CASSETTE_MODE")
+    io_cassette_dir: str = Field(default="cassettes", env="IO_CASSETTE_DIR")
+    io_replay_latency: str = Field(default="original", env="IO_REPLAY_LATENCY")
+    # Structured run events on stderr: console | json
+    log_format: str = Field(default="console", env="LOG_FORMAT")
+    log_level: str = Field(default="INFO", env="LOG_LEVEL")
+    # Metrics textfile for a node-exporter textfile collector (project-run-batch); empty = off
+    metrics_textfile: Optional[str] = Field(default=None, env="METRICS_TEXTFILE")
+    metrics_flush_interval_s: float = Field(default=15.0, env="METRICS_FLUSH_INTERVAL_S")
+    # SQLite catalog of finished runs; default <output dir>/run_catalog.sqlite
+    run_catalog_enabled: bool = Field(default=True, env="RUN_CATALOG_ENABLED")
+    run_catalog_path: Optional[str] = Field(default=None, env="RUN_CATALOG_PATH")
+    # frontend response layout: v1 (evidence inline) | v2 (shared evidence table)
+    response_layout: str = Field(default="v1", env="RESPONSE_LAYOUT")
     llm_mode: str = Field(default="llm", env="LLM_MODE")
     llm_endpoint: Optional[str] = Field(default=None, env="LLM_ENDPOINT")
     llm_api_key: Optional[str] = Field(default=None, env="LLM_API_KEY")
     llm_model: str = Field(default="gpt-4o-mini", env="LLM_MODEL")
     llm_timeout: int = Field(default=120, env="LLM_TIMEOUT")
+    llm_http2: bool = Field(default=True, env="LLM_HTTP2")
+    llm_max_connections: int = Field(default=16, env="LLM_MAX_CONNECTIONS")
+    llm_max_concurrency: int = Field(default=4, env="LLM_MAX_CONCURRENCY")
+    # Stream completions (SSE) to measure time-to-first-token and abort malformed output early.
+    llm_stream: bool = Field(default=False, env="LLM_STREAM")
+    llm_stream_max_chars: int = Field(default=200000, env="LLM_STREAM_MAX_CHARS")
+    llm_cache_enabled: bool = Field(default=True, env="LLM_CACHE_ENABLED")
+    llm_cache_dir: str = Field(default="~/.cache/yk_case_generation/llm", env="LLM_CACHE_DIR")
+    llm_cache_ttl_s: int = Field(default=30 * 24 * 3600, env="LLM_CACHE_TTL_S")
+    llm_cache_max_mb: int = Field(default=512, env="LLM_CACHE_MAX_MB")
+    # Estimated-token budget for stage-1 candidate facts; 0 disables trimming.
+    llm_stage1_token_budget: int = Field(default=12000, env="LLM_STAGE1_TOKEN_BUDGET")
+    # Split stage 1 into concurrent per-source chunks above this size; 0 disables map-reduce.
+    llm_stage1_chunk_tokens: int = Field(default=4000, env="LLM_STAGE1_CHUNK_TOKENS")
+    # multi-project batching (project-run-batch --llm-batch)
+    llm_batch_token_budget: int = Field(default=6000, env="LLM_BATCH_TOKEN_BUDGET")
+    llm_batch_max_cases: int = Field(default=8, env="LLM_BATCH_MAX_CASES")
+    # hybrid mode: sections whose rule confidence is below this go to the LLM
+    llm_hybrid_confidence_threshold: float = Field(
+        default=0.75, env="LLM_HYBRID_CONFIDENCE_THRESHOLD"
+    )
 
     class Config:
         env_file = ".env"
@@ -1,11 +1,73 @@
-from typing import Any
+"""JSON schemas of the internal case and frontend response, loaded and compiled once.
+
+``load_schema`` returns one shared dict per schema file (treat it as read-only);
+``validator_for`` returns the compiled ``Draft7Validator`` of a schema dict, checked once.
+``schema_errors`` lists every violation in one pass for the repair path, and
+``validate_instance`` raises the best-matching one like ``jsonschema.validate``.
+jsonschema itself is imported on first validation.
+"""
+from __future__ import annotations
+
 import json
+import threading
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from jsonschema import Draft7Validator
+    from jsonschema.exceptions import ValidationError
+
+SCHEMA_DIR = Path(__file__).resolve().parent.parent / "schemas"
+DEFAULT_SCHEMA_PATH = SCHEMA_DIR / "case_schema_v1.json"
+# schemas passed in as dicts (not via load_schema) are cached up to this many
+_MAX_VALIDATORS = 32
+
+_lock = threading.Lock()
+_SCHEMAS: Dict[Path, Dict[str, Any]] = {}
+# id(schema) -> (schema, validator); holding the schema keeps its id from being reused
+_VALIDATORS: Dict[int, Tuple[Dict[str, Any], "Draft7Validator"]] = {}
+
+
+def schema_path(name: str) -> Path:
+    """Path of a bundled schema by version name, e.g. ``case_response_v1``."""
+    return SCHEMA_DIR / f"{name}.json"
+
+
+def load_schema(path: Path | str | None = None) -> Dict[str, Any]:
+    schema_file = Path(path).resolve() if path else DEFAULT_SCHEMA_PATH
+    with _lock:
+        schema = _SCHEMAS.get(schema_file)
+    if schema is None:
+        schema = json.loads(schema_file.read_text(encoding="utf-8"))
+        with _lock:
+            schema = _SCHEMAS.setdefault(schema_file, schema)
+    return schema
+
+
+def validator_for(schema: Dict[str, Any]) -> "Draft7Validator":
+    with _lock:
+        entry = _VALIDATORS.get(id(schema))
+    if entry is not None and entry[0] is schema:
+        return entry[1]
+    from jsonschema import Draft7Validator
+
+    Draft7Validator.check_schema(schema)
+    validator = Draft7Validator(schema)
+    with _lock:
+        if len(_VALIDATORS) >= _MAX_VALIDATORS:
+            _VALIDATORS.clear()
+        _VALIDATORS[id(schema)] = (schema, validator)
+    return validator
+
+
+def schema_errors(instance: Any, schema: Dict[str, Any]) -> List["ValidationError"]:
+    """Every violation of ``instance``, collected in one validation pass."""
+    return list(validator_for(schema).iter_errors(instance))
 
-DEFAULT_SCHEMA_PATH = Path(__file__).resolve().parent.parent / "schemas" / "case_schema_v1.json"
 
+def validate_instance(instance: Any, schema: Dict[str, Any]) -> None:
+    from jsonschema.exceptions import best_match
 
-def load_schema(path: Path | str | None = None) -> dict[str, Any]:
-    schema_path = Path(path) if path else DEFAULT_SCHEMA_PATH
-    with open(schema_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    error = best_match(validator_for(schema).iter_errors(instance))
+    if error is not None:
+        raise error
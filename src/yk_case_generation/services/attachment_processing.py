@@ -7,6 +7,7 @@ import shutil
 from yk_case_generation.services.docx_render import render_docx_to_pdf
 from yk_case_generation.services.pdf_render import pdf_to_images
 from yk_case_generation.services.image_preprocess import preprocess_image
+from yk_case_generation.services.spans import span
 
 ImageInfo = Tuple[int, Path]  # (page_number, image_path)
 
@@ -17,7 +18,8 @@ def prepare_images_for_ocr(path: Path) -> List[ImageInfo]:
     raw_images: List[Tuple[int, Path]] = []
 
     if ext == ".docx":
-        pdf_path = render_docx_to_pdf(path, Path(tempfile.mkdtemp(prefix="ykcg_docxpdf_")))
+        with span("docx_to_pdf"):
+            pdf_path = render_docx_to_pdf(path, Path(tempfile.mkdtemp(prefix="ykcg_docxpdf_")))
         imgs = pdf_to_images(pdf_path)
         raw_images = list(enumerate(imgs, start=1))
     elif ext == ".pdf":
@@ -31,6 +33,7 @@ def prepare_images_for_ocr(path: Path) -> List[ImageInfo]:
 
     processed: List[ImageInfo] = []
     for page_no, img_path in raw_images:
-        pre = preprocess_image(img_path)
+        with span("preprocess_page", page=page_no):
+            pre = preprocess_image(img_path)
         processed.append((page_no, pre))
     return processed
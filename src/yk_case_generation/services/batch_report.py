@@ -0,0 +1,249 @@
+"""Aggregate performance report over the ``run_meta.json`` files of a batch output dir.
+
+Files are read one at a time and reduced to a few numbers per project, so the report
+scales to large batches. ``compare_reports`` flags per-step latency, throughput and
+failure-rate regressions of one report against another.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from yk_case_generation.services.llm_metrics import percentile
+
+REPORT_VERSION = 1
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+# latency increases below this many seconds are noise, whatever the ratio
+MIN_LATENCY_DELTA_S = 0.05
+
+
+def iter_run_metas(output_dir: Path) -> Iterator[Dict[str, Any]]:
+    """Yield each ``run_meta.json`` under ``output_dir`` (any depth), skipping unreadable ones."""
+    for path in sorted(output_dir.rglob("run_meta.json")):
+        try:
+            yield json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+
+
+def build_batch_report(
+    output_dir: Path, slowest: int = 10, bucket_minutes: int = 10
+) -> Dict[str, Any]:
+    step_durations: Dict[str, List[float]] = {}
+    step_failures: Dict[str, int] = {}
+    statuses: Dict[str, int] = {}
+    failures: Dict[str, int] = {}
+    projects: List[Dict[str, Any]] = []
+    for meta in iter_run_metas(output_dir):
+        status = meta.get("status") or "unknown"
+        statuses[status] = statuses.get(status, 0) + 1
+        for step in meta.get("steps", []):
+            name = step.get("name", "?")
+            if step.get("duration_s") is not None:
+                step_durations.setdefault(name, []).append(float(step["duration_s"]))
+            if step.get("status") == "failed":
+                step_failures[name] = step_failures.get(name, 0) + 1
+                key = f"{name}: {failure_category(step.get('error'))}"
+                failures[key] = failures.get(key, 0) + 1
+        started, ended = _parse_time(meta.get("started_at")), _parse_time(meta.get("ended_at"))
+        stats = meta.get("stats") or {}
+        projects.append(
+            {
+                "project_number": meta.get("project_number"),
+                "status": status,
+                "started_at": started,
+                "ended_at": ended,
+                "duration_s": (ended - started).total_seconds() if started and ended else None,
+                "pages": stats.get("ocr_images_total") or 0,
+                "attachments": stats.get("attachments_total") or 0,
+            }
+        )
+    return {
+        "version": REPORT_VERSION,
+        "output_dir": str(output_dir),
+        "projects": len(projects),
+        "status": dict(sorted(statuses.items())),
+        "steps": {
+            name: {
+                **_latency(values),
+                "failed": step_failures.get(name, 0),
+            }
+            for name, values in sorted(step_durations.items())
+        },
+        "project_duration_s": _latency([p["duration_s"] for p in projects if p["duration_s"]]),
+        "throughput": _throughput(projects, bucket_minutes),
+        "slowest_projects": [
+            {
+                "project_number": p["project_number"],
+                "status": p["status"],
+                "duration_s": round(p["duration_s"], 3),
+                "pages": p["pages"],
+            }
+            for p in sorted(
+                (p for p in projects if p["duration_s"] is not None),
+                key=lambda p: p["duration_s"],
+                reverse=True,
+            )[:slowest]
+        ],
+        "failure_categories": dict(sorted(failures.items(), key=lambda kv: (-kv[1], kv[0]))),
+        "correlation": {
+            "pages_vs_duration": _pearson(
+                [(p["pages"], p["duration_s"]) for p in projects if p["duration_s"] is not None]
+            ),
+            "attachments_vs_duration": _pearson(
+                [
+                    (p["attachments"], p["duration_s"])
+                    for p in projects
+                    if p["duration_s"] is not None
+                ]
+            ),
+            "seconds_per_page": _seconds_per_page(projects),
+        },
+    }
+
+
+def compare_reports(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Regressions of ``current`` vs ``baseline``: step p50/p90, throughput, failure rate."""
+    regressions: List[Dict[str, Any]] = []
+
+    def check(scope: str, metric: str, cur: float | None, base: float | None, floor: float):
+        if cur is None or base is None or cur - base <= floor:
+            return
+        change = (cur - base) / base if base else math.inf
+        if change > threshold:
+            regressions.append(
+                {
+                    "scope": scope,
+                    "metric": metric,
+                    "baseline": base,
+                    "current": cur,
+                    "change": round(change, 3) if math.isfinite(change) else None,
+                    "threshold": threshold,
+                }
+            )
+
+    for name, values in current.get("steps", {}).items():
+        base_values = baseline.get("steps", {}).get(name) or {}
+        for metric in ("p50", "p90"):
+            check(
+                f"step:{name}",
+                metric,
+                values.get(metric),
+                base_values.get(metric),
+                MIN_LATENCY_DELTA_S,
+            )
+    for metric in ("p50", "p90"):
+        check(
+            "project",
+            metric,
+            current.get("project_duration_s", {}).get(metric),
+            baseline.get("project_duration_s", {}).get(metric),
+            MIN_LATENCY_DELTA_S,
+        )
+    # lower throughput is the regression: compare hours per project
+    cur_rate = current.get("throughput", {}).get("projects_per_hour")
+    base_rate = baseline.get("throughput", {}).get("projects_per_hour")
+    if cur_rate and base_rate:
+        check("throughput", "hours_per_project", 1 / cur_rate, 1 / base_rate, 0.0)
+    check("projects", "failure_rate", _failure_rate(current), _failure_rate(baseline), 0.01)
+    return regressions
+
+
+def load_report(path: Path) -> Dict[str, Any]:
+    """A saved report JSON, or a fresh report of an output dir."""
+    if path.is_dir():
+        return build_batch_report(path)
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def failure_category(error: str | None) -> str:
+    """Stable failure bucket: the error text before the first ``:``, digits masked."""
+    if not error:
+        return "unknown"
+    head = re.split(r"[:\n]", str(error), maxsplit=1)[0].strip()
+    return re.sub(r"\d+", "N", head)[:80] or "unknown"
+
+
+def _latency(values: List[float]) -> Dict[str, Any]:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50": percentile(ordered, 50),
+        "p90": percentile(ordered, 90),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else None,
+        "total": round(sum(ordered), 3),
+    }
+
+
+def _throughput(projects: List[Dict[str, Any]], bucket_minutes: int) -> Dict[str, Any]:
+    timed = [p for p in projects if p["started_at"] and p["ended_at"]]
+    if not timed:
+        return {"projects_per_hour": None, "buckets": []}
+    first = min(p["started_at"] for p in timed)
+    last = max(p["ended_at"] for p in timed)
+    span_s = (last - first).total_seconds()
+    width = timedelta(minutes=max(1, bucket_minutes))
+    buckets: Dict[int, Dict[str, int]] = {}
+    for p in timed:
+        idx = int((p["ended_at"] - first) / width)
+        bucket = buckets.setdefault(idx, {})
+        bucket[p["status"]] = bucket.get(p["status"], 0) + 1
+    return {
+        "first_started_at": first.isoformat(),
+        "last_ended_at": last.isoformat(),
+        "wall_s": round(span_s, 3),
+        "projects_per_hour": round(len(timed) * 3600 / span_s, 2) if span_s > 0 else None,
+        "bucket_minutes": max(1, bucket_minutes),
+        "buckets": [
+            {
+                "start": (first + idx * width).isoformat(),
+                "finished": sum(counts.values()),
+                "by_status": dict(sorted(counts.items())),
+            }
+            for idx, counts in sorted(buckets.items())
+        ],
+    }
+
+
+def _pearson(points: List[tuple[float, float]]) -> float | None:
+    if len(points) < 3:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    var_y = sum((y - mean_y) ** 2 for _, y in points)
+    if var_x == 0 or var_y == 0:
+        return None
+    return round(cov / math.sqrt(var_x * var_y), 3)
+
+
+def _seconds_per_page(projects: List[Dict[str, Any]]) -> float | None:
+    rated = [p["duration_s"] / p["pages"] for p in projects if p["pages"] and p["duration_s"]]
+    return percentile(sorted(rated), 50) if rated else None
+
+
+def _failure_rate(report: Dict[str, Any]) -> float | None:
+    total = report.get("projects") or 0
+    if not total:
+        return None
+    return round((report.get("status") or {}).get("failed", 0) / total, 4)
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
@@ -0,0 +1,210 @@
+"""Synthetic benchmark projects and local stand-ins for LIMS, attachment downloads and OCR.
+
+``generate_fixtures`` writes deterministic projects (LIMS payload plus PDF, DOCX, image and
+zip attachments of configurable size) under one directory; ``create_stand_in_app`` serves
+them over HTTP as the LIMS project-info endpoint, the attachment file server and a Tencent
+GeneralAccurateOCR-compatible endpoint, so ``run_project_pipeline`` runs unmodified against
+``LIMS_BASE_URL`` / ``TENCENT_OCR_ENDPOINT`` pointed at it.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import random
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+from docx import Document
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse
+from PIL import Image, ImageDraw
+
+LIMS_ROUTE = "/RD/getProjectInfo"
+_PAGE_SIZE = (827, 1169)  # A4 at 100 dpi
+_LINE_HEIGHT = 34
+_PHRASES = (
+    "主诉：反复胎停育{n}次，要求行胚胎染色体检测",
+    "现病史：末次月经后{n}周，B超提示胚胎停止发育",
+    "既往史：否认高血压、糖尿病等慢性病史",
+    "家族史：否认家族遗传病史，父母体健",
+    "孕产史：G{n}P0，既往自然流产{n}次",
+    "染色体核型：46,XX，未见明显异常",
+    "检测项目：CNV-seq 染色体拷贝数变异检测",
+    "样本类型：绒毛组织，送检日期 2024-0{n}-1{n}",
+    "临床诊断：复发性流产",
+    "超声检查：宫内见孕囊，未见胎心搏动",
+    "实验室检查：甲状腺功能未见异常",
+    "□ 知情同意书已签署  ☑ 受检者确认",
+)
+
+
+@dataclass
+class FixtureSpec:
+    projects: int = 3
+    pdfs: int = 1  # PDF attachments per project
+    pdf_pages: int = 3
+    docx: int = 1  # DOCX attachments per project
+    docx_paragraphs: int = 40
+    images: int = 2  # PNG attachments per project
+    archives: int = 1  # zip attachments per project (one PDF page + one image each)
+    ocr_lines: int = 25  # text lines the OCR stand-in returns per image
+    seed: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def generate_fixtures(root: Path, spec: FixtureSpec) -> List[str]:
+    """Write ``spec.projects`` synthetic projects under ``root``; returns their project numbers."""
+    rng = random.Random(spec.seed)
+    (root / "lims").mkdir(parents=True, exist_ok=True)
+    (root / "spec.json").write_text(json.dumps(spec.to_dict(), indent=2), encoding="utf-8")
+    project_numbers: List[str] = []
+    for idx in range(1, spec.projects + 1):
+        project_number = f"BENCH{idx:04d}"
+        files_dir = root / "files" / project_number
+        files_dir.mkdir(parents=True, exist_ok=True)
+        names: List[str] = []
+        for n in range(1, spec.pdfs + 1):
+            names.append(_write_pdf(files_dir / f"report{n}.pdf", spec.pdf_pages, rng))
+        for n in range(1, spec.docx + 1):
+            names.append(_write_docx(files_dir / f"order{n}.docx", spec.docx_paragraphs, rng))
+        for n in range(1, spec.images + 1):
+            names.append(_write_image(files_dir / f"scan{n}.png", rng))
+        for n in range(1, spec.archives + 1):
+            names.append(_write_archive(files_dir / f"bundle{n}.zip", rng))
+        payload = {
+            "projectNumber": project_number,
+            "salesNotes": _text(rng, 3),
+            "otherInfo": _text(rng, 2),
+            "communicationInformation": _text(rng, 2),
+            # attachment names are turned into stand-in URLs when served
+            "inspectionOrderAttachment": ",".join(n for n in names if n.startswith("order")),
+            "diagnosticReportAttachments": ",".join(n for n in names if not n.startswith("order")),
+        }
+        (root / "lims" / f"{project_number}.json").write_text(
+            json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        project_numbers.append(project_number)
+    return project_numbers
+
+
+def create_stand_in_app(root: Path, ocr_lines: int | None = None) -> FastAPI:
+    """LIMS, file download and Tencent OCR stand-ins serving the fixtures under ``root``."""
+    if ocr_lines is None:
+        spec_path = root / "spec.json"
+        spec = json.loads(spec_path.read_text(encoding="utf-8")) if spec_path.exists() else {}
+        ocr_lines = int(spec.get("ocr_lines", FixtureSpec.ocr_lines))
+    app = FastAPI(title="ykcg benchmark stand-ins")
+
+    @app.get(LIMS_ROUTE)
+    async def project_info(projectNumber: str, request: Request) -> Dict[str, Any]:  # noqa: N803
+        path = root / "lims" / f"{projectNumber}.json"
+        if not path.exists():
+            return {"code": 0, "msg": f"unknown project {projectNumber}"}
+        data = json.loads(path.read_text(encoding="utf-8"))
+        base = str(request.base_url).rstrip("/")
+        for key in ("inspectionOrderAttachment", "diagnosticReportAttachments"):
+            names = [n for n in str(data.get(key) or "").split(",") if n]
+            data[key] = ",".join(f"{base}/files/{projectNumber}/{n}" for n in names)
+        return {"code": 1, "data": data}
+
+    @app.get("/files/{project_number}/{name}")
+    async def download(project_number: str, name: str) -> FileResponse:
+        path = root / "files" / project_number / name
+        if "/" in name or ".." in name or not path.is_file():
+            raise HTTPException(status_code=404)
+        return FileResponse(path)
+
+    @app.post("/")
+    async def tencent_ocr(request: Request) -> Dict[str, Any]:
+        body = await request.body()
+        digest = hashlib.sha256(body).hexdigest()
+        return {"Response": ocr_response(digest, ocr_lines)}
+
+    return app
+
+
+def ocr_response(seed: str, lines: int) -> Dict[str, Any]:
+    """GeneralAccurateOCR-shaped result with ``lines`` deterministic detections."""
+    rng = random.Random(seed)
+    detections = []
+    for idx in range(lines):
+        top = 40 + idx * _LINE_HEIGHT
+        detections.append(
+            {
+                "DetectedText": _phrase(rng),
+                "Confidence": rng.randint(55, 99),
+                "Polygon": [
+                    {"X": 40, "Y": top},
+                    {"X": 780, "Y": top},
+                    {"X": 780, "Y": top + 28},
+                    {"X": 40, "Y": top + 28},
+                ],
+                "AdvancedInfo": json.dumps({"Parag": {"ParagNo": idx // 4 + 1}}),
+            }
+        )
+    return {"TextDetections": detections, "Angle": 0.0, "RequestId": seed[:32]}
+
+
+def _phrase(rng: random.Random) -> str:
+    return rng.choice(_PHRASES).format(n=rng.randint(1, 9))
+
+
+def _text(rng: random.Random, sentences: int) -> str:
+    return "；".join(_phrase(rng) for _ in range(sentences))
+
+
+def _page_image(rng: random.Random) -> Image.Image:
+    # Pages carry ASCII stand-in text: the OCR stand-in does not read pixels, but rendering,
+    # preprocessing and JPEG encoding still see realistic non-blank scans.
+    img = Image.new("RGB", _PAGE_SIZE, "white")
+    draw = ImageDraw.Draw(img)
+    for y in range(40, _PAGE_SIZE[1] - 40, _LINE_HEIGHT):
+        words = " ".join(f"{rng.randrange(16**6):06x}" for _ in range(rng.randint(4, 10)))
+        draw.text((40, y), words, fill=(rng.randint(0, 60),) * 3)
+    return img
+
+
+def _write_pdf(path: Path, pages: int, rng: random.Random) -> str:
+    path.write_bytes(_pdf_bytes(pages, rng))
+    return path.name
+
+
+def _write_docx(path: Path, paragraphs: int, rng: random.Random) -> str:
+    doc = Document()
+    doc.add_heading("送检单", level=1)
+    for idx in range(paragraphs):
+        doc.add_paragraph(_phrase(rng))
+        if idx and idx % 30 == 0:
+            doc.add_page_break()
+    doc.save(str(path))
+    return path.name
+
+
+def _write_image(path: Path, rng: random.Random) -> str:
+    path.write_bytes(_png_bytes(rng))
+    return path.name
+
+
+def _write_archive(path: Path, rng: random.Random) -> str:
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("inner_report.pdf", _pdf_bytes(1, rng))
+        zf.writestr("inner_scan.png", _png_bytes(rng))
+    return path.name
+
+
+def _pdf_bytes(pages: int, rng: random.Random) -> bytes:
+    images = [_page_image(rng) for _ in range(max(1, pages))]
+    buf = io.BytesIO()
+    images[0].save(buf, "PDF", resolution=100.0, save_all=True, append_images=images[1:])
+    return buf.getvalue()
+
+
+def _png_bytes(rng: random.Random) -> bytes:
+    buf = io.BytesIO()
+    _page_image(rng).save(buf, "PNG")
+    return buf.getvalue()
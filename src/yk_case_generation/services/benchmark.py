@@ -0,0 +1,351 @@
+"""End-to-end pipeline benchmark against synthetic fixtures and local stand-in services.
+
+``run_benchmark`` generates fixture projects, serves them through the LIMS/download/OCR
+stand-ins and the mock LLM server (in a child process, so their CPU and memory stay out
+of the measurements), runs ``run_project_pipeline`` for each project and
+measures every step (wall time, CPU time including child processes, peak RSS, bytes
+written under the work directory). ``compare_results`` checks a result file against a
+stored baseline with per-metric regression thresholds.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import platform
+import resource
+import socket
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from yk_case_generation.config import settings
+from yk_case_generation.services.bench_fixtures import (
+    LIMS_ROUTE,
+    FixtureSpec,
+    create_stand_in_app,
+    generate_fixtures,
+)
+from yk_case_generation.services.mock_llm_server import (
+    MOCK_ROUTE,
+    MockLLMConfig,
+    create_mock_llm_app,
+)
+from yk_case_generation.services.pipeline_runner import probe_steps, run_project_pipeline
+
+RESULTS_VERSION = 1
+METRICS = ("wall_s", "cpu_s", "peak_rss_mb", "bytes_written")
+# Relative increase over baseline that counts as a regression ...
+DEFAULT_THRESHOLDS: Dict[str, float] = {
+    "wall_s": 0.25,
+    "cpu_s": 0.25,
+    "peak_rss_mb": 0.20,
+    "bytes_written": 0.10,
+}
+# ... provided the absolute increase also exceeds this noise floor.
+MIN_ABS_DELTA: Dict[str, float] = {
+    "wall_s": 0.05,
+    "cpu_s": 0.05,
+    "peak_rss_mb": 10.0,
+    "bytes_written": 64 * 1024,
+}
+
+
+class StepResourceProbe:
+    """``probe_steps`` probe that records resource usage of each pipeline step."""
+
+    def __init__(self, work_dir: Path):
+        self.work_dir = work_dir
+        self.steps: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def __call__(self, name: str) -> Iterator[None]:
+        bytes_before = _tree_bytes(self.work_dir)
+        _reset_peak_rss()
+        cpu_before = _cpu_s()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_s = time.perf_counter() - started
+            cpu_s = _cpu_s() - cpu_before
+            self.steps.append(
+                {
+                    "step": name,
+                    "wall_s": round(wall_s, 4),
+                    "cpu_s": round(cpu_s, 4),
+                    "peak_rss_mb": round(_peak_rss_mb(), 1),
+                    "bytes_written": max(0, _tree_bytes(self.work_dir) - bytes_before),
+                }
+            )
+
+
+def run_benchmark(
+    work_dir: Path,
+    spec: FixtureSpec,
+    repeat: int = 1,
+    mode: str | None = "llm",
+    llm_latency_ms: float = 0.0,
+) -> Dict[str, Any]:
+    """Generate fixtures under ``work_dir`` and benchmark the full pipeline on them."""
+    fixtures_dir = work_dir / "fixtures"
+    runs_dir = work_dir / "runs"
+    project_numbers = generate_fixtures(fixtures_dir, spec)
+    llm_config = MockLLMConfig(latency_ms=llm_latency_ms, jitter_ms=0.0, seed=spec.seed)
+    projects: List[Dict[str, Any]] = []
+    with _stand_in_process(fixtures_dir, llm_config) as (base_url, llm_url), _bench_settings(
+        base_url, llm_url
+    ), _temp_dir(work_dir / "tmp"):
+        started = time.perf_counter()
+        for rep in range(max(1, repeat)):
+            for project_number in project_numbers:
+                probe = StepResourceProbe(work_dir)
+                with probe_steps(probe):
+                    meta = run_project_pipeline(
+                        project_number, runs_dir / f"rep{rep}", mode=mode, llm_cache=False
+                    )
+                projects.append(
+                    {
+                        "project_number": project_number,
+                        "repeat": rep,
+                        "status": meta["status"],
+                        "error": meta.get("error"),
+                        "steps": probe.steps,
+                    }
+                )
+        wall_s = time.perf_counter() - started
+    return {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment(),
+        "spec": spec.to_dict(),
+        "mode": mode,
+        "repeat": max(1, repeat),
+        "llm_latency_ms": llm_latency_ms,
+        "wall_s": round(wall_s, 3),
+        "steps": _aggregate_steps(projects),
+        "total": _aggregate_totals(projects),
+        "projects": projects,
+    }
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    thresholds: Dict[str, float] | None = None,
+) -> List[Dict[str, Any]]:
+    """Regressions of ``current`` against ``baseline``, per step and for the per-project total.
+
+    Thresholds are relative increases; defaults are overridden by ``baseline["thresholds"]``
+    and then by ``thresholds``.
+    """
+    limits = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {}), **(thresholds or {})}
+    scopes = {f"step:{name}": values for name, values in current.get("steps", {}).items()}
+    scopes["total"] = current.get("total", {})
+    base_scopes = {f"step:{name}": values for name, values in baseline.get("steps", {}).items()}
+    base_scopes["total"] = baseline.get("total", {})
+    regressions: List[Dict[str, Any]] = []
+    for scope, values in scopes.items():
+        base_values = base_scopes.get(scope) or {}
+        for metric, limit in limits.items():
+            cur, base = values.get(metric), base_values.get(metric)
+            if cur is None or base is None:
+                continue
+            delta = cur - base
+            if delta <= MIN_ABS_DELTA.get(metric, 0.0):
+                continue
+            change = delta / base if base else float("inf")
+            if change > limit:
+                regressions.append(
+                    {
+                        "scope": scope,
+                        "metric": metric,
+                        "baseline": base,
+                        "current": cur,
+                        "change": round(change, 3),
+                        "threshold": limit,
+                    }
+                )
+    return regressions
+
+
+def parse_thresholds(items: List[str]) -> Dict[str, float]:
+    """Parse ``metric=ratio`` CLI items, e.g. ``wall_s=0.3``."""
+    out: Dict[str, float] = {}
+    for item in items:
+        metric, sep, value = item.partition("=")
+        if not sep or metric not in METRICS:
+            raise ValueError(f"threshold must be one of {METRICS} as metric=ratio, got {item!r}")
+        out[metric] = float(value)
+    return out
+
+
+def _aggregate_steps(projects: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    samples: Dict[str, List[Dict[str, Any]]] = {}
+    for project in projects:
+        for step in project["steps"]:
+            samples.setdefault(step["step"], []).append(step)
+    return {name: _summarize(rows) for name, rows in samples.items()}
+
+
+def _aggregate_totals(projects: List[Dict[str, Any]]) -> Dict[str, Any]:
+    rows = [
+        {
+            "wall_s": sum(s["wall_s"] for s in p["steps"]),
+            "cpu_s": sum(s["cpu_s"] for s in p["steps"]),
+            "peak_rss_mb": max((s["peak_rss_mb"] for s in p["steps"]), default=0.0),
+            "bytes_written": sum(s["bytes_written"] for s in p["steps"]),
+        }
+        for p in projects
+    ]
+    summary = _summarize(rows)
+    summary["failed_projects"] = sum(1 for p in projects if p["status"] == "failed")
+    return summary
+
+
+def _summarize(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Medians per project for time and bytes; the maximum for peak RSS."""
+    if not rows:
+        return {"samples": 0}
+    return {
+        "samples": len(rows),
+        "wall_s": round(statistics.median(r["wall_s"] for r in rows), 4),
+        "cpu_s": round(statistics.median(r["cpu_s"] for r in rows), 4),
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in rows),
+        "bytes_written": int(statistics.median(r["bytes_written"] for r in rows)),
+    }
+
+
+@contextmanager
+def _stand_in_process(fixtures_dir: Path, llm_config: MockLLMConfig) -> Iterator[tuple[str, str]]:
+    """Serve the stand-ins and the mock LLM from one child process; yields their base URLs."""
+    ports = (_free_port(), _free_port())
+    proc = multiprocessing.get_context("spawn").Process(
+        target=_serve_stand_ins, args=(fixtures_dir, llm_config, ports), daemon=True
+    )
+    proc.start()
+    try:
+        deadline = time.monotonic() + 30
+        while not all(_accepting(port) for port in ports):
+            if not proc.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("benchmark stand-in services failed to start")
+            time.sleep(0.05)
+        yield f"http://127.0.0.1:{ports[0]}", f"http://127.0.0.1:{ports[1]}{MOCK_ROUTE}"
+    finally:
+        proc.terminate()
+        proc.join(timeout=10)
+
+
+def _serve_stand_ins(fixtures_dir: Path, llm_config: MockLLMConfig, ports: tuple[int, int]):
+    import asyncio
+
+    import uvicorn
+
+    async def main() -> None:
+        servers = [
+            uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning", lifespan="off"))
+            for app, port in zip(
+                (create_stand_in_app(fixtures_dir), create_mock_llm_app(llm_config)), ports
+            )
+        ]
+        await asyncio.gather(*(server.serve() for server in servers))
+
+    asyncio.run(main())
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _accepting(port: int) -> bool:
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def _bench_settings(base_url: str, llm_url: str) -> Iterator[None]:
+    overrides = {
+        "lims_base_url": base_url + LIMS_ROUTE,
+        "tencent_ocr_endpoint": base_url,
+        "tencent_secret_id": "bench",
+        "tencent_secret_key": "bench",
+        "llm_endpoint": llm_url,
+        "llm_api_key": "bench",
+        "io_cassette_mode": "off",
+    }
+    saved = {key: getattr(settings, key) for key in overrides}
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            setattr(settings, key, value)
+
+
+@contextmanager
+def _temp_dir(path: Path) -> Iterator[None]:
+    # Steps render pages into tempfile.mkdtemp() dirs; keep them in the work dir so their
+    # writes are counted.
+    path.mkdir(parents=True, exist_ok=True)
+    saved = tempfile.tempdir
+    tempfile.tempdir = str(path)
+    try:
+        yield
+    finally:
+        tempfile.tempdir = saved
+
+
+def _tree_bytes(root: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def _cpu_s() -> float:
+    # includes waited-for child processes (pdftoppm, libreoffice, unrar, 7z)
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _reset_peak_rss() -> None:
+    # Linux: writing 5 to clear_refs resets VmHWM so the next reading is this step's peak.
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Process-lifetime peak: KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def _environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "llm_model": settings.llm_model,
+    }
@@ -2,9 +2,12 @@
 from __future__ import annotations
 
 import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
 from yk_case_generation.models.document_ir import DocumentIR, Line, Source, Page
+from yk_case_generation.services.prompt_builder import compact_json, estimate_tokens
 
 _FORM_NOISE_KEYWORDS = (
     "版本号",
@@ -78,6 +81,17 @@ _SECTION_HINTS = {
     "patient_info": _PATIENT_SIGNAL_KEYWORDS,
 }
 
+# Rank weights used when trimming candidates to the stage-1 token budget.
+_SECTION_HINT_WEIGHTS = {
+    "diagnosis": 8,
+    "chief_complaint": 8,
+    "medical_history": 8,
+    "family_history": 6,
+    "patient_info": 4,
+    "tests_and_exams": 1,
+    "plan": 1,
+}
+
 _ANCHOR_HINTS = {
     "diagnosis": ("临床诊断", "诊断", "病例", "病历", "结论"),
     "chief_complaint": ("主诉", "送检原因", "就诊原因"),
@@ -88,8 +102,109 @@ _ANCHOR_HINTS = {
 }
 
 
+@dataclass
+class CandidateSelection:
+    kept: List[Dict[str, Any]]
+    dropped: List[Dict[str, Any]]
+    token_budget: int
+    kept_tokens: int
+    dropped_tokens: int
+
+    def audit(self) -> Dict[str, Any]:
+        return {
+            "token_budget": self.token_budget,
+            "kept_count": len(self.kept),
+            "kept_tokens_est": self.kept_tokens,
+            "dropped_count": len(self.dropped),
+            "dropped_tokens_est": self.dropped_tokens,
+            "dropped": [
+                {
+                    "source_id": f["source_id"],
+                    "page": f["page"],
+                    "line_id": f["line_id"],
+                    "quote": f["quote"][:80],
+                }
+                for f in self.dropped
+            ],
+        }
+
+
 def build_candidate_facts(document_ir: DocumentIR) -> List[Dict[str, Any]]:
-    facts: List[Dict[str, Any]] = []
+    return [fact for fact, _ in _collect_candidates(document_ir)]
+
+
+def build_budgeted_candidate_facts(
+    document_ir: DocumentIR, token_budget: int
+) -> CandidateSelection:
+    """Rank candidates and trim them to ``token_budget`` estimated tokens.
+
+    LIMS high-priority facts are always kept (even past the budget); the remaining budget
+    goes to OCR candidates by rank. Kept facts preserve their original order.
+    """
+    scored = _collect_candidates(document_ir)
+    costs = [estimate_tokens(compact_json(fact)) for fact, _ in scored]
+    keep = [False] * len(scored)
+    used = 0
+    for idx, (fact, _) in enumerate(scored):
+        if _is_guaranteed(fact):
+            keep[idx] = True
+            used += costs[idx]
+    if token_budget > 0:
+        order = sorted((i for i in range(len(scored)) if not keep[i]), key=lambda i: -scored[i][1])
+        for idx in order:
+            if used + costs[idx] <= token_budget:
+                keep[idx] = True
+                used += costs[idx]
+    else:
+        keep = [True] * len(scored)
+        used = sum(costs)
+
+    kept = [fact for (fact, _), k in zip(scored, keep) if k]
+    dropped = [fact for (fact, _), k in zip(scored, keep) if not k]
+    return CandidateSelection(
+        kept=kept,
+        dropped=dropped,
+        token_budget=token_budget,
+        kept_tokens=used,
+        dropped_tokens=sum(c for c, k in zip(costs, keep) if not k),
+    )
+
+
+def chunk_candidate_facts(
+    facts: List[Dict[str, Any]], chunk_tokens: int
+) -> List[List[Dict[str, Any]]]:
+    """Split candidates into chunks of about ``chunk_tokens`` for map-reduce stage 1.
+
+    Facts are grouped by source (split into consecutive page groups when one source is
+    larger than a chunk), then small groups are packed together in order. A single
+    oversized fact forms its own chunk.
+    """
+    groups: List[List[Any]] = []  # [facts, est_tokens]
+    current_source: str | None = None
+    for fact in facts:
+        cost = estimate_tokens(compact_json(fact))
+        if groups and fact["source_id"] == current_source and groups[-1][1] + cost <= chunk_tokens:
+            groups[-1][0].append(fact)
+            groups[-1][1] += cost
+        else:
+            groups.append([[fact], cost])
+        current_source = fact["source_id"]
+
+    chunks: List[List[Dict[str, Any]]] = []
+    chunk_cost = 0
+    for group, cost in groups:
+        if chunks and chunk_cost + cost <= chunk_tokens:
+            chunks[-1].extend(group)
+            chunk_cost += cost
+        else:
+            chunks.append(list(group))
+            chunk_cost = cost
+    return chunks
+
+
+def _collect_candidates(document_ir: DocumentIR) -> List[Tuple[Dict[str, Any], float]]:
+    """Return candidate facts paired with a rank score (higher is more valuable)."""
+    facts: List[Tuple[Dict[str, Any], float]] = []
     dedup_seen: set[str] = set()
 
     for source in document_ir.sources:
@@ -104,27 +219,26 @@ def build_candidate_facts(document_ir: DocumentIR) -> List[Dict[str, Any]]:
                     if key in dedup_seen:
                         continue
                     dedup_seen.add(key)
-                    facts.append(
-                        {
-                            "source_id": source.source_id,
-                            "page": page.page_number,
-                            "line_id": line.line_id,
-                            "quote": text,
-                            "priority": "high",
-                            "section_hints": _section_hints(text),
-                            "flags": line.flags or {},
-                        }
-                    )
+                    fact = {
+                        "source_id": source.source_id,
+                        "page": page.page_number,
+                        "line_id": line.line_id,
+                        "quote": text,
+                        "priority": "high",
+                        "section_hints": _section_hints(text),
+                        "flags": line.flags or {},
+                    }
+                    facts.append((fact, _rank_score(fact)))
             continue
 
         # For OCR sources, anchor-neighborhood candidates are preferred.
         anchor_candidates = _build_anchor_neighborhood_candidates(source)
-        for item in anchor_candidates:
+        for item, neighbor_rank in anchor_candidates:
             key = _dedup_key_raw(item["source_id"], item["page"], item["quote"])
             if key in dedup_seen:
                 continue
             dedup_seen.add(key)
-            facts.append(item)
+            facts.append((item, _rank_score(item, neighbor_rank)))
 
         for page in source.pages:
             for line in page.lines:
@@ -139,21 +253,41 @@ def build_candidate_facts(document_ir: DocumentIR) -> List[Dict[str, Any]]:
                     continue
                 dedup_seen.add(key)
 
-                facts.append(
-                    {
-                        "source_id": source.source_id,
-                        "page": page.page_number,
-                        "line_id": line.line_id,
-                        "quote": text,
-                        "priority": "normal",
-                        "section_hints": _section_hints(text),
-                        "flags": line.flags or {},
-                    }
-                )
+                fact = {
+                    "source_id": source.source_id,
+                    "page": page.page_number,
+                    "line_id": line.line_id,
+                    "quote": text,
+                    "priority": "normal",
+                    "section_hints": _section_hints(text),
+                    "flags": line.flags or {},
+                }
+                facts.append((fact, _rank_score(fact)))
 
     return facts
 
 
+def _is_guaranteed(fact: Dict[str, Any]) -> bool:
+    return fact["priority"] == "high" and str(fact["source_id"]).startswith("lims_text_")
+
+
+def _rank_score(fact: Dict[str, Any], neighbor_rank: int | None = None) -> float:
+    score = 0.0
+    if fact["priority"] == "high":
+        score += 20
+    if neighbor_rank is not None:
+        # Closer neighbours of a section anchor are more likely to be its value.
+        score += max(0, 12 - neighbor_rank)
+    for hint in fact["section_hints"]:
+        score += _SECTION_HINT_WEIGHTS.get(hint, 0)
+    flags = fact["flags"]
+    if flags.get("checkbox_state") == "checked":
+        score += 5
+    if flags.get("low_confidence"):
+        score -= 8
+    return score
+
+
 def _keep_line(source: Source, line: Line, text: str) -> bool:
     flags = line.flags or {}
     if flags.get("form_template") and flags.get("checkbox_state") == "unchecked":
@@ -209,16 +343,16 @@ def _dedup_key_raw(source_id: str, page: int | None, text: str) -> str:
     return f"{source_id}:{page}:{norm}"
 
 
-def _build_anchor_neighborhood_candidates(source: Source) -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
+def _build_anchor_neighborhood_candidates(source: Source) -> List[Tuple[Dict[str, Any], int]]:
+    out: List[Tuple[Dict[str, Any], int]] = []
     for page in source.pages:
         anchors = _find_page_anchors(page)
         if not anchors:
             continue
-        vertical_mode = _is_vertical_page(page)
+        page_lines = _PageLines(page, _is_vertical_page(page))
         for section, anchor_line in anchors:
-            neighbors = _find_neighbors(page, anchor_line, vertical_mode)
-            for line in neighbors:
+            neighbors = _find_neighbors(page_lines, anchor_line)
+            for neighbor_rank, line in enumerate(neighbors):
                 text = (line.text or "").strip()
                 if not text:
                     continue
@@ -230,15 +364,18 @@ def _build_anchor_neighborhood_candidates(source: Source) -> List[Dict[str, Any]
                 if section not in hints:
                     hints = [section] + hints
                 out.append(
-                    {
-                        "source_id": source.source_id,
-                        "page": page.page_number,
-                        "line_id": line.line_id,
-                        "quote": text,
-                        "priority": "high",
-                        "section_hints": hints,
-                        "flags": line.flags or {},
-                    }
+                    (
+                        {
+                            "source_id": source.source_id,
+                            "page": page.page_number,
+                            "line_id": line.line_id,
+                            "quote": text,
+                            "priority": "high",
+                            "section_hints": hints,
+                            "flags": line.flags or {},
+                        },
+                        neighbor_rank,
+                    )
                 )
     return out
 
@@ -278,20 +415,44 @@ def _is_detection_noise(text: str) -> bool:
     return _contains_any(text, _DETECTION_NOISE_KEYWORDS)
 
 
-def _find_neighbors(page: Page, anchor: Line, vertical_mode: bool) -> List[Line]:
+_LineEntry = Tuple[float, int, Tuple[float, float], Line]  # (axis key, page index, center, line)
+
+
+class _PageLines:
+    """Lines of one page sorted by center along the axis that bounds the neighbour search
+    (x for vertical pages, y otherwise), so each anchor only scores lines in its band."""
+
+    def __init__(self, page: Page, vertical_mode: bool):
+        self.vertical_mode = vertical_mode
+        axis = 0 if vertical_mode else 1
+        entries: List[_LineEntry] = []
+        for idx, line in enumerate(page.lines):
+            center = _line_center(line)
+            if center is not None:
+                entries.append((center[axis], idx, center, line))
+        entries.sort(key=lambda e: (e[0], e[1]))
+        self._entries = entries
+        self._keys = [e[0] for e in entries]
+
+    def band(self, value: float, radius: float) -> List[_LineEntry]:
+        # one unit of slack; callers re-check the exact bound
+        lo = bisect_left(self._keys, value - radius - 1)
+        hi = bisect_right(self._keys, value + radius + 1)
+        return self._entries[lo:hi]
+
+
+def _find_neighbors(page_lines: _PageLines, anchor: Line) -> List[Line]:
     anchor_center = _line_center(anchor)
     if anchor_center is None:
         return []
     ax, ay = anchor_center
+    vertical_mode = page_lines.vertical_mode
+    band = page_lines.band(ax, 130) if vertical_mode else page_lines.band(ay, 90)
 
-    scored: List[Tuple[float, Line]] = []
-    for line in page.lines:
+    scored: List[Tuple[float, int, Line]] = []
+    for _, idx, (cx, cy), line in band:
         if line.line_id == anchor.line_id:
             continue
-        center = _line_center(line)
-        if center is None:
-            continue
-        cx, cy = center
         dx = abs(cx - ax)
         dy = abs(cy - ay)
 
@@ -304,10 +465,11 @@ def _find_neighbors(page: Page, anchor: Line, vertical_mode: bool) -> List[Line]
                 continue
             score = dy * 2.0 + dx * 0.7
 
-        scored.append((score, line))
+        scored.append((score, idx, line))
 
-    scored.sort(key=lambda x: x[0])
-    return [line for _, line in scored[:12]]
+    # page order breaks score ties
+    scored.sort(key=lambda x: (x[0], x[1]))
+    return [line for _, _, line in scored[:12]]
 
 
 def _line_center(line: Line) -> Optional[Tuple[float, float]]:
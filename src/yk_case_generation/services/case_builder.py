@@ -1,17 +1,45 @@
 """Case builder for MVP: rule-based extraction + optional LLM mode."""
 from __future__ import annotations
-import json
+import contextvars
 import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
-
-from jsonschema import validate, ValidationError
+from typing import Any, Dict, List, Tuple
 
 from yk_case_generation.config import settings
 from yk_case_generation.models.document_ir import DocumentIR, Source, Line
-from yk_case_generation.models.case_schema import load_schema
-from yk_case_generation.services.candidate_fact_builder import build_candidate_facts
-from yk_case_generation.services.llm_client import LLMClient
+from yk_case_generation.models.case_schema import (
+    load_schema,
+    schema_errors,
+    validate_instance,
+    validator_for,
+)
+from yk_case_generation.services.case_repair import repair_case_structure
+from yk_case_generation.services.candidate_fact_builder import (
+    build_budgeted_candidate_facts,
+    build_candidate_facts,
+    chunk_candidate_facts,
+)
+from yk_case_generation.services.llm_client import LLMClient, get_llm_client
+from yk_case_generation.services.llm_metrics import (
+    LLMRunMetrics,
+    collect_llm_metrics,
+    record_llm_audit,
+    record_prompt_estimate,
+    use_llm_metrics,
+)
+from yk_case_generation.services.prompt_builder import (
+    PromptBundle,
+    build_repair_prompt,
+    build_stage1_batch_prompt,
+    build_stage1_prompt,
+    build_stage2_batch_prompt,
+    build_stage2_prompt,
+    compact_json,
+    estimate_tokens,
+)
 
 _NEGATION_HINTS = ("否认", "未见", "无明显", "无异常", "未发现", "未提示", "没有", "阴性")
 _DIAGNOSIS_HINTS = ("诊断", "临床诊断", "病历", "疾病")
@@ -20,19 +48,32 @@ _HISTORY_HINTS = ("既往史", "病史", "家族史")
 # 最终输出中不下发表单选项/检测套餐等无关内容；tests_and_exams 仍可留作内部调试但不会暴露给业务端
 _DISALLOW_SECTIONS = {"diagnosis", "tests_and_exams"}
 _PROMPT_DIR = Path(__file__).resolve().parent.parent / "prompts"
+_CASE_SECTIONS = (
+    "patient_info",
+    "chief_complaint",
+    "medical_history",
+    "family_history",
+    "tests_and_exams",
+    "diagnosis",
+)
+# Base trust in a rule-built fact by the source type of its evidence (hybrid mode).
+_SOURCE_TYPE_CONFIDENCE = {"lims_text": 1.0, "docx": 0.85, "ocr_attachment": 0.65}
 
 
 def generate_case(
     document_ir: DocumentIR,
     schema_path: str | None = None,
     mode: str | None = None,
+    llm_cache: bool | None = None,
 ) -> Dict[str, Any]:
     schema = load_schema(schema_path)
     run_mode = (mode or settings.llm_mode).lower()
     if run_mode == "llm":
-        case = _generate_with_llm(document_ir, schema)
+        case = _generate_with_llm(document_ir, schema, use_cache=llm_cache)
     elif run_mode == "rule":
         case = _generate_with_rules(document_ir)
+    elif run_mode == "hybrid":
+        case = _generate_hybrid(document_ir, schema, use_cache=llm_cache)
     else:
         raise ValueError(f"Unknown case builder mode: {run_mode}")
 
@@ -75,20 +116,327 @@ def _generate_with_rules(document_ir: DocumentIR) -> Dict[str, Any]:
     return case
 
 
-def _generate_with_llm(document_ir: DocumentIR, schema: dict[str, Any]) -> Dict[str, Any]:
+def _generate_with_llm(
+    document_ir: DocumentIR,
+    schema: dict[str, Any],
+    use_cache: bool | None = None,
+) -> Dict[str, Any]:
     if not settings.llm_endpoint or not settings.llm_api_key:
         raise ValueError("LLM mode requested but LLM_ENDPOINT or LLM_API_KEY not set")
-    client = LLMClient()
+    client = get_llm_client(use_cache=use_cache)
 
     stage1 = _llm_stage1_select_facts(client, document_ir)
     stage2 = _llm_stage2_build_case(client, document_ir, schema, stage1)
-    stage2 = _enforce_content_guardrails(stage2)
+    stage2 = _repair_structure(client, document_ir, schema, stage2)
+    return _enforce_content_guardrails(stage2)
 
-    try:
-        validate(instance=stage2, schema=schema)
-        return stage2
-    except ValidationError as exc:
-        return _llm_repair_structure(client, schema, stage2, exc.message)
+
+def generate_cases_batched(
+    documents: List[DocumentIR],
+    schema_path: str | None = None,
+    llm_cache: bool | None = None,
+) -> tuple[Dict[str, Dict[str, Any] | str], Dict[str, LLMRunMetrics]]:
+    """LLM-mode generation for several projects, packing small ones into shared requests.
+
+    Stage-1 and stage-2 payloads of small projects are packed up to
+    ``LLM_BATCH_TOKEN_BUDGET`` estimated tokens per request and split back by case_id.
+    Projects that are too large, missing from a batched response, or whose batched case
+    fails validation are retried with individual calls. Returns, per case_id, the case
+    or an error string, plus each project's LLM metrics.
+    """
+    if not settings.llm_endpoint or not settings.llm_api_key:
+        raise ValueError("LLM mode requested but LLM_ENDPOINT or LLM_API_KEY not set")
+    schema = load_schema(schema_path)
+    validator = validator_for(schema)
+    client = get_llm_client(use_cache=llm_cache)
+    docs = {doc.case_id: doc for doc in documents}
+    metrics = {case_id: LLMRunMetrics() for case_id in docs}
+    audits: Dict[str, Dict[str, Any]] = {
+        case_id: {
+            "stage1_batch_size": 1,
+            "stage2_batch_size": 1,
+            "stage2_retried_individually": False,
+        }
+        for case_id in docs
+    }
+    results: Dict[str, Dict[str, Any] | str] = {}
+    batch_prompt = _load_prompt("case_batch_zh.md")
+
+    candidates: Dict[str, List[Dict[str, Any]]] = {}
+    costs: Dict[str, int] = {}
+    for case_id, doc in docs.items():
+        with use_llm_metrics(metrics[case_id]):
+            selection = build_budgeted_candidate_facts(doc, settings.llm_stage1_token_budget)
+            record_llm_audit("stage1_candidates", selection.audit())
+        candidates[case_id] = selection.kept
+        costs[case_id] = selection.kept_tokens
+
+    stage1: Dict[str, Dict[str, Any]] = {}
+    for group in _pack_batches(list(docs), costs):
+        batched: Dict[str, Dict[str, Any]] = {}
+        if len(group) > 1:
+            bundle = build_stage1_batch_prompt(
+                _load_prompt("case_stage1_zh.md"),
+                batch_prompt,
+                [{"case_id": case_id, "candidate_facts": candidates[case_id]} for case_id in group],
+            )
+            batched = _call_llm_batch(client, bundle, group, metrics)
+        for case_id in group:
+            out = batched.get(case_id)
+            if out is not None and isinstance(out.get("selected_facts"), list):
+                stage1[case_id] = out
+                audits[case_id]["stage1_batch_size"] = len(group)
+                continue
+            try:
+                with use_llm_metrics(metrics[case_id]):
+                    stage1[case_id] = _llm_stage1_select_facts(client, docs[case_id])
+            except Exception as exc:  # noqa: BLE001
+                results[case_id] = f"stage1_failed: {exc}"
+
+    inputs = {case_id: _stage2_inputs(docs[case_id], out) for case_id, out in stage1.items()}
+    costs = {case_id: estimate_tokens(compact_json(data)) for case_id, data in inputs.items()}
+    for group in _pack_batches(list(inputs), costs):
+        batched = {}
+        if len(group) > 1:
+            bundle = build_stage2_batch_prompt(
+                _load_prompt("case_stage2_zh.md"),
+                batch_prompt,
+                schema,
+                [inputs[case_id] for case_id in group],
+            )
+            batched = _call_llm_batch(client, bundle, group, metrics)
+        for case_id in group:
+            doc = docs[case_id]
+            with use_llm_metrics(metrics[case_id]):
+                try:
+                    case = batched.get(case_id)
+                    if case is not None:
+                        case = _repair_structure(client, doc, schema, case, llm_fallback=False)
+                        if next(validator.iter_errors(case), None) is None:
+                            audits[case_id]["stage2_batch_size"] = len(group)
+                        else:
+                            case = None
+                            audits[case_id]["stage2_retried_individually"] = True
+                    if case is None:
+                        case = _llm_stage2_build_case(client, doc, schema, stage1[case_id])
+                        case = _repair_structure(client, doc, schema, case)
+                    case = _enforce_content_guardrails(case)
+                    _validate_case(case, schema)
+                    results[case_id] = case
+                except Exception as exc:  # noqa: BLE001
+                    results[case_id] = str(exc)
+
+    for case_id, audit in audits.items():
+        metrics[case_id].audit["batch"] = audit
+    return results, metrics
+
+
+def _pack_batches(case_ids: List[str], costs: Dict[str, int]) -> List[List[str]]:
+    """Greedily pack projects (in order) into groups within the batch token budget."""
+    budget = settings.llm_batch_token_budget
+    max_cases = max(1, settings.llm_batch_max_cases)
+    groups: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for case_id in case_ids:
+        cost = costs.get(case_id, 0)
+        if cost > budget // 2:
+            groups.append([case_id])
+            continue
+        if current and (used + cost > budget or len(current) >= max_cases):
+            groups.append(current)
+            current, used = [], 0
+        current.append(case_id)
+        used += cost
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _call_llm_batch(
+    client: LLMClient,
+    bundle: PromptBundle,
+    group: List[str],
+    metrics: Dict[str, LLMRunMetrics],
+) -> Dict[str, Dict[str, Any]]:
+    """Send one batched request and split ``results`` back by case_id (missing ones omitted)."""
+    size = len(group)
+    with collect_llm_metrics() as shared:
+        try:
+            out = client.generate_json(
+                bundle.system, bundle.user, temperature=0.0, stage=bundle.stage
+            )
+        except Exception:  # noqa: BLE001 - members fall back to individual calls
+            out = {}
+    for case_id in group:
+        for call in shared.calls:
+            metrics[case_id].add(replace(call, batch_size=size))
+        metrics[case_id].add_prompt_estimate(
+            bundle.stage, bundle.est_tokens_uncompacted // size, bundle.est_tokens // size
+        )
+    by_id: Dict[str, Dict[str, Any]] = {}
+    items = out.get("results") if isinstance(out, dict) else None
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and item.get("case_id") in group:
+            by_id.setdefault(item["case_id"], item)
+    return by_id
+
+
+def _repair_structure(
+    client: LLMClient,
+    document_ir: DocumentIR,
+    schema: Dict[str, Any],
+    case: Any,
+    llm_fallback: bool = True,
+) -> Dict[str, Any]:
+    """Fix structural schema violations locally; call the LLM only if that is not enough.
+
+    With ``llm_fallback=False`` a case that local repair cannot fix is returned as is.
+    """
+    errors = schema_errors(case, schema)
+    audit: Dict[str, Any] = {
+        "schema_errors": len(errors),
+        "local_fixes": 0,
+        "local_repaired": False,
+        "llm_fallback": False,
+    }
+    if errors:
+        defaults = {
+            "case_id": document_ir.case_id,
+            "source_summary": _build_source_summary(document_ir),
+        }
+        result = repair_case_structure(case, schema, defaults=defaults, errors=errors)
+        case = result.case
+        audit["local_fixes"] = len(result.fixes)
+        audit["fixes"] = result.fixes[:50]
+        if result.valid:
+            audit["local_repaired"] = True
+        elif llm_fallback:
+            audit["llm_fallback"] = True
+            audit["remaining_errors"] = result.remaining_errors[:20]
+            case = _llm_repair_structure(client, schema, case, "\n".join(result.remaining_errors))
+            case = repair_case_structure(case, schema, defaults=defaults).case
+    record_llm_audit("repair", audit)
+    return case
+
+
+def _generate_hybrid(
+    document_ir: DocumentIR,
+    schema: dict[str, Any],
+    use_cache: bool | None = None,
+) -> Dict[str, Any]:
+    """Rule-first generation; only low-confidence sections are escalated to the LLM."""
+    case = _generate_with_rules(document_ir)
+    line_index = _index_lines(document_ir)
+    threshold = settings.llm_hybrid_confidence_threshold
+    hinted = _ocr_hinted_sections(document_ir)
+
+    confidence: Dict[str, float] = {}
+    uncertain: List[str] = []
+    for section in _CASE_SECTIONS:
+        facts = case[section]
+        if facts:
+            score = sum(_fact_confidence(f, line_index) for f in facts) / len(facts)
+        else:
+            # An empty section is only doubtful if attachments mention it.
+            score = 0.0 if section in hinted else 1.0
+        confidence[section] = round(score, 3)
+        if score < threshold:
+            uncertain.append(section)
+
+    audit: Dict[str, Any] = {
+        "threshold": threshold,
+        "section_confidence": confidence,
+        "escalated_sections": uncertain,
+    }
+    record_llm_audit("hybrid", audit)
+    if not uncertain:
+        return case
+    if not settings.llm_endpoint or not settings.llm_api_key:
+        raise ValueError("hybrid mode needs LLM_ENDPOINT and LLM_API_KEY to escalate sections")
+
+    candidates = _stage1_candidates(document_ir, target_sections=uncertain)
+    if not candidates[0]:
+        # Nothing in the candidates speaks to the uncertain sections; keep the rule output.
+        return case
+    client = get_llm_client(use_cache=use_cache)
+    stage1 = _llm_stage1_select_facts(client, document_ir, uncertain, candidates)
+
+    for section in uncertain:
+        kept = [f for f in case[section] if _fact_confidence(f, line_index) >= threshold]
+        seen = {_evidence_key(f) for f in kept}
+        for item in stage1.get("selected_facts", []) or []:
+            if not isinstance(item, dict) or item.get("section") != section:
+                continue
+            fact = {k: item[k] for k in ("text", "polarity", "evidence") if k in item}
+            ev_key = _evidence_key(fact)
+            if ev_key in seen:
+                continue
+            seen.add(ev_key)
+            kept.append(fact)
+        case[section] = kept
+    quality = stage1.get("quality") or {}
+    for key in ("warnings", "missing_critical"):
+        extra = quality.get(key) or []
+        if isinstance(extra, list):
+            case["quality"][key].extend(x for x in extra if x not in case["quality"][key])
+
+    case = _repair_structure(client, document_ir, schema, case)
+    return _enforce_content_guardrails(case)
+
+
+def _index_lines(doc: DocumentIR) -> Dict[tuple, tuple[str, Line]]:
+    index: Dict[tuple, tuple[str, Line]] = {}
+    for src in doc.sources:
+        for page in src.pages:
+            for line in page.lines:
+                index[(src.source_id, page.page_number, line.line_id)] = (src.source_type, line)
+    return index
+
+
+def _fact_confidence(fact: Dict[str, Any], line_index: Dict[tuple, tuple[str, Line]]) -> float:
+    """Heuristic 0..1 trust in a rule-built fact from its evidence source, polarity and flags."""
+    scores: List[float] = []
+    for ev in fact.get("evidence", []):
+        where = (ev.get("source_id"), ev.get("page"), ev.get("line_id"))
+        source_type, line = line_index.get(where, ("", None))
+        score = _SOURCE_TYPE_CONFIDENCE.get(source_type, 0.4)
+        flags = line.flags if line is not None else {}
+        if flags.get("low_confidence"):
+            score -= 0.3
+        if flags.get("form_template"):
+            score -= 0.15
+        if flags.get("checkbox_option") and flags.get("checkbox_state") != "checked":
+            score -= 0.15
+        scores.append(score)
+    if not scores:
+        return 0.0
+    score = max(scores)
+    if fact.get("polarity") == "unknown":
+        score -= 0.3
+    elif fact.get("polarity") == "negated":
+        # Negation is detected from keywords only; on OCR text it is less reliable.
+        score -= 0.05
+    return max(0.0, min(1.0, score))
+
+
+def _ocr_hinted_sections(doc: DocumentIR) -> set[str]:
+    """Sections that attachments have an anchor for (high-priority OCR candidates lead with it)."""
+    hinted: set[str] = set()
+    for fact in build_candidate_facts(doc):
+        if fact["priority"] == "high" and not str(fact["source_id"]).startswith("lims_text_"):
+            hinted.add(fact["section_hints"][0])
+    return hinted
+
+
+def _evidence_key(fact: Dict[str, Any]) -> tuple:
+    return tuple(
+        sorted(
+            (str(ev.get("source_id")), str(ev.get("page")), str(ev.get("line_id")))
+            for ev in fact.get("evidence", []) or []
+            if isinstance(ev, dict)
+        )
+    ) or (fact.get("text"),)
 
 
 def _empty_case(case_id: str) -> Dict[str, Any]:
@@ -198,18 +546,111 @@ def _build_missing_critical(doc: DocumentIR) -> List[str]:
 
 
 def _validate_case(case: Dict[str, Any], schema: Dict[str, Any]) -> None:
-    validate(instance=case, schema=schema)
+    validate_instance(case, schema)
 
 
-def _llm_stage1_select_facts(client: LLMClient, document_ir: DocumentIR) -> Dict[str, Any]:
+def _stage1_candidates(
+    document_ir: DocumentIR, target_sections: List[str] | None = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Budgeted stage-1 candidates (only those hinting at ``target_sections``) and their tokens."""
+    selection = build_budgeted_candidate_facts(document_ir, settings.llm_stage1_token_budget)
+    record_llm_audit("stage1_candidates", selection.audit())
+    if target_sections is None:
+        return selection.kept, selection.kept_tokens
+    kept = [c for c in selection.kept if _targets_any_section(c, target_sections)]
+    return kept, sum(estimate_tokens(compact_json(c)) for c in kept)
+
+
+def _llm_stage1_select_facts(
+    client: LLMClient,
+    document_ir: DocumentIR,
+    target_sections: List[str] | None = None,
+    candidates: Tuple[List[Dict[str, Any]], int] | None = None,
+) -> Dict[str, Any]:
+    """Run stage 1 over ``candidates`` (default: ``_stage1_candidates``), map-reduced if large."""
+    if candidates is None:
+        candidates = _stage1_candidates(document_ir, target_sections)
+    facts, tokens = candidates
     prompt = _load_prompt("case_stage1_zh.md")
-    candidate_facts = build_candidate_facts(document_ir)
-    payload = {
-        "instructions": prompt,
-        "case_id": document_ir.case_id,
-        "candidate_facts": candidate_facts,
+    chunk_tokens = settings.llm_stage1_chunk_tokens
+    if chunk_tokens > 0 and tokens > chunk_tokens:
+        chunks = chunk_candidate_facts(facts, chunk_tokens)
+        if len(chunks) > 1:
+            bundles = [
+                build_stage1_prompt(prompt, document_ir.case_id, chunk, target_sections)
+                for chunk in chunks
+            ]
+            results = _llm_stage1_map(client, bundles)
+            failed = [i for i, r in enumerate(results) if isinstance(r, Exception)]
+            record_llm_audit(
+                "stage1_map_reduce",
+                {
+                    "chunks": len(bundles),
+                    "chunk_tokens_est": [b.est_tokens for b in bundles],
+                    "failed_chunks": failed,
+                },
+            )
+            answers = [r for r in results if not isinstance(r, Exception)]
+            if not answers:
+                raise next(r for r in results if isinstance(r, Exception))
+            merged = _merge_stage1_results(answers)
+            if failed:
+                merged["quality"]["warnings"].append(
+                    f"stage1_chunks_failed:{len(failed)}/{len(results)}"
+                )
+            return merged
+    bundle = build_stage1_prompt(prompt, document_ir.case_id, facts, target_sections)
+    return _call_llm(client, bundle)
+
+
+def _targets_any_section(candidate: Dict[str, Any], sections: List[str]) -> bool:
+    hints = set(candidate.get("section_hints", []))
+    # Candidates carry no chief_complaint hint outside anchors; complaints read like history.
+    if "chief_complaint" in sections and "medical_history" in hints:
+        return True
+    return bool(hints.intersection(sections))
+
+
+def _llm_stage1_map(
+    client: LLMClient, bundles: List[PromptBundle]
+) -> List[Dict[str, Any] | Exception]:
+    """Send the chunk requests concurrently on ``client``; a failed chunk yields its error."""
+
+    def call(bundle: PromptBundle) -> Dict[str, Any] | Exception:
+        try:
+            return _call_llm(client, bundle)
+        except Exception as exc:  # noqa: BLE001 - the other chunks still count
+            return exc
+
+    # Workers run in copies of this context so LLM metrics and cassettes apply to them too.
+    ctx = contextvars.copy_context()
+    workers = max(1, min(len(bundles), settings.llm_max_concurrency))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda bundle: ctx.copy().run(call, bundle), bundles))
+
+
+def _merge_stage1_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce per-chunk stage-1 outputs, de-duplicating facts by section and evidence refs."""
+    merged: List[Dict[str, Any]] = []
+    seen: set[tuple] = set()
+    warnings: List[str] = []
+    missing: List[str] = []
+    for result in results:
+        for fact in result.get("selected_facts", []) or []:
+            if not isinstance(fact, dict):
+                continue
+            key = (fact.get("section"), _evidence_key(fact))
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(fact)
+        quality = result.get("quality") or {}
+        warnings.extend(w for w in quality.get("warnings", []) if w not in warnings)
+        missing.extend(m for m in quality.get("missing_critical", []) if m not in missing)
+    return {
+        "selected_facts": merged,
+        "quality": {"warnings": warnings, "missing_critical": missing},
     }
-    return client.generate_json(prompt, json.dumps(payload, ensure_ascii=False), temperature=0.0)
 
 
 def _llm_stage2_build_case(
@@ -218,30 +659,30 @@ def _llm_stage2_build_case(
     schema: Dict[str, Any],
     stage1: Dict[str, Any],
 ) -> Dict[str, Any]:
-    prompt = _load_prompt("case_stage2_zh.md")
-    payload = {
-        "instructions": prompt,
-        "schema": schema,
+    bundle = build_stage2_prompt(
+        _load_prompt("case_stage2_zh.md"), schema, **_stage2_inputs(document_ir, stage1)
+    )
+    return _call_llm(client, bundle)
+
+
+def _stage2_inputs(document_ir: DocumentIR, stage1: Dict[str, Any]) -> Dict[str, Any]:
+    return {
         "case_id": document_ir.case_id,
         "source_summary": _build_source_summary(document_ir),
         "selected_facts": stage1.get("selected_facts", []),
         "quality": stage1.get("quality", {"warnings": [], "missing_critical": []}),
     }
-    return client.generate_json(prompt, json.dumps(payload, ensure_ascii=False), temperature=0.0)
-
-
-def _llm_repair_structure(client: LLMClient, schema: Dict[str, Any], case: Dict[str, Any], err: str) -> Dict[str, Any]:
-    repair_system = "你是JSON结构修复助手。仅修复结构，不新增事实。只输出JSON。"
-    repair_user = json.dumps(
-        {
-            "schema": schema,
-            "validation_error": err,
-            "current_case_json": case,
-        },
-        ensure_ascii=False,
-    )
-    repaired = client.generate_json(repair_system, repair_user, temperature=0.0)
-    return _enforce_content_guardrails(repaired)
+
+
+def _llm_repair_structure(
+    client: LLMClient, schema: Dict[str, Any], case: Any, err: str
+) -> Dict[str, Any]:
+    return _call_llm(client, build_repair_prompt(schema, case, err))
+
+
+def _call_llm(client: LLMClient, bundle: PromptBundle) -> Dict[str, Any]:
+    record_prompt_estimate(bundle.stage, bundle.est_tokens_uncompacted, bundle.est_tokens)
+    return client.generate_json(bundle.system, bundle.user, temperature=0.0, stage=bundle.stage)
 
 
 def _enforce_content_guardrails(case: Dict[str, Any]) -> Dict[str, Any]:
@@ -307,6 +748,7 @@ def _is_english_heavy(text: str) -> bool:
     return len(alpha_words) >= 4
 
 
+@lru_cache(maxsize=None)
 def _load_prompt(name: str) -> str:
     path = _PROMPT_DIR / name
     return path.read_text(encoding="utf-8")
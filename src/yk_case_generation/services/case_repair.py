@@ -0,0 +1,265 @@
+"""Deterministic, schema-driven structural repair of case JSON.
+
+Walks every validation error and fixes mechanical problems (missing keys, wrong
+container/scalar types, extra properties, invalid enum values) without adding facts:
+facts or evidence entries that cannot be made valid are dropped instead of invented.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from yk_case_generation.models.case_schema import validator_for
+
+if TYPE_CHECKING:
+    from jsonschema.exceptions import ValidationError
+
+_MAX_PASSES = 6
+_MISSING = object()
+# Required keys that identify content; an object missing one is dropped, never defaulted.
+_IDENTITY_KEYS = ("case_id", "text", "evidence", "source_id", "line_id")
+
+
+@dataclass
+class RepairResult:
+    case: Dict[str, Any]
+    valid: bool
+    fixes: List[str] = field(default_factory=list)
+    remaining_errors: List[str] = field(default_factory=list)
+
+
+def format_errors(errors: List[ValidationError]) -> List[str]:
+    return [f"{_path_str(err.absolute_path)}: {err.message}" for err in errors]
+
+
+def repair_case_structure(
+    case: Any,
+    schema: Dict[str, Any],
+    defaults: Dict[str, Any] | None = None,
+    errors: List[ValidationError] | None = None,
+) -> RepairResult:
+    """Repair ``case`` in place where possible; ``defaults`` fill missing top-level keys.
+
+    ``errors``, if given, are the caller's validation errors of ``case`` and save one pass.
+    """
+    validator = validator_for(schema)
+    fixes: List[str] = []
+    case = _unwrap(case, schema, fixes)
+    if fixes:
+        errors = None  # unwrapped: the caller's errors describe the envelope
+    for _ in range(_MAX_PASSES):
+        if errors is None:
+            errors = list(validator.iter_errors(case))
+        if not errors:
+            return RepairResult(case=case, valid=True, fixes=fixes)
+        removals: List[Tuple[Tuple[Any, ...], int]] = []
+        progressed = False
+        for err in errors:
+            progressed |= _fix(case, err, schema, defaults or {}, fixes, removals)
+        # Remove list items last, highest index first, so earlier paths stay valid.
+        for parent_path, index in sorted(set(removals), key=lambda r: (r[0], r[1]), reverse=True):
+            parent = _resolve(case, parent_path)
+            if isinstance(parent, list) and index < len(parent):
+                del parent[index]
+                fixes.append(f"drop_item:{_path_str(parent_path + (index,))}")
+                progressed = True
+        if not progressed:
+            break
+        errors = None
+    errors = list(validator.iter_errors(case))
+    return RepairResult(
+        case=case, valid=not errors, fixes=fixes, remaining_errors=format_errors(errors)
+    )
+
+
+def _unwrap(case: Any, schema: Dict[str, Any], fixes: List[str]) -> Any:
+    """Unwrap a ``{"case": {...}}``-style envelope around the real case object."""
+    if not isinstance(case, dict):
+        return case
+    required = set(schema.get("required", []))
+    if required & set(case):
+        return case
+    nested = [v for v in case.values() if isinstance(v, dict) and required & set(v)]
+    if len(nested) == 1:
+        fixes.append("unwrap_envelope")
+        return nested[0]
+    return case
+
+
+def _fix(
+    case: Any,
+    err: ValidationError,
+    root: Dict[str, Any],
+    defaults: Dict[str, Any],
+    fixes: List[str],
+    removals: List[Tuple[Tuple[Any, ...], int]],
+) -> bool:
+    path = tuple(err.absolute_path)
+    instance = err.instance
+    kind = err.validator
+
+    if kind == "required" and isinstance(instance, dict):
+        changed = False
+        for prop in err.validator_value:
+            if prop in instance:
+                continue
+            if not path and prop in defaults:
+                value = defaults[prop]
+            elif prop in _IDENTITY_KEYS:
+                value = _MISSING
+            else:
+                value = _default_for(err.schema.get("properties", {}).get(prop, {}), root)
+            if value is _MISSING:
+                # e.g. a fact without evidence: cannot be completed without inventing content
+                return _remove_enclosing_item(case, path, fixes, removals)
+            instance[prop] = value
+            fixes.append(f"add_missing:{_path_str(path + (prop,))}")
+            changed = True
+        return changed
+
+    if kind == "additionalProperties" and isinstance(instance, dict):
+        allowed = set(err.schema.get("properties", {}))
+        extra = [k for k in instance if k not in allowed]
+        for key in extra:
+            del instance[key]
+            fixes.append(f"drop_property:{_path_str(path + (key,))}")
+        return bool(extra)
+
+    if kind == "type" and path:
+        value = _coerce(instance, err.validator_value)
+        if value is _MISSING:
+            return _remove_enclosing_item(case, path, fixes, removals) or _set_default(
+                case, path, err.schema, root, fixes
+            )
+        _assign(case, path, value)
+        fixes.append(f"coerce_type:{_path_str(path)}")
+        return True
+
+    if kind == "enum":
+        if "unknown" in err.validator_value:
+            _assign(case, path, "unknown")
+            fixes.append(f"enum_to_unknown:{_path_str(path)}")
+            return True
+        return _remove_enclosing_item(case, path, fixes, removals)
+
+    if kind == "const":
+        _assign(case, path, err.validator_value)
+        fixes.append(f"set_const:{_path_str(path)}")
+        return True
+
+    if kind == "minItems":
+        # e.g. a fact whose evidence list is empty: drop the fact, never fabricate evidence
+        return _remove_enclosing_item(case, path, fixes, removals)
+
+    return False
+
+
+def _coerce(value: Any, expected: Any) -> Any:
+    types = [expected] if isinstance(expected, str) else list(expected)
+    if "array" in types:
+        if value is None or value == "":
+            return []
+        if isinstance(value, (dict, str, int, float)):
+            return [value]
+    if "string" in types:
+        if isinstance(value, bool):
+            return _MISSING
+        if isinstance(value, (int, float)):
+            return str(value)
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return "；".join(v.strip() for v in value if v.strip())
+        if value is None:
+            return ""
+    if "integer" in types:
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+            return int(value.strip())
+    if "null" in types and (value in ("", "null", "None") or isinstance(value, (dict, list))):
+        return None
+    if "object" in types and value is None:
+        return {}
+    return _MISSING
+
+
+def _default_for(subschema: Dict[str, Any], root: Dict[str, Any]) -> Any:
+    subschema = _deref(subschema, root)
+    types = subschema.get("type")
+    types = [types] if isinstance(types, str) else list(types or [])
+    if "array" in types:
+        return _MISSING if subschema.get("minItems") else []
+    if "object" in types:
+        out: Dict[str, Any] = {}
+        for prop in subschema.get("required", []):
+            if prop in _IDENTITY_KEYS:
+                return _MISSING
+            value = _default_for(subschema.get("properties", {}).get(prop, {}), root)
+            if value is _MISSING:
+                return _MISSING
+            out[prop] = value
+        return out
+    if "enum" in subschema:
+        return "unknown" if "unknown" in subschema["enum"] else _MISSING
+    if "null" in types:
+        return None
+    if "integer" in types:
+        return 0
+    if "string" in types:
+        return ""
+    return _MISSING
+
+
+def _set_default(
+    case: Any,
+    path: Tuple[Any, ...],
+    subschema: Dict[str, Any],
+    root: Dict[str, Any],
+    fixes: List[str],
+) -> bool:
+    value = _default_for(subschema, root)
+    if value is _MISSING:
+        return False
+    _assign(case, path, value)
+    fixes.append(f"reset_default:{_path_str(path)}")
+    return True
+
+
+def _remove_enclosing_item(
+    case: Any,
+    path: Tuple[Any, ...],
+    fixes: List[str],
+    removals: List[Tuple[Tuple[Any, ...], int]],
+) -> bool:
+    """Schedule removal of the innermost list item that contains ``path``."""
+    for idx in range(len(path) - 1, -1, -1):
+        if isinstance(path[idx], int) and isinstance(_resolve(case, path[:idx]), list):
+            removals.append((path[:idx], path[idx]))
+            return True
+    return False
+
+
+def _deref(subschema: Dict[str, Any], root: Dict[str, Any]) -> Dict[str, Any]:
+    ref = subschema.get("$ref")
+    if not ref or not ref.startswith("#/"):
+        return subschema
+    node: Any = root
+    for part in ref[2:].split("/"):
+        node = node.get(part, {})
+    return node
+
+
+def _resolve(case: Any, path: Tuple[Any, ...]) -> Any:
+    node = case
+    for part in path:
+        node = node[part]
+    return node
+
+
+def _assign(case: Any, path: Tuple[Any, ...], value: Any) -> None:
+    if not path:
+        return
+    _resolve(case, path[:-1])[path[-1]] = value
+
+
+def _path_str(path: Any) -> str:
+    return "/".join(str(p) for p in path) or "$"
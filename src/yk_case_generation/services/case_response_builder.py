@@ -1,14 +1,18 @@
-"""Build frontend-facing case response from internal case JSON."""
+"""Build frontend-facing case response from internal case JSON.
+
+Layout ``v1`` embeds full evidence objects in every fact. Layout ``v2`` stores each distinct
+evidence entry once in a top-level ``evidence`` table and facts list ``evidence_ids``; long
+LIMS quotes repeated across sections then appear once per response.
+"""
 from __future__ import annotations
 
-import json
 from pathlib import Path
-from typing import Any, Dict, List
-
-from jsonschema import validate
+from typing import Any, Dict, List, Tuple
 
+from yk_case_generation.models.case_schema import SCHEMA_DIR, load_schema, validate_instance
 
-DEFAULT_RESPONSE_SCHEMA_PATH = Path(__file__).resolve().parent.parent / "schemas" / "case_response_v1.json"
+DEFAULT_RESPONSE_SCHEMA_PATH = SCHEMA_DIR / "case_response_v1.json"
+RESPONSE_LAYOUTS = ("v1", "v2")
 
 _FRONTEND_SECTIONS = (
     "patient_info",
@@ -20,25 +24,54 @@ _FRONTEND_SECTIONS = (
 )
 
 
-def build_case_response(case: Dict[str, Any], schema_path: str | None = None) -> Dict[str, Any]:
+def build_case_response(
+    case: Dict[str, Any], schema_path: str | None = None, layout: str = "v1"
+) -> Dict[str, Any]:
+    if layout not in RESPONSE_LAYOUTS:
+        raise ValueError(f"unknown response layout {layout!r}; expected one of {RESPONSE_LAYOUTS}")
     narrative = _build_narrative(case)
-    response = {
-        "schema_version": "case_response_v1",
+    sections = {k: _to_front_facts(case.get(k, [])) for k in _FRONTEND_SECTIONS}
+    response: Dict[str, Any] = {
+        "schema_version": f"case_response_{layout}",
         "case_id": case.get("case_id", ""),
         "status": _compute_status(case),
         "summary": _build_summary(case, narrative),
         "narrative": narrative,
-        "sections": {k: _to_front_facts(case.get(k, [])) for k in _FRONTEND_SECTIONS},
-        "quality": {
-            "warnings": list(case.get("quality", {}).get("warnings", [])),
-            "missing_critical": list(case.get("quality", {}).get("missing_critical", [])),
-        },
+        "sections": sections,
+    }
+    if layout == "v2":
+        response["evidence"] = _extract_evidence_table(sections)
+    response["quality"] = {
+        "warnings": list(case.get("quality", {}).get("warnings", [])),
+        "missing_critical": list(case.get("quality", {}).get("missing_critical", [])),
     }
-    schema = _load_schema(schema_path)
-    validate(instance=response, schema=schema)
+    validate_instance(response, load_schema(schema_path or response_schema_path(layout)))
     return response
 
 
+def response_schema_path(layout: str = "v1") -> Path:
+    return SCHEMA_DIR / f"case_response_{layout}.json"
+
+
+def _extract_evidence_table(sections: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Move fact evidence into a shared table (ids in first-seen order), in place."""
+    table: Dict[str, Dict[str, Any]] = {}
+    ids: Dict[Tuple[Any, ...], str] = {}
+    for facts in sections.values():
+        for fact in facts:
+            refs: List[str] = []
+            for ev in fact.pop("evidence"):
+                key = (ev.get("source_id"), ev.get("page"), ev.get("line_id"), ev.get("quote"))
+                ev_id = ids.get(key)
+                if ev_id is None:
+                    ev_id = ids[key] = f"e{len(ids) + 1}"
+                    table[ev_id] = ev
+                if ev_id not in refs:
+                    refs.append(ev_id)
+            fact["evidence_ids"] = refs
+    return table
+
+
 def _to_front_facts(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
     for item in items:
@@ -164,8 +197,3 @@ def _select_top_texts(
     for _, text in scored[:max_items]:
         texts.append(text)
     return texts
-
-
-def _load_schema(path: str | None = None) -> Dict[str, Any]:
-    schema_path = Path(path) if path else DEFAULT_RESPONSE_SCHEMA_PATH
-    return json.loads(schema_path.read_text(encoding="utf-8"))
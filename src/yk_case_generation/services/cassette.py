@@ -0,0 +1,253 @@
+"""Record/replay of external I/O (LIMS, attachment downloads, Tencent OCR, LLM).
+
+With ``IO_CASSETTE_MODE=record`` every call to an external service made while a
+project cassette is active is stored in ``<IO_CASSETTE_DIR>/<project>/cassette.json``;
+binary payloads (downloaded attachments, OCR input images) go to a content-addressed
+blob store shared by all cassettes. ``replay`` serves the recorded outcomes (including
+recorded errors) without touching the network, sleeping for the recorded duration
+(``IO_REPLAY_LATENCY=original``) or not at all (``zero``). Repeated identical requests
+replay in recorded order.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, TypeVar
+
+from yk_case_generation.config import settings
+
+T = TypeVar("T")
+MODES = ("off", "record", "replay")
+_CASSETTE_FILE = "cassette.json"
+
+_CURRENT: contextvars.ContextVar["Cassette | None"] = contextvars.ContextVar(
+    "ykcg_io_cassette", default=None
+)
+
+
+class CassetteMiss(RuntimeError):
+    """Replay found no recorded interaction for a request."""
+
+
+class ReplayedError(RuntimeError):
+    """A failure recorded during ``record``, raised again on replay."""
+
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Cassette:
+    def __init__(self, root: Path, name: str, mode: str, zero_latency: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unsupported cassette mode: {mode}")
+        self.root = root
+        self.name = name
+        self.mode = mode
+        self.zero_latency = zero_latency
+        self.path = root / name / _CASSETTE_FILE
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        if mode == "replay" and self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            for entry in data.get("interactions", []):
+                self._entries.setdefault(_slot(entry["service"], entry["key"]), []).append(entry)
+
+    def record(
+        self,
+        service: str,
+        key: str,
+        response: Any,
+        duration_s: float,
+        error: BaseException | None = None,
+        request_blob: bytes | None = None,
+    ) -> None:
+        entry: Dict[str, Any] = {
+            "service": service,
+            "key": key,
+            "duration_s": round(duration_s, 4),
+            "response": response,
+        }
+        if request_blob is not None:
+            entry["request_blob"] = self.put_blob(request_blob)
+        if error is not None:
+            entry["error"] = {
+                "type": type(error).__name__,
+                "message": str(error),
+                "status_code": _status_code(error),
+            }
+        with self._lock:
+            self._entries.setdefault(_slot(service, key), []).append(entry)
+
+    def replay(self, service: str, key: str) -> Dict[str, Any]:
+        slot = _slot(service, key)
+        with self._lock:
+            entries = self._entries.get(slot)
+            if not entries:
+                where = self.path if self.path.exists() else f"{self.path} (missing)"
+                raise CassetteMiss(f"no recorded {service} call for key {key} in {where}")
+            idx = self._cursor.get(slot, 0)
+            self._cursor[slot] = idx + 1
+            return entries[min(idx, len(entries) - 1)]
+
+    def put_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp{os.getpid()}.{threading.get_ident()}")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        return digest
+
+    def get_blob(self, digest: str) -> bytes:
+        return self._blob_path(digest).read_bytes()
+
+    def save(self) -> None:
+        if self.mode != "record":
+            return
+        with self._lock:
+            interactions = [e for entries in self._entries.values() for e in entries]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"name": self.name, "recorded_at": time.time(), "interactions": interactions}
+        self.path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest
+
+
+def cassette_mode() -> str:
+    mode = (settings.io_cassette_mode or "off").lower()
+    if mode not in MODES:
+        raise ValueError(f"IO_CASSETTE_MODE must be one of {MODES}, got {mode!r}")
+    return mode
+
+
+def configure_cassettes(mode: str, replay_latency: str | None = None) -> None:
+    """Switch record/replay on for this process (CLI entry points).
+
+    Replay fills placeholder LLM credentials so credential checks pass offline.
+    """
+    settings.io_cassette_mode = mode
+    if replay_latency:
+        settings.io_replay_latency = replay_latency
+    cassette_mode()
+    if mode == "replay":
+        settings.llm_endpoint = settings.llm_endpoint or "http://cassette.invalid/v1/chat/completions"
+        settings.llm_api_key = settings.llm_api_key or "replay"
+
+
+def cassette_active() -> bool:
+    return _CURRENT.get() is not None
+
+
+def replaying() -> bool:
+    cassette = _CURRENT.get()
+    return cassette is not None and cassette.mode == "replay"
+
+
+@contextmanager
+def project_cassette(name: str) -> Iterator[Cassette | None]:
+    """Activate the cassette named ``name`` for external calls made in this context."""
+    mode = cassette_mode()
+    if mode == "off":
+        yield None
+        return
+    cassette = Cassette(
+        Path(settings.io_cassette_dir).expanduser(),
+        name,
+        mode,
+        zero_latency=settings.io_replay_latency == "zero",
+    )
+    token = _CURRENT.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _CURRENT.reset(token)
+        cassette.save()
+
+
+def through_cassette(
+    service: str,
+    key: str,
+    call: Callable[[], T],
+    encode: Callable[[Cassette, T], Any] = lambda cassette, result: result,
+    decode: Callable[[Cassette, Any], T] = lambda cassette, response: response,
+    request_blob: bytes | None = None,
+) -> T:
+    """Run ``call`` live, recording its outcome, or serve it from the active cassette."""
+    cassette = _CURRENT.get()
+    if cassette is None:
+        return call()
+    if cassette.mode == "replay":
+        entry = cassette.replay(service, key)
+        if not cassette.zero_latency:
+            time.sleep(entry["duration_s"])
+        return _replayed(cassette, entry, decode)
+    started = time.perf_counter()
+    try:
+        result = call()
+    except Exception as exc:
+        cassette.record(service, key, None, time.perf_counter() - started, exc, request_blob)
+        raise
+    cassette.record(
+        service, key, encode(cassette, result), time.perf_counter() - started, None, request_blob
+    )
+    return result
+
+
+async def through_cassette_async(
+    service: str,
+    key: str,
+    call: Callable[[], Awaitable[T]],
+    encode: Callable[[Cassette, T], Any] = lambda cassette, result: result,
+    decode: Callable[[Cassette, Any], T] = lambda cassette, response: response,
+) -> T:
+    """Async variant of ``through_cassette``."""
+    cassette = _CURRENT.get()
+    if cassette is None:
+        return await call()
+    if cassette.mode == "replay":
+        entry = cassette.replay(service, key)
+        if not cassette.zero_latency:
+            await asyncio.sleep(entry["duration_s"])
+        return _replayed(cassette, entry, decode)
+    started = time.perf_counter()
+    try:
+        result = await call()
+    except Exception as exc:
+        cassette.record(service, key, None, time.perf_counter() - started, exc)
+        raise
+    cassette.record(service, key, encode(cassette, result), time.perf_counter() - started)
+    return result
+
+
+def content_key(data: bytes | str) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _replayed(cassette: Cassette, entry: Dict[str, Any], decode: Callable[[Cassette, Any], T]) -> T:
+    error = entry.get("error")
+    if error:
+        raise ReplayedError(f"{error['type']}: {error['message']}", error.get("status_code"))
+    return decode(cassette, entry["response"])
+
+
+def _slot(service: str, key: str) -> str:
+    return f"{service}:{key}"
+
+
+def _status_code(exc: BaseException) -> int | None:
+    response = getattr(exc, "response", None)
+    code = getattr(response, "status_code", None) or getattr(exc, "status_code", None)
+    return code if isinstance(code, int) else None
@@ -0,0 +1,182 @@
+"""Per-service adaptive (AIMD) concurrency limits and jittered retry backoff.
+
+Each external service (LIMS API, attachment downloads, Tencent OCR, LLM endpoint) has
+one process-wide ``AdaptiveLimiter``. The limit grows by one slot per window of
+successful calls and halves on overload signals (HTTP 429/503, timeouts, provider
+rate-limit errors), so concurrent runs converge on what the service tolerates instead
+of a fixed worker count.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Tuple, Type
+
+import httpx
+from tenacity import (
+    retry,
+    retry_base,
+    retry_if_exception,
+    retry_if_exception_type,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from yk_case_generation.config import settings
+
+OVERLOAD_STATUS = frozenset({429, 503})
+_DECREASE_COOLDOWN_S = 1.0
+_ASYNC_POLL_S = 0.02
+
+_REGISTRY_LOCK = threading.Lock()
+_LIMITERS: Dict[str, "AdaptiveLimiter"] = {}
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit shared by all callers of one service (thread- and task-safe)."""
+
+    def __init__(self, name: str, max_limit: int, min_limit: int = 1, initial: int | None = None):
+        self.name = name
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        start = initial if initial is not None else (self.max_limit + 1) // 2
+        self._limit = float(min(self.max_limit, max(self.min_limit, start)))
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._successes = 0
+        self._overloads = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one slot for a call; the call's outcome adjusts the limit."""
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._take()
+        try:
+            yield
+        except BaseException as exc:
+            self._release(overload=is_overload(exc), success=False)
+            raise
+        self._release(overload=False, success=True)
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        """Async variant of ``slot``; waits by polling so threads and event loops can share it."""
+        while not self._try_take():
+            await asyncio.sleep(_ASYNC_POLL_S)
+        try:
+            yield
+        except BaseException as exc:
+            self._release(overload=is_overload(exc), success=False)
+            raise
+        self._release(overload=False, success=True)
+
+    def _try_take(self) -> bool:
+        with self._cond:
+            if self._in_flight >= self.limit:
+                return False
+            self._take()
+            return True
+
+    def _take(self) -> None:
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def _release(self, overload: bool, success: bool) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if overload:
+                self._overloads += 1
+                now = time.monotonic()
+                # One decrease per cooldown: a burst of concurrent 429s is a single signal.
+                if now - self._last_decrease >= _DECREASE_COOLDOWN_S:
+                    self._limit = max(float(self.min_limit), self._limit / 2)
+                    self._last_decrease = now
+            elif success:
+                self._successes += 1
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "max_limit": self.max_limit,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak_in_flight,
+                "successes": self._successes,
+                "overloads": self._overloads,
+            }
+
+
+def get_limiter(service: str) -> AdaptiveLimiter:
+    """Return the process-wide limiter for ``lims``, ``download``, ``ocr`` or ``llm``."""
+    with _REGISTRY_LOCK:
+        if service not in _LIMITERS:
+            _LIMITERS[service] = AdaptiveLimiter(service, _max_limit(service))
+        return _LIMITERS[service]
+
+
+def limiter_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Live limits of every limiter used so far in this process (for run metrics)."""
+    with _REGISTRY_LOCK:
+        limiters = dict(_LIMITERS)
+    return {name: limiter.snapshot() for name, limiter in sorted(limiters.items())}
+
+
+def is_overload(exc: BaseException) -> bool:
+    """True for errors that mean "slow down": 429/503, timeouts, provider rate limits."""
+    if isinstance(exc, httpx.TimeoutException):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in OVERLOAD_STATUS
+    if getattr(exc, "status_code", None) in OVERLOAD_STATUS:
+        return True
+    # tencentcloud SDK errors carry codes like "RequestLimitExceeded" / "LimitExceeded.*"
+    if "LimitExceeded" in str(getattr(exc, "code", "") or ""):
+        return True
+    # wrapped errors, e.g. ``raise ProjectInfoError(...) from exc``
+    return exc.__cause__ is not None and is_overload(exc.__cause__)
+
+
+def backoff_retry(
+    attempts: int,
+    only_overload: bool = False,
+    give_up_on: Tuple[Type[BaseException], ...] = (),
+):
+    """tenacity ``retry`` with jittered exponential waits (``BACKOFF_BASE_S``/``BACKOFF_MAX_S``).
+
+    Exceptions in ``give_up_on`` are reraised at once: retrying cannot change their outcome.
+    """
+    retry_on: retry_base = retry_if_exception_type()
+    if only_overload:
+        retry_on = retry_if_exception(is_overload)
+    if give_up_on:
+        retry_on = retry_on & retry_if_not_exception_type(give_up_on)
+    return retry(
+        stop=stop_after_attempt(attempts),
+        wait=wait_random_exponential(
+            multiplier=settings.backoff_base_s, max=settings.backoff_max_s
+        ),
+        retry=retry_on,
+        reraise=True,
+    )
+
+
+def _max_limit(service: str) -> int:
+    return {
+        "lims": settings.lims_max_concurrency,
+        "download": settings.download_max_concurrency,
+        "ocr": settings.ocr_max_concurrency,
+        "llm": settings.llm_max_concurrency,
+    }.get(service, 1)
@@ -6,7 +6,6 @@ Notes:
 """
 from pathlib import Path
 from typing import List
-from docx import Document
 
 from yk_case_generation.models.document_ir import Source, Page, Line
 
@@ -15,6 +14,8 @@ _CHECKBOX_CHARS = {"□", "■", "☑", "☐", "√", "✓", "✗", "✘"}
 
 def parse_docx(path: Path) -> Source:
     """Parse DOCX to a text-only Source (no layout), minimizing noise."""
+    from docx import Document
+
     doc = Document(path)
     lines: List[Line] = []
     line_id = 1
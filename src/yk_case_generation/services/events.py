@@ -0,0 +1,85 @@
+"""Structured run events (structlog) on stderr.
+
+``emit("step_end", step=..., status=..., duration_s=...)`` logs one event and feeds
+``run_metrics``. Events: ``project_end``, ``step_start``/``step_end``, ``download``,
+``ocr_request`` and ``llm_call``. Fields bound with ``bind_events(project=...)`` are added
+to every event in the context, including worker threads started from a copied context.
+Output is ``LOG_FORMAT`` (console | json) at ``LOG_LEVEL``. structlog is imported on the
+first event, keeping it out of CLI startup.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from yk_case_generation.config import settings
+from yk_case_generation.services import run_metrics
+
+_lock = threading.Lock()
+_configured = False
+_BOUND: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar(
+    "ykcg_event_fields", default={}
+)
+
+
+def configure_events(fmt: str | None = None, level: str | None = None) -> None:
+    global _configured
+    import structlog
+
+    fmt = (fmt or settings.log_format).lower()
+    level_no = logging.getLevelName((level or settings.log_level).upper())
+    renderer: Any = (
+        structlog.processors.JSONRenderer(ensure_ascii=False)
+        if fmt == "json"
+        else structlog.dev.ConsoleRenderer(colors=False)
+    )
+    structlog.configure(
+        processors=[
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
+            renderer,
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(
+            level_no if isinstance(level_no, int) else logging.INFO
+        ),
+        logger_factory=_stderr_logger,
+        cache_logger_on_first_use=False,
+    )
+    _configured = True
+
+
+def emit(event: str, **fields: Any) -> None:
+    """Log a run event and update the metrics derived from it."""
+    run_metrics.observe(event, fields)
+    if not _configured:
+        with _lock:
+            if not _configured:
+                configure_events()
+    import structlog
+
+    logger = structlog.get_logger("ykcg")
+    fields = {**_BOUND.get(), **fields}
+    if fields.get("status") in ("failed", "partial", "aborted"):
+        logger.warning(event, **fields)
+    else:
+        logger.info(event, **fields)
+
+
+@contextmanager
+def bind_events(**fields: Any) -> Iterator[None]:
+    token = _BOUND.set({**_BOUND.get(), **fields})
+    try:
+        yield
+    finally:
+        _BOUND.reset(token)
+
+
+def _stderr_logger(*args: Any) -> Any:
+    # resolve sys.stderr per call so redirected/captured stderr is honoured
+    import structlog
+
+    return structlog.PrintLogger(sys.stderr)
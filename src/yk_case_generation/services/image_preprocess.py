@@ -2,7 +2,8 @@
 from pathlib import Path
 from typing import Tuple
 import tempfile
-from PIL import Image, ImageEnhance
+
+from yk_case_generation.services.spans import span
 
 
 def preprocess_image(
@@ -17,24 +18,30 @@ def preprocess_image(
     - Save as JPEG with quality, ensuring size under max_bytes (iteratively reduce quality if needed).
     Returns path to processed image.
     """
-    img = Image.open(img_path)
-    img = img.convert("RGB")
+    from PIL import Image, ImageEnhance
+
+    with span("decode"):
+        img = Image.open(img_path)
+        img = img.convert("RGB")
 
     w, h = img.size
     scale = min(1.0, max_dim / max(w, h)) if max(w, h) > max_dim else 1.0
     if scale < 1.0:
-        img = img.resize((int(w * scale), int(h * scale)), Image.LANCZOS)
+        with span("resize", width=w, height=h, scale=round(scale, 3)):
+            img = img.resize((int(w * scale), int(h * scale)), Image.LANCZOS)
 
     # Mild contrast boost
-    enhancer = ImageEnhance.Contrast(img)
-    img = enhancer.enhance(1.1)
+    with span("enhance"):
+        enhancer = ImageEnhance.Contrast(img)
+        img = enhancer.enhance(1.1)
 
     out_dir = Path(tempfile.mkdtemp(prefix="ykcg_pre_"))
     out_path = out_dir / (img_path.stem + ".jpg")
 
     q = quality
     while True:
-        img.save(out_path, "JPEG", quality=q, optimize=True)
+        with span("jpeg_encode", quality=q):
+            img.save(out_path, "JPEG", quality=q, optimize=True)
         if out_path.stat().st_size <= max_bytes or q <= 40:
             break
         q = int(q * 0.8)
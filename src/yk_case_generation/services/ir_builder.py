@@ -1,7 +1,9 @@
 """Build normalized IR from OCR results and LIMS texts."""
 from __future__ import annotations
 import json
+import math
 import re
+from bisect import bisect_left
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 
@@ -149,12 +151,14 @@ def _annotate_page(page: Page):
             text_lines.append(line)
 
     # If OCR split symbol and label into separate lines, attach state to nearest text line.
-    for symbol_line in symbol_only_lines:
-        target = _nearest_text_line(symbol_line, text_lines)
-        if target:
-            target.flags["checkbox_option"] = True
-            target.flags["checkbox_state"] = symbol_line.flags.get("checkbox_state", "unknown")
-            target.flags["checkbox_linked_from_line_id"] = symbol_line.line_id
+    if symbol_only_lines:
+        locator = _TextLineLocator(text_lines)
+        for symbol_line in symbol_only_lines:
+            target = locator.nearest(symbol_line)
+            if target:
+                target.flags["checkbox_option"] = True
+                target.flags["checkbox_state"] = symbol_line.flags.get("checkbox_state", "unknown")
+                target.flags["checkbox_linked_from_line_id"] = symbol_line.line_id
 
     is_form_page = checkbox_like_count >= 4
     for line in page.lines:
@@ -189,21 +193,46 @@ def _line_center(line: Line) -> Optional[Tuple[float, float]]:
     return (x + (w / 2.0), y + (h / 2.0))
 
 
-def _nearest_text_line(source_line: Line, candidates: List[Line]) -> Optional[Line]:
-    source_center = _line_center(source_line)
-    if not source_center:
-        return None
-    sx, sy = source_center
-    nearest: Optional[Line] = None
-    best_dist = float("inf")
-    for candidate in candidates:
-        c_center = _line_center(candidate)
-        if not c_center:
-            continue
-        cx, cy = c_center
-        # weighted distance: prioritize same-row proximity
-        dist = abs(cy - sy) * 1.2 + abs(cx - sx)
-        if dist < best_dist:
-            best_dist = dist
-            nearest = candidate
-    return nearest
+class _TextLineLocator:
+    """Candidate lines of one page sorted by vertical center for nearest-line lookups.
+
+    Scans outwards from the source row and stops once the vertical term alone exceeds
+    the best distance, instead of measuring every line of the page.
+    """
+
+    def __init__(self, candidates: List[Line]):
+        entries = []
+        for idx, candidate in enumerate(candidates):
+            center = _line_center(candidate)
+            if center:
+                entries.append((center[1], idx, center[0], candidate))
+        entries.sort(key=lambda e: (e[0], e[1]))
+        self._entries = entries
+        self._ys = [e[0] for e in entries]
+
+    def nearest(self, source_line: Line) -> Optional[Line]:
+        source_center = _line_center(source_line)
+        if not source_center:
+            return None
+        sx, sy = source_center
+        entries = self._entries
+        hi = bisect_left(self._ys, sy)
+        lo = hi - 1
+        best: Optional[Tuple[float, int, Line]] = None
+        while lo >= 0 or hi < len(entries):
+            dy_lo = sy - entries[lo][0] if lo >= 0 else math.inf
+            dy_hi = entries[hi][0] - sy if hi < len(entries) else math.inf
+            if dy_lo <= dy_hi:
+                cy, idx, cx, candidate = entries[lo]
+                lo -= 1
+            else:
+                cy, idx, cx, candidate = entries[hi]
+                hi += 1
+            if best is not None and min(dy_lo, dy_hi) * 1.2 > best[0]:
+                break
+            # weighted distance: prioritize same-row proximity
+            dist = abs(cy - sy) * 1.2 + abs(cx - sx)
+            # ties go to the earliest candidate, as in a linear scan
+            if best is None or (dist, idx) < (best[0], best[1]):
+                best = (dist, idx, candidate)
+        return best[2] if best is not None else None
@@ -2,22 +2,34 @@
 from typing import Tuple, List
 import httpx
 
+from yk_case_generation.config import settings
+from yk_case_generation.services.cassette import through_cassette
+from yk_case_generation.services.concurrency import backoff_retry, get_limiter
+
 BASE_URL = "https://newlims-api.yikongenomics.cn/RD/getProjectInfo"
 
 
 class ProjectInfoError(Exception):
-    pass
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
 
 
 def fetch_project_info(project_number: str) -> dict:
-    params = {"projectNumber": project_number}
-    try:
-        resp = httpx.get(BASE_URL, params=params, timeout=20)
-    except Exception as exc:
-        raise ProjectInfoError(f"request_failed: {exc}")
+    return through_cassette("lims", project_number, lambda: _fetch_project_info(project_number))
 
-    if resp.status_code != 200:
-        raise ProjectInfoError(f"http_status_{resp.status_code}")
+
+@backoff_retry(3, only_overload=True)
+def _fetch_project_info(project_number: str) -> dict:
+    params = {"projectNumber": project_number}
+    with get_limiter("lims").slot():
+        try:
+            resp = httpx.get(settings.lims_base_url or BASE_URL, params=params, timeout=20)
+        except Exception as exc:
+            raise ProjectInfoError(f"request_failed: {exc}") from exc
+
+        if resp.status_code != 200:
+            raise ProjectInfoError(f"http_status_{resp.status_code}", status_code=resp.status_code)
 
     payload = resp.json()
     if not payload or payload.get("code") != 1:
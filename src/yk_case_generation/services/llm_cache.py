@@ -0,0 +1,112 @@
+"""Persistent on-disk cache for deterministic LLM responses.
+
+Entries are keyed by model, endpoint and the digests of the system and user prompts,
+stored one JSON file per key, expired by TTL and evicted least-recently-used first
+once the cache grows past its size bound.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_EVICT_EVERY_PUTS = 32
+
+
+class LLMResponseCache:
+    def __init__(
+        self,
+        cache_dir: Path | str,
+        ttl_s: int | None = None,
+        max_bytes: int | None = None,
+    ):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.ttl_s = ttl_s or None
+        self.max_bytes = max_bytes or None
+        self._lock = threading.Lock()
+        self._puts_since_evict = _EVICT_EVERY_PUTS
+
+    @staticmethod
+    def make_key(
+        model: str, endpoint: str, system_prompt: str, user_prompt: str, temperature: float
+    ) -> str:
+        parts = [
+            model or "",
+            endpoint or "",
+            _sha256(system_prompt),
+            _sha256(user_prompt),
+            repr(float(temperature)),
+        ]
+        return _sha256("\n".join(parts))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if self.ttl_s and time.time() - float(entry.get("created_at", 0)) > self.ttl_s:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+        return entry.get("response")
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(
+            json.dumps({"created_at": time.time(), "response": response}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+        with self._lock:
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= _EVICT_EVERY_PUTS
+            if should_evict:
+                self._puts_since_evict = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then oldest-used ones until under ``max_bytes``."""
+        if not self.cache_dir.exists():
+            return 0
+        now = time.time()
+        removed = 0
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            # mtime is never older than created_at, so a stale mtime means an expired entry.
+            if self.ttl_s and now - stat.st_mtime > self.ttl_s:
+                path.unlink(missing_ok=True)
+                removed += 1
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        if self.max_bytes:
+            total = sum(size for _, size, _ in entries)
+            entries.sort(key=lambda x: x[0])
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        return removed
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
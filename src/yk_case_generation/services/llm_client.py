@@ -1,33 +1,86 @@
-"""LLM client wrapper (OpenAI-compatible chat completion API)."""
+"""LLM client wrapper (OpenAI-compatible chat completion API).
+
+Connections are pooled: the sync client shares one process-wide ``httpx.Client``
+(HTTP/2 when ``h2`` is installed), and ``AsyncLLMClient`` keeps a pooled
+``httpx.AsyncClient`` for its lifetime so batch runs can keep many requests in flight.
+Deterministic (``temperature=0``) responses are served from the on-disk response cache
+unless it is disabled. With ``LLM_STREAM`` enabled, completions are streamed (SSE) so
+time-to-first-token is measured and malformed output is aborted early.
+"""
 from __future__ import annotations
+import asyncio
+import atexit
+import importlib.util
 import json
-from typing import Any, Dict
 import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_fixed
-
 from yk_case_generation.config import settings
+from yk_case_generation.services.cassette import (
+    cassette_active,
+    content_key,
+    through_cassette,
+    through_cassette_async,
+)
+from yk_case_generation.services.concurrency import backoff_retry, get_limiter
+from yk_case_generation.services.events import emit
+from yk_case_generation.services.llm_cache import LLMResponseCache
+from yk_case_generation.services.llm_metrics import LLMCallRecord, record_llm_call
+from yk_case_generation.services.llm_stream import StreamAborted, StreamAccumulator, StreamStats
+from yk_case_generation.services.spans import span
+
+_POOL_LOCK = threading.Lock()
+_SHARED_HTTP: httpx.Client | None = None
+# (endpoint, api key, model, stream, cache flag) -> client, so settings overrides take effect
+_SHARED_CLIENTS: Dict[tuple, "LLMClient"] = {}
+_DEFAULT_CACHE: LLMResponseCache | None = None
 
 
-class LLMClient:
+@dataclass
+class _Reply:
+    """What one logical call learned across its attempts (filled in while sending)."""
+
+    attempts: int = 0
+    usage: Dict[str, Any] | None = None
+    stream: StreamStats | None = None
+
+
+class _LLMClientBase:
     def __init__(
         self,
         endpoint: str | None = None,
         api_key: str | None = None,
         model: str | None = None,
         timeout: int | None = None,
+        cache: LLMResponseCache | None = None,
+        use_cache: bool | None = None,
+        stream: bool | None = None,
     ):
         self.endpoint = endpoint or settings.llm_endpoint
         self.api_key = api_key or settings.llm_api_key
         self.model = model or settings.llm_model
         self.timeout = timeout or int(os.environ.get("LLM_TIMEOUT", "120"))
+        enabled = settings.llm_cache_enabled if use_cache is None else use_cache
+        self.cache = (cache or default_llm_cache()) if enabled else None
+        self.stream = settings.llm_stream if stream is None else stream
 
-    @retry(stop=stop_after_attempt(2), wait=wait_fixed(2))
-    def generate_json(self, system_prompt: str, user_prompt: str, temperature: float = 0.0) -> Dict[str, Any]:
+    def _check_configured(self) -> None:
+        self._url()
+
+    def _url(self) -> str:
         if not self.endpoint or not self.api_key:
             raise ValueError("LLM endpoint/api key not configured")
-        payload = {
+        return self.endpoint
+
+    def _build_payload(
+        self, system_prompt: str, user_prompt: str, temperature: float
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
             "model": self.model,
             "temperature": temperature,
             "response_format": {"type": "json_object"},
@@ -36,13 +89,362 @@ class LLMClient:
                 {"role": "user", "content": user_prompt},
             ],
         }
-        headers = {
+        if self.stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def _headers(self) -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
-        with httpx.Client(timeout=self.timeout) as client:
-            resp = client.post(self.endpoint, headers=headers, json=payload)
+
+    def _cache_key(self, payload: Dict[str, Any]) -> str | None:
+        # With an I/O cassette active every call must reach record/replay, not the cache.
+        if self.cache is None or payload["temperature"] != 0.0 or cassette_active():
+            return None
+        messages = payload["messages"]
+        return LLMResponseCache.make_key(
+            self.model,
+            self._url(),
+            messages[0]["content"],
+            messages[1]["content"],
+            payload["temperature"],
+        )
+
+    def _record(
+        self,
+        stage: str,
+        started_at: str,
+        started: float,
+        error: str | None,
+        cache: str | None = None,
+        reply: _Reply | None = None,
+        aborted: bool = False,
+    ) -> None:
+        reply = reply or _Reply()
+        stream = reply.stream
+        prompt_tokens, completion_tokens, cached_tokens = _usage_tokens(reply.usage)
+        if completion_tokens is None and stream is not None:
+            completion_tokens = stream.output_tokens
+        record = LLMCallRecord(
+            stage=stage,
+            model=self.model,
+            started_at=started_at,
+            duration_s=round(time.perf_counter() - started, 3),
+            status="aborted" if aborted else "failed" if error else "ok",
+            error=error,
+            cache=cache,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            retries=max(0, reply.attempts - 1),
+            ttft_s=stream.ttft_s if stream else None,
+            tokens_per_s=stream.tokens_per_s if stream else None,
+        )
+        record_llm_call(record)
+        emit(
+            "llm_call",
+            stage=stage,
+            model=self.model,
+            status=record.status,
+            duration_s=record.duration_s,
+            cache=cache,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            retries=record.retries,
+            **({"error": error} if error else {}),
+        )
+
+    def _record_failure(
+        self,
+        stage: str,
+        started_at: str,
+        started: float,
+        exc: Exception,
+        cache: str | None,
+        reply: _Reply,
+    ) -> None:
+        self._record(
+            stage,
+            started_at,
+            started,
+            str(exc),
+            cache=cache,
+            reply=reply,
+            aborted=isinstance(exc, StreamAborted),
+        )
+
+
+class LLMClient(_LLMClientBase):
+    def __init__(
+        self,
+        endpoint: str | None = None,
+        api_key: str | None = None,
+        model: str | None = None,
+        timeout: int | None = None,
+        http_client: httpx.Client | None = None,
+        cache: LLMResponseCache | None = None,
+        use_cache: bool | None = None,
+        stream: bool | None = None,
+    ):
+        super().__init__(endpoint, api_key, model, timeout, cache, use_cache, stream)
+        self._http = http_client
+
+    def generate_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        stage: str = "llm",
+    ) -> Dict[str, Any]:
+        self._check_configured()
+        payload = self._build_payload(system_prompt, user_prompt, temperature)
+        started_at = _now_iso()
+        started = time.perf_counter()
+        key = self._cache_key(payload)
+        if key and self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._record(stage, started_at, started, None, cache="hit")
+                return cached
+        cache_status = "miss" if key else None
+        reply = _Reply()
+        try:
+            with span("llm_request", stage=stage):
+                result = through_cassette(
+                    "llm",
+                    _cassette_key(payload),
+                    lambda: self._request_json(payload, reply),
+                    *_cassette_codec(reply),
+                )
+        except Exception as exc:
+            self._record_failure(stage, started_at, started, exc, cache_status, reply)
+            raise
+        if key and self.cache is not None:
+            self.cache.put(key, result)
+        self._record(stage, started_at, started, None, cache=cache_status, reply=reply)
+        return result
+
+    @backoff_retry(2, give_up_on=(StreamAborted,))
+    def _request_json(self, payload: Dict[str, Any], reply: _Reply) -> Dict[str, Any]:
+        reply.attempts += 1
+        with get_limiter("llm").slot():
+            return self._send(payload, reply)
+
+    def _send(self, payload: Dict[str, Any], reply: _Reply) -> Dict[str, Any]:
+        client = self._http or _shared_http_client()
+        url = self._url()
+        if not payload.get("stream"):
+            resp = client.post(url, headers=self._headers(), json=payload, timeout=self.timeout)
             resp.raise_for_status()
             data = resp.json()
-        content = data["choices"][0]["message"]["content"]
-        return json.loads(content)
+            reply.usage = data.get("usage")
+            return _parse_completion(data)
+        acc = StreamAccumulator(settings.llm_stream_max_chars)
+        try:
+            # Leaving the block early closes the response, which drops the connection.
+            with client.stream(
+                "POST", url, headers=self._headers(), json=payload, timeout=self.timeout
+            ) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    if acc.feed_line(line):
+                        break
+            return acc.result()
+        finally:
+            reply.usage, reply.stream = acc.usage, acc.stats()
+
+
+class AsyncLLMClient(_LLMClientBase):
+    """Async variant; use as ``async with AsyncLLMClient() as client``.
+
+    At most ``max_concurrency`` requests are in flight at once per client.
+    """
+
+    def __init__(
+        self,
+        endpoint: str | None = None,
+        api_key: str | None = None,
+        model: str | None = None,
+        timeout: int | None = None,
+        max_concurrency: int | None = None,
+        cache: LLMResponseCache | None = None,
+        use_cache: bool | None = None,
+        stream: bool | None = None,
+    ):
+        super().__init__(endpoint, api_key, model, timeout, cache, use_cache, stream)
+        self.max_concurrency = max(1, max_concurrency or settings.llm_max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._http: httpx.AsyncClient | None = None
+
+    async def __aenter__(self) -> "AsyncLLMClient":
+        self._http = httpx.AsyncClient(http2=_http2_enabled(), limits=_pool_limits())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def generate_json(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        stage: str = "llm",
+    ) -> Dict[str, Any]:
+        self._check_configured()
+        if self._http is None:
+            raise RuntimeError("AsyncLLMClient must be used inside 'async with'")
+        payload = self._build_payload(system_prompt, user_prompt, temperature)
+        key = self._cache_key(payload)
+        if key and self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._record(stage, _now_iso(), time.perf_counter(), None, cache="hit")
+                return cached
+        async with self._semaphore:
+            started_at = _now_iso()
+            started = time.perf_counter()
+            cache_status = "miss" if key else None
+            reply = _Reply()
+            try:
+                with span("llm_request", stage=stage):
+                    result = await through_cassette_async(
+                        "llm",
+                        _cassette_key(payload),
+                        lambda: self._request_json(payload, reply),
+                        *_cassette_codec(reply),
+                    )
+            except Exception as exc:
+                self._record_failure(stage, started_at, started, exc, cache_status, reply)
+                raise
+            if key and self.cache is not None:
+                self.cache.put(key, result)
+            self._record(stage, started_at, started, None, cache=cache_status, reply=reply)
+            return result
+
+    @backoff_retry(2, give_up_on=(StreamAborted,))
+    async def _request_json(self, payload: Dict[str, Any], reply: _Reply) -> Dict[str, Any]:
+        reply.attempts += 1
+        async with get_limiter("llm").aslot():
+            return await self._send(payload, reply)
+
+    async def _send(self, payload: Dict[str, Any], reply: _Reply) -> Dict[str, Any]:
+        http, url = self._http, self._url()
+        if http is None:
+            raise RuntimeError("AsyncLLMClient must be used inside 'async with'")
+        if not payload.get("stream"):
+            resp = await http.post(url, headers=self._headers(), json=payload, timeout=self.timeout)
+            resp.raise_for_status()
+            data = resp.json()
+            reply.usage = data.get("usage")
+            return _parse_completion(data)
+        acc = StreamAccumulator(settings.llm_stream_max_chars)
+        try:
+            async with http.stream(
+                "POST", url, headers=self._headers(), json=payload, timeout=self.timeout
+            ) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if acc.feed_line(line):
+                        break
+            return acc.result()
+        finally:
+            reply.usage, reply.stream = acc.usage, acc.stats()
+
+
+def get_llm_client(use_cache: bool | None = None) -> LLMClient:
+    """Return the process-wide client for the current settings (shared across projects)."""
+    enabled = settings.llm_cache_enabled if use_cache is None else use_cache
+    key = (
+        settings.llm_endpoint,
+        settings.llm_api_key,
+        settings.llm_model,
+        settings.llm_stream,
+        enabled,
+    )
+    with _POOL_LOCK:
+        if key not in _SHARED_CLIENTS:
+            _SHARED_CLIENTS[key] = LLMClient(use_cache=enabled)
+        return _SHARED_CLIENTS[key]
+
+
+def default_llm_cache() -> LLMResponseCache:
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = LLMResponseCache(
+            settings.llm_cache_dir,
+            ttl_s=settings.llm_cache_ttl_s,
+            max_bytes=settings.llm_cache_max_mb * 1024 * 1024,
+        )
+    return _DEFAULT_CACHE
+
+
+def _shared_http_client() -> httpx.Client:
+    global _SHARED_HTTP
+    with _POOL_LOCK:
+        if _SHARED_HTTP is None or _SHARED_HTTP.is_closed:
+            _SHARED_HTTP = httpx.Client(http2=_http2_enabled(), limits=_pool_limits())
+        return _SHARED_HTTP
+
+
+def _close_shared_http_client() -> None:
+    global _SHARED_HTTP
+    if _SHARED_HTTP is not None:
+        _SHARED_HTTP.close()
+        _SHARED_HTTP = None
+
+
+atexit.register(_close_shared_http_client)
+
+
+def _http2_enabled() -> bool:
+    return settings.llm_http2 and importlib.util.find_spec("h2") is not None
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_connections,
+    )
+
+
+def _cassette_key(payload: Dict[str, Any]) -> str:
+    """Record/replay key: the request minus transport-only options (streaming)."""
+    request = {k: v for k, v in payload.items() if k not in ("stream", "stream_options")}
+    return content_key(json.dumps(request, ensure_ascii=False, sort_keys=True))
+
+
+def _cassette_codec(reply: _Reply):
+    def encode(cassette, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {"result": result, "usage": reply.usage}
+
+    def decode(cassette, response: Dict[str, Any]) -> Dict[str, Any]:
+        reply.attempts, reply.usage = 1, response.get("usage")
+        return response["result"]
+
+    return encode, decode
+
+
+def _usage_tokens(usage: Dict[str, Any] | None) -> tuple[int | None, int | None, int | None]:
+    """(prompt, completion, cached) tokens from an OpenAI-style ``usage`` block, if reported."""
+    if not usage:
+        return None, None, None
+    details = usage.get("prompt_tokens_details") or {}
+    cached = details.get("cached_tokens", usage.get("prompt_cache_hit_tokens"))
+    return usage.get("prompt_tokens"), usage.get("completion_tokens"), cached
+
+
+def _parse_completion(data: Dict[str, Any]) -> Dict[str, Any]:
+    content = data["choices"][0]["message"]["content"]
+    return json.loads(content)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
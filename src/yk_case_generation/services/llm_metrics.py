@@ -0,0 +1,190 @@
+"""Per-run accounting of LLM calls (timing, stage, status, token usage)."""
+from __future__ import annotations
+
+import contextvars
+import math
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+_USAGE_KEYS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+@dataclass
+class LLMCallRecord:
+    stage: str
+    model: str
+    started_at: str
+    duration_s: float
+    status: str
+    error: str | None = None
+    cache: str | None = None  # "hit" | "miss"; None when the cache was bypassed
+    batch_size: int = 1  # number of projects sharing this call (multi-project batching)
+    # token usage as reported by the server (None when not reported, e.g. cache hits)
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    cached_tokens: int | None = None
+    retries: int = 0
+    # streaming only (LLM_STREAM): time to first content token and output rate
+    ttft_s: float | None = None
+    tokens_per_s: float | None = None
+
+
+@dataclass
+class LLMRunMetrics:
+    calls: List[LLMCallRecord] = field(default_factory=list)
+    # stage -> {"requests", "est_input_tokens", "est_input_tokens_uncompacted"}
+    prompt_tokens: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    # free-form audit sections, e.g. stage-1 candidate trimming
+    audit: Dict[str, Any] = field(default_factory=dict)
+
+    def add(self, record: LLMCallRecord) -> None:
+        self.calls.append(record)
+
+    def add_prompt_estimate(self, stage: str, uncompacted: int, compacted: int) -> None:
+        entry = self.prompt_tokens.setdefault(
+            stage, {"requests": 0, "est_input_tokens": 0, "est_input_tokens_uncompacted": 0}
+        )
+        entry["requests"] += 1
+        entry["est_input_tokens"] += compacted
+        entry["est_input_tokens_uncompacted"] += uncompacted
+
+    def to_dict(self) -> Dict[str, Any]:
+        calls = [asdict(c) for c in self.calls]
+        return {
+            "total_calls": len(self.calls),
+            "total_duration_s": round(sum(c.duration_s for c in self.calls), 3),
+            "cache": {
+                "hits": sum(1 for c in self.calls if c.cache == "hit"),
+                "misses": sum(1 for c in self.calls if c.cache == "miss"),
+            },
+            "prompt_tokens": self.prompt_tokens,
+            "usage": summarize_llm_calls(calls),
+            "streaming": self._streaming_summary(),
+            "audit": self.audit,
+            "calls": calls,
+        }
+
+    def _streaming_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage TTFT / throughput of streamed calls (empty when streaming is off)."""
+        out: Dict[str, Dict[str, Any]] = {}
+        streamed = [c for c in self.calls if c.ttft_s is not None or c.status == "aborted"]
+        for stage in dict.fromkeys(c.stage for c in streamed):
+            calls = [c for c in self.calls if c.stage == stage]
+            ttfts = [c.ttft_s for c in calls if c.ttft_s is not None]
+            rates = [c.tokens_per_s for c in calls if c.tokens_per_s is not None]
+            out[stage] = {
+                "streamed_calls": len(ttfts),
+                "aborted": sum(1 for c in calls if c.status == "aborted"),
+                "ttft_s_avg": round(sum(ttfts) / len(ttfts), 3) if ttfts else None,
+                "ttft_s_max": max(ttfts) if ttfts else None,
+                "tokens_per_s_avg": round(sum(rates) / len(rates), 1) if rates else None,
+                "completion_tokens": sum(c.completion_tokens or 0 for c in calls),
+            }
+        return out
+
+
+def summarize_llm_calls(calls: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Token and latency totals, overall and per stage, over serialized call records.
+
+    Works on ``run_meta.json`` ``llm.calls`` entries, so batch summaries can aggregate
+    across projects. A call shared by N batched projects is recorded once per project, so
+    each record counts 1/N towards calls, failures, retries, tokens and total latency.
+    """
+    by_stage: Dict[str, List[Dict[str, Any]]] = {}
+    all_calls: List[Dict[str, Any]] = []
+    for call in calls:
+        by_stage.setdefault(call.get("stage", "llm"), []).append(call)
+        all_calls.append(call)
+    return {
+        "totals": _usage_block(all_calls),
+        "by_stage": {stage: _usage_block(items) for stage, items in sorted(by_stage.items())},
+    }
+
+
+def _usage_block(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "calls": _shared_count(_share(c) for c in calls),
+        "failed": _shared_count(_share(c) for c in calls if c.get("status") != "ok"),
+        "retries": _shared_count((c.get("retries") or 0) * _share(c) for c in calls),
+    }
+    for key in _USAGE_KEYS:
+        out[key] = round(sum((c.get(key) or 0) * _share(c) for c in calls))
+    # cache hits cost no request time; keep them out of the latency distribution
+    timed = [c for c in calls if c.get("cache") != "hit"]
+    latencies = sorted(c.get("duration_s") or 0.0 for c in timed)
+    out["latency_s"] = {
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "max": latencies[-1] if latencies else None,
+        "total": round(sum((c.get("duration_s") or 0.0) * _share(c) for c in timed), 3),
+    }
+    return out
+
+
+def _share(call: Dict[str, Any]) -> float:
+    """Fraction of a (possibly batched) call attributed to one record."""
+    return 1 / max(1, call.get("batch_size") or 1)
+
+
+def _shared_count(shares: Iterable[float]) -> float | int:
+    total = round(float(sum(shares)), 2)
+    return int(total) if total.is_integer() else total
+
+
+def percentile(sorted_values: List[float], pct: float) -> float | None:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+_CURRENT: contextvars.ContextVar[Optional[LLMRunMetrics]] = contextvars.ContextVar(
+    "ykcg_llm_run_metrics", default=None
+)
+
+
+@contextmanager
+def collect_llm_metrics() -> Iterator[LLMRunMetrics]:
+    """Collect every LLM call made in this context (asyncio tasks inherit it)."""
+    metrics = LLMRunMetrics()
+    token = _CURRENT.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _CURRENT.reset(token)
+
+
+@contextmanager
+def use_llm_metrics(metrics: LLMRunMetrics) -> Iterator[LLMRunMetrics]:
+    """Route LLM calls in this context into an existing collector."""
+    token = _CURRENT.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _CURRENT.reset(token)
+
+
+def current_llm_metrics() -> Optional[LLMRunMetrics]:
+    return _CURRENT.get()
+
+
+def record_llm_call(record: LLMCallRecord) -> None:
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics.add(record)
+
+
+def record_prompt_estimate(stage: str, uncompacted: int, compacted: int) -> None:
+    """Record estimated input tokens of one request before and after prompt compaction."""
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics.add_prompt_estimate(stage, uncompacted, compacted)
+
+
+def record_llm_audit(name: str, data: Dict[str, Any]) -> None:
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics.audit[name] = data
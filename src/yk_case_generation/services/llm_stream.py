@@ -0,0 +1,134 @@
+"""Incremental handling of streamed (SSE) OpenAI-compatible chat completions.
+
+The accumulator checks the JSON structure of the content as it arrives, so a response
+that cannot become a single JSON value (stray prose, mismatched brackets, trailing
+text) or grows past the size cap is aborted without waiting for the full completion.
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+# Characters that may appear outside strings in JSON (literals, numbers, punctuation).
+_JSON_BARE_CHARS = frozenset("{}[]:,-+.0123456789eEtrufalsn \t\r\n")
+_CLOSERS = {"}": "{", "]": "["}
+
+
+class StreamAborted(ValueError):
+    """The streamed content can no longer become valid JSON, or exceeded the size cap."""
+
+
+@dataclass
+class StreamStats:
+    ttft_s: float | None
+    output_tokens: int
+    tokens_per_s: float | None
+
+
+class JSONPrefixChecker:
+    """Track string/bracket state and fail as soon as the text cannot be a JSON prefix."""
+
+    def __init__(self) -> None:
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._closed = False
+
+    def feed(self, text: str) -> None:
+        for ch in text:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch.isspace():
+                continue
+            if self._closed:
+                raise StreamAborted(f"trailing content after JSON value: {ch!r}")
+            if not self._started:
+                if ch not in "{[":
+                    raise StreamAborted(f"response does not start with a JSON object: {ch!r}")
+                self._started = True
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._stack.append(ch)
+            elif ch in _CLOSERS:
+                if not self._stack or self._stack.pop() != _CLOSERS[ch]:
+                    raise StreamAborted(f"mismatched bracket {ch!r}")
+                if not self._stack:
+                    self._closed = True
+            elif ch not in _JSON_BARE_CHARS:
+                raise StreamAborted(f"unexpected character outside string: {ch!r}")
+
+    def finish(self) -> None:
+        if not self._closed:
+            raise StreamAborted("stream ended before the JSON value was complete")
+
+
+class StreamAccumulator:
+    """Consume SSE lines of one completion; ``max_chars`` caps the accumulated content."""
+
+    def __init__(self, max_chars: int, started: float | None = None):
+        self.max_chars = max_chars
+        self._started = time.perf_counter() if started is None else started
+        self._checker = JSONPrefixChecker()
+        self._parts: List[str] = []
+        self._chars = 0
+        self._chunks = 0
+        self._first_at: float | None = None
+        self._last_at: float | None = None
+        self._usage: Dict[str, Any] | None = None
+
+    def feed_line(self, line: str) -> bool:
+        """Process one SSE line; returns True once the ``[DONE]`` sentinel arrives."""
+        line = line.strip()
+        if not line.startswith("data:"):
+            return False
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return True
+        event = json.loads(data)
+        if event.get("usage"):
+            self._usage = event["usage"]
+        for choice in event.get("choices") or []:
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                self._add(content)
+        return False
+
+    def _add(self, content: str) -> None:
+        now = time.perf_counter()
+        if self._first_at is None:
+            self._first_at = now
+        self._last_at = now
+        self._chunks += 1
+        self._chars += len(content)
+        if self.max_chars and self._chars > self.max_chars:
+            raise StreamAborted(f"response exceeded {self.max_chars} characters")
+        self._checker.feed(content)
+        self._parts.append(content)
+
+    @property
+    def usage(self) -> Dict[str, Any] | None:
+        """``usage`` block of the final event (servers send it with ``include_usage``)."""
+        return self._usage
+
+    def result(self) -> Dict[str, Any]:
+        self._checker.finish()
+        return json.loads("".join(self._parts))
+
+    def stats(self) -> StreamStats:
+        tokens = int((self._usage or {}).get("completion_tokens") or self._chunks)
+        ttft = None if self._first_at is None else round(self._first_at - self._started, 3)
+        rate = None
+        first, last = self._first_at, self._last_at
+        if first is not None and last is not None and last > first:
+            rate = round(tokens / (last - first), 1)
+        return StreamStats(ttft_s=ttft, output_tokens=tokens, tokens_per_s=rate)
@@ -0,0 +1,97 @@
+"""Drive ``generate_case`` over a set of IR files at a chosen concurrency."""
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from yk_case_generation.config import settings
+from yk_case_generation.models.document_ir import DocumentIR
+from yk_case_generation.services.case_builder import generate_case
+from yk_case_generation.services.concurrency import limiter_snapshot
+from yk_case_generation.services.llm_metrics import (
+    collect_llm_metrics,
+    percentile,
+    summarize_llm_calls,
+)
+
+
+def find_ir_files(ir_path: Path) -> List[Path]:
+    if ir_path.is_file():
+        return [ir_path]
+    return sorted(ir_path.glob("*_normalized_ir.json"))
+
+
+@contextmanager
+def llm_endpoint_settings(endpoint: str | None) -> Iterator[None]:
+    """Point the LLM settings at ``endpoint`` (e.g. the mock server) until exit."""
+    if not endpoint:
+        yield
+        return
+    saved = {key: getattr(settings, key) for key in ("llm_endpoint", "llm_api_key")}
+    settings.llm_endpoint = endpoint
+    settings.llm_api_key = settings.llm_api_key or "mock"
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            setattr(settings, key, value)
+
+
+def run_load_test(
+    ir_files: List[Path],
+    concurrency: int = 4,
+    mode: str | None = "llm",
+    repeat: int = 1,
+    llm_cache: bool | None = False,
+) -> Dict[str, Any]:
+    """Generate every IR ``repeat`` times with ``concurrency`` workers; return a report dict.
+
+    The LLM response cache is bypassed by default so every case reaches the endpoint.
+    """
+    docs = [DocumentIR.model_validate(json.loads(f.read_text(encoding="utf-8"))) for f in ir_files]
+    jobs = [doc for _ in range(max(1, repeat)) for doc in docs]
+
+    def one(doc: DocumentIR) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with collect_llm_metrics() as metrics:
+            try:
+                generate_case(doc, mode=mode, llm_cache=llm_cache)
+                error = None
+            except Exception as exc:  # noqa: BLE001
+                error = str(exc)
+        return {
+            "case_id": doc.case_id,
+            "duration_s": round(time.perf_counter() - started, 3),
+            "error": error,
+            "calls": metrics.to_dict()["calls"],
+        }
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(one, jobs))
+    wall_s = time.perf_counter() - started
+
+    latencies = sorted(r["duration_s"] for r in results)
+    failed = [r for r in results if r["error"]]
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "cases": len(results),
+        "ok": len(results) - len(failed),
+        "failed": len(failed),
+        "wall_s": round(wall_s, 3),
+        "throughput_cases_per_s": round(len(results) / wall_s, 3) if wall_s else None,
+        "case_latency_s": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "llm_usage": summarize_llm_calls(call for r in results for call in r["calls"]),
+        "concurrency_limits": limiter_snapshot(),
+        "errors": sorted({r["error"] for r in failed})[:20],
+    }
@@ -0,0 +1,128 @@
+"""Microbenchmarks of the CPU-bound IR and case stages over synthetic ``DocumentIR``s.
+
+Each target is timed (best of ``repeat``) at increasing sizes along one dimension
+(lines per page, pages per source, or sources); the log-log slope of time against size
+is its empirical scaling exponent, and anything above ``max_exponent`` is flagged as
+superlinear.
+"""
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import replace
+from typing import Any, Callable, Dict, List
+
+from yk_case_generation.models.document_ir import DocumentIR
+from yk_case_generation.services.candidate_fact_builder import build_candidate_facts
+from yk_case_generation.services.case_builder import (
+    _enforce_content_guardrails,
+    _generate_with_rules,
+)
+from yk_case_generation.services.case_response_builder import build_case_response
+from yk_case_generation.services.ir_builder import (
+    _annotate_template_and_checkbox,
+    _mark_boilerplate,
+)
+from yk_case_generation.services.synthetic_ir import IRSpec, generate_document_ir
+
+DIMENSIONS = {
+    "lines": "lines_per_page",
+    "pages": "pages_per_source",
+    "sources": "sources",
+}
+DEFAULT_MAX_EXPONENT = 1.3
+
+# target -> (prepare inputs outside the timer, timed call)
+_Target = tuple[Callable[[DocumentIR], Any], Callable[[Any], Any]]
+
+
+def _annotated(doc: DocumentIR) -> DocumentIR:
+    doc = doc.model_copy(deep=True)
+    _annotate_template_and_checkbox(doc)
+    _mark_boilerplate(doc, 3)
+    return doc
+
+
+def _rules_case(doc: DocumentIR) -> Dict[str, Any]:
+    return _generate_with_rules(_annotated(doc))
+
+
+TARGETS: Dict[str, _Target] = {
+    "annotate_pages": (lambda doc: doc.model_copy(deep=True), _annotate_template_and_checkbox),
+    "mark_boilerplate": (
+        lambda doc: doc.model_copy(deep=True),
+        lambda doc: _mark_boilerplate(doc, 3),
+    ),
+    "build_candidate_facts": (_annotated, build_candidate_facts),
+    "generate_with_rules": (_annotated, _generate_with_rules),
+    "enforce_guardrails": (_rules_case, _enforce_content_guardrails),
+    "build_case_response": (
+        lambda doc: _enforce_content_guardrails(_rules_case(doc)),
+        build_case_response,
+    ),
+}
+
+
+def run_microbench(
+    base: IRSpec,
+    dimension: str,
+    sizes: List[int],
+    targets: List[str] | None = None,
+    repeat: int = 3,
+    max_exponent: float = DEFAULT_MAX_EXPONENT,
+) -> Dict[str, Any]:
+    """Time each target at every size of ``dimension``; returns timings and exponents."""
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"dimension must be one of {sorted(DIMENSIONS)}, got {dimension!r}")
+    names = targets or list(TARGETS)
+    unknown = sorted(set(names) - set(TARGETS))
+    if unknown:
+        raise ValueError(f"unknown targets: {unknown}")
+    sizes = sorted(set(sizes))
+    overrides: List[Dict[str, Any]] = [{DIMENSIONS[dimension]: size} for size in sizes]
+    docs = [generate_document_ir(replace(base, **override)) for override in overrides]
+    report: Dict[str, Any] = {
+        "dimension": dimension,
+        "sizes": sizes,
+        "lines_total": [sum(len(p.lines) for s in d.sources for p in s.pages) for d in docs],
+        "spec": base.to_dict(),
+        "repeat": repeat,
+        "max_exponent": max_exponent,
+        "targets": {},
+    }
+    for name in names:
+        prepare, call = TARGETS[name]
+        times = [_best_time(prepare, call, doc, repeat) for doc in docs]
+        exponent = scaling_exponent(sizes, times)
+        report["targets"][name] = {
+            "times_s": [round(t, 6) for t in times],
+            "exponent": round(exponent, 3) if exponent is not None else None,
+            "superlinear": exponent is not None and exponent > max_exponent,
+        }
+    report["superlinear"] = sorted(n for n, t in report["targets"].items() if t["superlinear"])
+    return report
+
+
+def scaling_exponent(sizes: List[int], times: List[float]) -> float | None:
+    """Least-squares slope of log(time) over log(size); ~1 is linear, ~2 quadratic."""
+    points = [(math.log(s), math.log(max(t, 1e-7))) for s, t in zip(sizes, times) if s > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def _best_time(
+    prepare: Callable[[DocumentIR], Any], call: Callable[[Any], Any], doc: DocumentIR, repeat: int
+) -> float:
+    best = math.inf
+    for _ in range(max(1, repeat)):
+        arg = prepare(doc)
+        started = time.perf_counter()
+        call(arg)
+        best = min(best, time.perf_counter() - started)
+    return best
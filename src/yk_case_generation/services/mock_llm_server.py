@@ -0,0 +1,248 @@
+"""Offline stand-in for the OpenAI-compatible chat-completions endpoint.
+
+Answers case-builder requests with schema-valid JSON derived from the request itself
+(stage 1: candidate facts become selected facts; stage 2: selected facts become the
+case; repair: the case is echoed back), or with a canned response. Latency, error and
+429 behaviour are configurable so throughput and concurrency handling can be measured
+without the real endpoint. Run it with ``ykcg mock-llm`` or ``serve_mock_llm()``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from yk_case_generation.services.prompt_builder import compact_json, estimate_tokens
+
+MOCK_ROUTE = "/v1/chat/completions"
+_SECTIONS = (
+    "patient_info",
+    "chief_complaint",
+    "medical_history",
+    "family_history",
+    "tests_and_exams",
+    "diagnosis",
+)
+_NEGATION_HINTS = ("否认", "未见", "无明显", "阴性")
+_STREAM_CHUNK_CHARS = 16
+
+
+@dataclass
+class MockLLMConfig:
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    distribution: str = "uniform"  # fixed | uniform | lognormal
+    error_rate: float = 0.0  # share of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # share of requests answered with HTTP 429
+    max_inflight: int = 0  # answer 429 above this many concurrent requests; 0 = unlimited
+    max_selected_facts: int = 40
+    canned: Dict[str, Any] | None = None  # fixed JSON answer for every request
+    seed: int | None = None
+
+
+def create_mock_llm_app(config: MockLLMConfig | None = None) -> FastAPI:
+    config = config or MockLLMConfig()
+    rng = random.Random(config.seed)
+    app = FastAPI(title="ykcg mock LLM")
+    state = {"inflight": 0, "requests": 0, "errors": 0, "rate_limited": 0}
+
+    @app.get("/stats")
+    async def stats() -> Dict[str, Any]:
+        return state
+
+    @app.post(MOCK_ROUTE)
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        state["requests"] += 1
+        if config.max_inflight and state["inflight"] >= config.max_inflight:
+            state["rate_limited"] += 1
+            return JSONResponse({"error": {"message": "too many requests"}}, status_code=429)
+        state["inflight"] += 1
+        try:
+            await asyncio.sleep(_latency_s(config, rng))
+            roll = rng.random()
+            if roll < config.rate_limit_rate:
+                state["rate_limited"] += 1
+                return JSONResponse({"error": {"message": "rate limited"}}, status_code=429)
+            if roll < config.rate_limit_rate + config.error_rate:
+                state["errors"] += 1
+                return JSONResponse({"error": {"message": "injected failure"}}, status_code=500)
+            messages = payload.get("messages") or []
+            content = compact_json(
+                config.canned or answer_request(messages, config.max_selected_facts)
+            )
+            usage = {
+                "prompt_tokens": sum(estimate_tokens(m.get("content", "")) for m in messages),
+                "completion_tokens": estimate_tokens(content),
+                "prompt_tokens_details": {"cached_tokens": 0},
+            }
+        finally:
+            state["inflight"] -= 1
+        if payload.get("stream"):
+            return StreamingResponse(_sse_events(content, usage), media_type="text/event-stream")
+        return {
+            "id": f"mock-{state['requests']}",
+            "object": "chat.completion",
+            "model": payload.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    return app
+
+
+def answer_request(messages: List[Dict[str, Any]], max_selected_facts: int = 40) -> Dict[str, Any]:
+    """Derive a schema-valid answer from the request's user message."""
+    user = messages[-1].get("content", "") if messages else ""
+    try:
+        data = json.loads(user)
+    except ValueError:
+        return {}
+    if isinstance(data.get("cases"), list):
+        return {
+            "results": [
+                {"case_id": item.get("case_id", ""), **_answer_one(item, max_selected_facts)}
+                for item in data["cases"]
+                if isinstance(item, dict)
+            ]
+        }
+    return _answer_one(data, max_selected_facts)
+
+
+@contextmanager
+def serve_mock_llm(
+    config: MockLLMConfig | None = None, host: str = "127.0.0.1", port: int = 0
+) -> Iterator[str]:
+    """Run the mock server in a background thread; yields its chat-completions URL."""
+    with serve_app(create_mock_llm_app(config), host, port) as base_url:
+        yield base_url + MOCK_ROUTE
+
+
+@contextmanager
+def serve_app(app: FastAPI, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """Serve ``app`` with uvicorn in a background thread; yields ``http://host:port``."""
+    server = uvicorn.Server(
+        uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError(f"{app.title} failed to start")
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{bound_port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def _answer_one(data: Dict[str, Any], max_selected_facts: int) -> Dict[str, Any]:
+    if "current_case_json" in data:
+        return data["current_case_json"] if isinstance(data["current_case_json"], dict) else {}
+    if "candidate_facts" in data:
+        return _select_facts(
+            data["candidate_facts"], data.get("target_sections"), max_selected_facts
+        )
+    if "selected_facts" in data:
+        return _build_case(data)
+    return {}
+
+
+def _select_facts(
+    candidates: List[Dict[str, Any]], target_sections: List[str] | None, limit: int
+) -> Dict[str, Any]:
+    selected: List[Dict[str, Any]] = []
+    for item in candidates:
+        hints = [h for h in item.get("section_hints") or [] if h in _SECTIONS]
+        if target_sections:
+            hints = [h for h in hints if h in target_sections]
+            if not hints:
+                continue
+        quote = str(item.get("quote", ""))
+        selected.append(
+            {
+                "section": hints[0] if hints else "medical_history",
+                "text": quote,
+                "polarity": "negated" if any(h in quote for h in _NEGATION_HINTS) else "asserted",
+                "evidence": [
+                    {
+                        "source_id": item.get("source_id", ""),
+                        "page": item.get("page"),
+                        "line_id": item.get("line_id", 0),
+                        "quote": quote,
+                    }
+                ],
+            }
+        )
+        if len(selected) >= limit:
+            break
+    return {"selected_facts": selected, "quality": {"warnings": [], "missing_critical": []}}
+
+
+def _build_case(data: Dict[str, Any]) -> Dict[str, Any]:
+    case: Dict[str, Any] = {
+        "case_id": data.get("case_id", ""),
+        "source_summary": data.get("source_summary")
+        or {"lims_sources": 0, "ocr_sources": 0, "total_pages": 0, "total_lines": 0},
+    }
+    for section in _SECTIONS:
+        case[section] = []
+    for fact in data.get("selected_facts") or []:
+        section = fact.get("section")
+        if section in case:
+            case[section].append(
+                {
+                    "text": fact.get("text", ""),
+                    "polarity": fact.get("polarity", "unknown"),
+                    "evidence": fact.get("evidence", []),
+                }
+            )
+    quality = data.get("quality") or {}
+    case["quality"] = {
+        "warnings": list(quality.get("warnings") or []),
+        "missing_critical": list(quality.get("missing_critical") or []),
+    }
+    return case
+
+
+def _latency_s(config: MockLLMConfig, rng: random.Random) -> float:
+    mean, jitter = max(0.0, config.latency_ms), max(0.0, config.jitter_ms)
+    if config.distribution == "fixed" or jitter == 0:
+        ms = mean
+    elif config.distribution == "lognormal":
+        # long-tailed: median ~= mean, spread controlled by jitter/mean
+        ms = mean * rng.lognormvariate(0.0, jitter / mean) if mean else 0.0
+    else:
+        ms = rng.uniform(mean - jitter, mean + jitter)
+    return max(0.0, ms) / 1000
+
+
+async def _sse_events(content: str, usage: Dict[str, Any]):
+    for start in range(0, len(content), _STREAM_CHUNK_CHARS):
+        chunk = {
+            "choices": [
+                {"index": 0, "delta": {"content": content[start : start + _STREAM_CHUNK_CHARS]}}
+            ]
+        }
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        await asyncio.sleep(0)
+    yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+    yield "data: [DONE]\n\n"
@@ -4,11 +4,6 @@ import base64
 import json
 from typing import Any, Dict
 
-from tencentcloud.common import credential
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.ocr.v20181119 import ocr_client, models
-
 from yk_case_generation.config import settings
 
 
@@ -21,14 +16,24 @@ class TencentOCRClient:
         if not self.secret_id or not self.secret_key:
             raise ValueError("Tencent OCR credentials not configured")
 
+        # the SDK (and requests under it) is imported only once a client is actually built
+        from tencentcloud.common import credential
+        from tencentcloud.common.profile.client_profile import ClientProfile
+        from tencentcloud.common.profile.http_profile import HttpProfile
+        from tencentcloud.ocr.v20181119 import ocr_client
+
         cred = credential.Credential(self.secret_id, self.secret_key)
-        http_profile = HttpProfile()
-        http_profile.endpoint = self.endpoint
+        # "http://host:port" selects the scheme too (e.g. a local stand-in); bare hosts use https
+        scheme, _, host = self.endpoint.rpartition("://")
+        http_profile = HttpProfile(protocol=scheme or None)
+        http_profile.endpoint = host.rstrip("/")
         client_profile = ClientProfile()
         client_profile.httpProfile = http_profile
         self.client = ocr_client.OcrClient(cred, self.region, client_profile)
 
     def general_accurate_image(self, image_bytes: bytes) -> Dict[str, Any]:
+        from tencentcloud.ocr.v20181119 import models
+
         req = models.GeneralAccurateOCRRequest()
         b64 = base64.b64encode(image_bytes).decode("utf-8")
         params = {
@@ -1,27 +1,69 @@
 "\"\"\"Run OCR on preprocessed images and persist responses.\"\"\""
 from __future__ import annotations
+import contextvars
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Iterable
-from tenacity import retry, stop_after_attempt, wait_fixed
 
+from yk_case_generation.config import settings
+from yk_case_generation.services.cassette import content_key, replaying, through_cassette
+from yk_case_generation.services.concurrency import backoff_retry, get_limiter
+from yk_case_generation.services.events import emit
 from yk_case_generation.services.ocr_clients.tencent import TencentOCRClient
+from yk_case_generation.services.spans import span
 
+_local = threading.local()
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-def _ocr_once(client: TencentOCRClient, img_path: Path) -> dict:
-    data = img_path.read_bytes()
-    return client.general_accurate_image(data)
+
+@backoff_retry(3)
+def _ocr_once(client: TencentOCRClient, data: bytes) -> dict:
+    with get_limiter("ocr").slot():
+        return client.general_accurate_image(data)
 
 
 def run_ocr_on_images(img_paths: Iterable[Path], out_dir: Path) -> None:
-    client = TencentOCRClient()
+    """OCR images concurrently; in-flight requests are bounded by the adaptive ``ocr`` limiter."""
+    if not replaying():
+        TencentOCRClient()  # fail fast on missing credentials, before any worker starts
     out_dir.mkdir(parents=True, exist_ok=True)
-    for img_path in img_paths:
-        try:
-            resp = _ocr_once(client, img_path)
-            target = out_dir / (img_path.stem + ".json")
-            target.write_text(json.dumps(resp, ensure_ascii=False, indent=2), encoding="utf-8")
-            print(f"[ok] {img_path}")
-        except Exception as exc:
-            print(f"[WARN] ocr failed {img_path}: {exc}")
+    # Workers run in copies of this context so an active I/O cassette applies to them too.
+    ctx = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max(1, settings.ocr_max_concurrency)) as pool:
+        list(pool.map(lambda img_path: ctx.copy().run(_ocr_to_file, img_path, out_dir), img_paths))
+
+
+def _ocr_to_file(img_path: Path, out_dir: Path) -> None:
+    started = time.perf_counter()
+    data = b""
+    try:
+        data = img_path.read_bytes()
+        with span("ocr_image", file=img_path.name, bytes=len(data)):
+            resp = through_cassette(
+                "ocr",
+                content_key(data),
+                lambda: _ocr_once(_thread_client(), data),
+                request_blob=data,
+            )
+        target = out_dir / (img_path.stem + ".json")
+        target.write_text(json.dumps(resp, ensure_ascii=False, indent=2), encoding="utf-8")
+        emit("ocr_request", **_ocr_fields(img_path, data, started), status="ok")
+    except Exception as exc:
+        emit("ocr_request", **_ocr_fields(img_path, data, started), status="failed", error=str(exc))
+
+
+def _ocr_fields(img_path: Path, data: bytes, started: float) -> dict:
+    return {
+        "file": img_path.name,
+        "bytes": len(data),
+        "duration_s": round(time.perf_counter() - started, 3),
+    }
+
+
+def _thread_client() -> TencentOCRClient:
+    # SDK clients hold a requests session; keep one per worker thread.
+    if getattr(_local, "client", None) is None:
+        _local.client = TencentOCRClient()
+    return _local.client
@@ -1,29 +1,47 @@
 """End-to-end project pipeline runner for MVP toolization."""
 from __future__ import annotations
 
+import contextvars
 import json
 import shutil
+import sqlite3
 import subprocess
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, ContextManager, Iterator
 from urllib.parse import parse_qs, urlparse
 
 import httpx
 
+from yk_case_generation.config import settings
 from yk_case_generation.services.attachment_processing import prepare_images_for_ocr
-from yk_case_generation.services.case_builder import generate_case
+from yk_case_generation.models.document_ir import DocumentIR
+from yk_case_generation.services.case_builder import generate_case, generate_cases_batched
 from yk_case_generation.services.case_response_builder import build_case_response
+from yk_case_generation.services.cassette import content_key, project_cassette, through_cassette
+from yk_case_generation.services.concurrency import backoff_retry, get_limiter, limiter_snapshot
+from yk_case_generation.services.events import bind_events, emit
 from yk_case_generation.services.ir_builder import build_ir_for_project
 from yk_case_generation.services.lims_api import fetch_project_info, project_payload_to_inputs
+from yk_case_generation.services.llm_metrics import collect_llm_metrics
 from yk_case_generation.services.ocr_runner import run_ocr_on_images
+from yk_case_generation.services.run_catalog import default_catalog, record_run
+from yk_case_generation.services.spans import Trace, span
+from yk_case_generation.services.step_profiler import StepProfiler, parse_profile_modes
 from yk_case_generation.services.storage import save_json
 
 DOWNLOAD_PREFIX = "https://newlims-api.yikongenomics.cn/system/config/download/fileDownload?configPath=&fileNames="
 SUPPORTED_ATTACH_EXT = {".docx", ".pdf", ".png", ".jpg", ".jpeg"}
 
+StepProbe = Callable[[str], ContextManager[Any]]
+_STEP_PROBES: contextvars.ContextVar[tuple[StepProbe, ...]] = contextvars.ContextVar(
+    "ykcg_step_probes", default=()
+)
+
 
 @dataclass
 class StepResult:
@@ -35,24 +53,114 @@ class StepResult:
     error: str | None = None
 
 
+@dataclass
+class _ProjectRun:
+    project_number: str
+    run_dir: Path
+    meta: dict[str, Any]
+    partial: bool = False
+    fatal_error: str | None = None
+    doc_ir: DocumentIR | None = None
+    trace: Trace = field(default_factory=Trace)
+    profiler: StepProfiler | None = None
+    started: float = field(default_factory=time.perf_counter)
+
+
 def run_project_pipeline(
     project_number: str,
     output_root: Path,
     mode: str | None = None,
     skip_ocr: bool = False,
+    llm_cache: bool | None = None,
+    profile: str | None = None,
 ) -> dict[str, Any]:
-    run_dir = output_root / project_number
-    raw_dir = run_dir / "raw"
-    attachments_dir = run_dir / "attachments"
-    ocr_inputs_root = run_dir / "ocr_inputs"
-    ocr_project_inputs = ocr_inputs_root / project_number
-    ocr_results_dir = run_dir / "ocr_results"
-    cases_dir = run_dir / "cases"
-    frontend_dir = run_dir / "frontend"
+    """Run one project end to end; ``profile`` ("cpu", "mem" or "cpu,mem") profiles each step."""
+    modes = parse_profile_modes(profile)
+    run = _start_run(project_number, output_root, modes)
+    with project_cassette(project_number), run.trace.activate(), _profiling(run):
+        with bind_events(project=project_number):
+            _run_ingest_steps(run, skip_ocr)
+            if run.doc_ir is not None:
+                doc_ir = run.doc_ir
+                with collect_llm_metrics() as llm_metrics:
+                    step, case = _run_step_with_result(
+                        "build_case", lambda: generate_case(doc_ir, mode=mode, llm_cache=llm_cache)
+                    )
+                _run_output_steps(run, step, case, llm_metrics.to_dict())
+    return _finish_run(run)
+
+
+def run_projects_batched(
+    project_numbers: list[str],
+    output_root: Path,
+    skip_ocr: bool = False,
+    llm_cache: bool | None = None,
+    profile: str | None = None,
+) -> list[dict[str, Any]]:
+    """Run several projects, packing their LLM requests into shared batched calls (llm mode).
+
+    Ingest steps run per project first; ``build_case`` then runs once for all projects
+    that reached an IR, so its recorded duration is the shared batch wall time.
+    """
+    modes = parse_profile_modes(profile)
+    runs = [_start_run(pid, output_root, modes) for pid in project_numbers]
+    for run in runs:
+        with project_cassette(run.project_number), run.trace.activate(), _profiling(run):
+            with bind_events(project=run.project_number):
+                _run_ingest_steps(run, skip_ocr)
+    ready = [(run, run.doc_ir) for run in runs if run.doc_ir is not None]
+    if ready:
+        started = time.perf_counter()
+        started_at = _now_iso()
+        # Shared LLM calls are recorded once, under a cassette named after the batch members.
+        members = ",".join(run.project_number for run, _ in ready)
+        batch_name = "batch-" + content_key(members)[:16]
+        try:
+            with project_cassette(batch_name):
+                results, metrics = generate_cases_batched(
+                    [doc_ir for _, doc_ir in ready], llm_cache=llm_cache
+                )
+            batch_error = None
+        except Exception as exc:  # noqa: BLE001
+            results, metrics, batch_error = {}, {}, str(exc)
+        duration_s = round(time.perf_counter() - started, 3)
+        ended_at = _now_iso()
+        for run, _ in ready:
+            outcome = results.get(run.project_number, batch_error or "missing_batch_result")
+            case = outcome if isinstance(outcome, dict) else None
+            failed = case is None
+            step = StepResult(
+                name="build_case",
+                status="failed" if failed else "ok",
+                started_at=started_at,
+                ended_at=ended_at,
+                duration_s=duration_s,
+                error=str(outcome) if failed else None,
+            )
+            llm = metrics.get(run.project_number)
+            with run.trace.activate(), _profiling(run), bind_events(project=run.project_number):
+                _emit_step_end(step)
+                _run_output_steps(run, step, case, llm.to_dict() if llm is not None else {})
+    return [_finish_run(run) for run in runs]
+
+
+@contextmanager
+def probe_steps(probe: StepProbe) -> Iterator[None]:
+    """Run every pipeline step started in this context inside ``probe(step_name)``.
+
+    Probes nest: an inner ``probe_steps`` adds to the probes already active.
+    """
+    token = _STEP_PROBES.set(_STEP_PROBES.get() + (probe,))
+    try:
+        yield
+    finally:
+        _STEP_PROBES.reset(token)
 
-    for path in (raw_dir, attachments_dir, ocr_project_inputs, ocr_results_dir, cases_dir, frontend_dir):
-        path.mkdir(parents=True, exist_ok=True)
 
+def _start_run(
+    project_number: str, output_root: Path, profile_modes: tuple[str, ...] = ()
+) -> _ProjectRun:
+    run_dir = output_root / project_number
     meta: dict[str, Any] = {
         "project_number": project_number,
         "status": "running",
@@ -67,15 +175,36 @@ def run_project_pipeline(
         },
         "artifacts": {},
     }
+    run = _ProjectRun(project_number=project_number, run_dir=run_dir, meta=meta)
+    if profile_modes:
+        run.profiler = StepProfiler(run_dir / "profile", profile_modes)
+        meta["artifacts"]["profile_dir"] = str(run.profiler.out_dir)
+    return run
+
+
+def _run_ingest_steps(run: _ProjectRun, skip_ocr: bool) -> None:
+    """fetch_project -> download -> prepare OCR inputs -> OCR -> build_ir; sets ``run.doc_ir``."""
+    project_number = run.project_number
+    run_dir = run.run_dir
+    meta = run.meta
+    raw_dir = run_dir / "raw"
+    attachments_dir = run_dir / "attachments"
+    ocr_inputs_root = run_dir / "ocr_inputs"
+    ocr_project_inputs = ocr_inputs_root / project_number
+    ocr_results_dir = run_dir / "ocr_results"
+
+    for path in (
+        raw_dir,
+        attachments_dir,
+        ocr_project_inputs,
+        ocr_results_dir,
+        run_dir / "cases",
+        run_dir / "frontend",
+    ):
+        path.mkdir(parents=True, exist_ok=True)
 
     raw_path = raw_dir / f"{project_number}.json"
     normalized_ir_path = run_dir / f"{project_number}_normalized_ir.json"
-    case_path = cases_dir / f"{project_number}_case.json"
-    frontend_path = frontend_dir / f"{project_number}_frontend.json"
-    run_meta_path = run_dir / "run_meta.json"
-
-    partial = False
-    fatal_error = None
 
     try:
         step, data = _run_step_with_result("fetch_project", lambda: fetch_project_info(project_number))
@@ -95,11 +224,12 @@ def run_project_pipeline(
         )
         meta["steps"].append(step.__dict__)
         if step.status != "ok":
-            partial = True
+            run.partial = True
             downloaded = []
         meta["stats"]["attachments_downloaded"] = len(downloaded)
 
-        all_files = _expand_archives(downloaded)
+        with span("expand_archives"):
+            all_files = _expand_archives(downloaded)
         supported = [p for p in all_files if p.suffix.lower() in SUPPORTED_ATTACH_EXT]
 
         step, prepared_images = _run_step_with_result(
@@ -108,7 +238,7 @@ def run_project_pipeline(
         )
         meta["steps"].append(step.__dict__)
         if step.status != "ok":
-            partial = True
+            run.partial = True
             prepared_images = []
         meta["stats"]["ocr_images_total"] = len(prepared_images)
 
@@ -127,7 +257,7 @@ def run_project_pipeline(
             step = _run_step("run_ocr", lambda: run_ocr_on_images(prepared_images, ocr_results_dir))
             meta["steps"].append(step.__dict__)
             if step.status != "ok":
-                partial = True
+                run.partial = True
 
         meta["stats"]["ocr_json_total"] = len(list(ocr_results_dir.glob("*.json")))
 
@@ -145,60 +275,83 @@ def run_project_pipeline(
             raise RuntimeError(step.error or "build_ir_failed")
         save_json(doc_ir.model_dump(), normalized_ir_path)
         meta["artifacts"]["normalized_ir"] = str(normalized_ir_path)
-
-        step, case = _run_step_with_result("build_case", lambda: generate_case(doc_ir, mode=mode))
-        meta["steps"].append(step.__dict__)
-        if step.status != "ok":
-            raise RuntimeError(step.error or "build_case_failed")
+        run.doc_ir = doc_ir
+    except Exception as exc:
+        run.fatal_error = str(exc)
+
+
+def _run_output_steps(
+    run: _ProjectRun,
+    case_step: StepResult,
+    case: dict[str, Any] | None,
+    llm_meta: dict[str, Any],
+) -> None:
+    """Record ``build_case`` and write the case and frontend artifacts."""
+    project_number = run.project_number
+    meta = run.meta
+    case_path = run.run_dir / "cases" / f"{project_number}_case.json"
+    frontend_path = run.run_dir / "frontend" / f"{project_number}_frontend.json"
+    try:
+        meta["steps"].append(case_step.__dict__)
+        meta["llm"] = llm_meta
+        if case_step.status != "ok":
+            raise RuntimeError(case_step.error or "build_case_failed")
+        assert case is not None
         save_json(case, case_path)
         meta["artifacts"]["case_json"] = str(case_path)
 
-        step, frontend = _run_step_with_result("build_frontend_response", lambda: build_case_response(case))
+        step, frontend = _run_step_with_result(
+            "build_frontend_response",
+            lambda: build_case_response(case, layout=settings.response_layout),
+        )
         meta["steps"].append(step.__dict__)
         if step.status != "ok":
             raise RuntimeError(step.error or "build_frontend_response_failed")
         save_json(frontend, frontend_path)
         meta["artifacts"]["frontend_json"] = str(frontend_path)
-
-        meta["status"] = "partial" if partial else "success"
     except Exception as exc:
-        fatal_error = str(exc)
-        meta["status"] = "failed"
-    finally:
-        meta["ended_at"] = _now_iso()
-        if fatal_error:
-            meta["error"] = fatal_error
-        save_json(meta, run_meta_path)
+        run.fatal_error = str(exc)
+
 
+def _finish_run(run: _ProjectRun) -> dict[str, Any]:
+    meta = run.meta
+    if run.fatal_error:
+        meta["status"] = "failed"
+    else:
+        meta["status"] = "partial" if run.partial else "success"
+    meta["ended_at"] = _now_iso()
+    if run.fatal_error:
+        meta["error"] = run.fatal_error
+    meta["concurrency"] = limiter_snapshot()
+    meta["spans"] = run.trace.tree()
+    save_json(meta, run.run_dir / "run_meta.json")
+    if settings.run_catalog_enabled:
+        catalog = default_catalog(run.run_dir.parent, settings.run_catalog_path)
+        try:
+            record_run(catalog, meta, run.run_dir)
+        except (sqlite3.Error, OSError) as exc:
+            emit("run_catalog", catalog=str(catalog), status="failed", error=str(exc))
+    emit(
+        "project_end",
+        project=run.project_number,
+        status=meta["status"],
+        duration_s=round(time.perf_counter() - run.started, 3),
+    )
     return meta
 
 
 def _run_step(name: str, fn) -> StepResult:
-    started = time.time()
-    started_at = _now_iso()
-    try:
-        fn()
-        status = "ok"
-        error = None
-    except Exception as exc:  # noqa: BLE001
-        status = "failed"
-        error = str(exc)
-    ended_at = _now_iso()
-    return StepResult(
-        name=name,
-        status=status,
-        started_at=started_at,
-        ended_at=ended_at,
-        duration_s=round(time.time() - started, 3),
-        error=error,
-    )
+    step, _ = _run_step_with_result(name, fn)
+    return step
 
 
 def _run_step_with_result(name: str, fn):
-    started = time.time()
+    started = time.perf_counter()
     started_at = _now_iso()
+    emit("step_start", step=name)
     try:
-        result = fn()
+        with span(name), _probe(name):
+            result = fn()
         status = "ok"
         error = None
     except Exception as exc:  # noqa: BLE001
@@ -211,34 +364,101 @@ def _run_step_with_result(name: str, fn):
         status=status,
         started_at=started_at,
         ended_at=ended_at,
-        duration_s=round(time.time() - started, 3),
+        duration_s=round(time.perf_counter() - started, 3),
         error=error,
     )
+    _emit_step_end(step)
     return step, result
 
 
+def _emit_step_end(step: StepResult) -> None:
+    emit(
+        "step_end",
+        step=step.name,
+        status=step.status,
+        duration_s=step.duration_s,
+        **({"error": step.error} if step.error else {}),
+    )
+
+
+@contextmanager
+def _probe(name: str) -> Iterator[None]:
+    probes = _STEP_PROBES.get()
+    if not probes:
+        yield
+        return
+    with ExitStack() as stack:
+        for probe in probes:
+            stack.enter_context(probe(name))
+        yield
+
+
+def _profiling(run: _ProjectRun) -> ContextManager[Any]:
+    return probe_steps(run.profiler) if run.profiler is not None else nullcontext()
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
 def _download_attachments(urls: list[str], out_dir: Path) -> list[Path]:
+    """Download concurrently (bounded by the adaptive ``download`` limiter), keeping URL order."""
     out_dir.mkdir(parents=True, exist_ok=True)
-    downloaded: list[Path] = []
+    jobs: list[tuple[str, Path]] = []
+    taken: set[Path] = set()
     for idx, raw_url in enumerate(urls, start=1):
         url = raw_url
         if not url.lower().startswith(("http://", "https://")):
             url = DOWNLOAD_PREFIX + url
         name = _safe_filename(url)
         target = out_dir / name
-        if target.exists():
+        if target.exists() or target in taken:
             target = target.with_name(f"{target.stem}_{idx}{target.suffix}")
+        taken.add(target)
+        jobs.append((url, target))
+    # Workers run in copies of this context so an active I/O cassette applies to them too.
+    ctx = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max(1, settings.download_max_concurrency)) as pool:
+        return list(pool.map(lambda job: ctx.copy().run(_download_attachment, *job), jobs))
+
+
+def _download_attachment(url: str, target: Path) -> Path:
+    def encode(cassette, path: Path) -> dict:
+        return {"blob": cassette.put_blob(path.read_bytes())}
+
+    def decode(cassette, response: dict) -> Path:
+        target.write_bytes(cassette.get_blob(response["blob"]))
+        return target
+
+    started = time.perf_counter()
+    try:
+        with span("download", file=target.name):
+            path = through_cassette(
+                "download", url, lambda: _download_one(url, target), encode, decode
+            )
+    except Exception as exc:
+        duration_s = round(time.perf_counter() - started, 3)
+        emit("download", file=target.name, status="failed", duration_s=duration_s, error=str(exc))
+        raise
+    emit(
+        "download",
+        file=target.name,
+        status="ok",
+        bytes=path.stat().st_size,
+        duration_s=round(time.perf_counter() - started, 3),
+    )
+    return path
+
+
+@backoff_retry(3, only_overload=True)
+def _download_one(url: str, target: Path) -> Path:
+    with get_limiter("download").slot():
         with httpx.stream("GET", url, timeout=60) as resp:
             resp.raise_for_status()
             with target.open("wb") as fh:
                 for chunk in resp.iter_bytes():
                     fh.write(chunk)
-        downloaded.append(target)
-    return downloaded
+    return target
 
 
 def _safe_filename(url: str) -> str:
@@ -294,9 +514,10 @@ def _prepare_ocr_inputs(project_id: str, attachments: list[Path], out_project_di
     out_project_dir.mkdir(parents=True, exist_ok=True)
     outputs: list[Path] = []
     for att in attachments:
-        imgs = prepare_images_for_ocr(att)
-        for page_no, img in imgs:
-            target = out_project_dir / f"{att.stem}_p{page_no}.jpg"
-            target.write_bytes(img.read_bytes())
-            outputs.append(target)
+        with span("attachment", file=att.name):
+            imgs = prepare_images_for_ocr(att)
+            for page_no, img in imgs:
+                target = out_project_dir / f"{att.stem}_p{page_no}.jpg"
+                target.write_bytes(img.read_bytes())
+                outputs.append(target)
     return outputs
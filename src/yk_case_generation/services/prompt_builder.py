@@ -0,0 +1,140 @@
+"""Assemble LLM requests for the case builder stages.
+
+Static content (stage prompt, JSON schema) goes once into the system message so every
+request of a stage shares an identical prefix that providers can cache; per-case data
+goes into a compact JSON user message.
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+_REPAIR_SYSTEM = "你是JSON结构修复助手。仅修复结构，不新增事实。只输出JSON。"
+
+
+@dataclass
+class PromptBundle:
+    stage: str
+    system: str
+    user: str
+    est_tokens: int
+    est_tokens_uncompacted: int
+
+
+def compact_json(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate: one token per CJK character, ~4 characters per token otherwise."""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def build_stage1_prompt(
+    prompt: str,
+    case_id: str,
+    candidate_facts: List[Dict[str, Any]],
+    target_sections: List[str] | None = None,
+) -> PromptBundle:
+    data: Dict[str, Any] = {"case_id": case_id}
+    if target_sections:
+        data["target_sections"] = target_sections
+    data["candidate_facts"] = candidate_facts
+    legacy_user = json.dumps({"instructions": prompt, **data}, ensure_ascii=False)
+    return _bundle("stage1", prompt, compact_json(data), prompt, legacy_user)
+
+
+def build_stage1_batch_prompt(
+    prompt: str,
+    batch_prompt: str,
+    cases: List[Dict[str, Any]],
+) -> PromptBundle:
+    """One stage-1 request for several projects; ``cases`` items hold case_id + candidate_facts."""
+    legacy = sum(
+        build_stage1_prompt(prompt, c["case_id"], c["candidate_facts"]).est_tokens_uncompacted
+        for c in cases
+    )
+    return _batch_bundle("stage1", f"{prompt.rstrip()}\n\n{batch_prompt}", cases, legacy)
+
+
+def build_stage2_batch_prompt(
+    prompt: str,
+    batch_prompt: str,
+    schema: Dict[str, Any],
+    cases: List[Dict[str, Any]],
+) -> PromptBundle:
+    """One stage-2 request for several projects; ``cases`` items are stage-2 inputs with case_id."""
+    legacy = sum(
+        build_stage2_prompt(
+            prompt,
+            schema,
+            case_id=c["case_id"],
+            source_summary=c["source_summary"],
+            selected_facts=c["selected_facts"],
+            quality=c["quality"],
+        ).est_tokens_uncompacted
+        for c in cases
+    )
+    system = f"{_with_schema(prompt, schema)}\n\n{batch_prompt}"
+    return _batch_bundle("stage2", system, cases, legacy)
+
+
+def build_stage2_prompt(
+    prompt: str,
+    schema: Dict[str, Any],
+    case_id: str,
+    source_summary: Dict[str, Any],
+    selected_facts: List[Dict[str, Any]],
+    quality: Dict[str, Any],
+) -> PromptBundle:
+    data = {
+        "case_id": case_id,
+        "source_summary": source_summary,
+        "selected_facts": selected_facts,
+        "quality": quality,
+    }
+    legacy_user = json.dumps({"instructions": prompt, "schema": schema, **data}, ensure_ascii=False)
+    system = _with_schema(prompt, schema)
+    return _bundle("stage2", system, compact_json(data), prompt, legacy_user)
+
+
+def build_repair_prompt(schema: Dict[str, Any], case: Any, err: str) -> PromptBundle:
+    data = {"validation_error": err, "current_case_json": case}
+    legacy_user = json.dumps({"schema": schema, **data}, ensure_ascii=False)
+    system = _with_schema(_REPAIR_SYSTEM, schema)
+    return _bundle("repair", system, compact_json(data), _REPAIR_SYSTEM, legacy_user)
+
+
+def _with_schema(prompt: str, schema: Dict[str, Any]) -> str:
+    return f"{prompt.rstrip()}\n\nJSON Schema：\n{compact_json(schema)}"
+
+
+def _bundle(
+    stage: str, system: str, user: str, legacy_system: str, legacy_user: str
+) -> PromptBundle:
+    return PromptBundle(
+        stage=stage,
+        system=system,
+        user=user,
+        est_tokens=estimate_tokens(system) + estimate_tokens(user),
+        est_tokens_uncompacted=estimate_tokens(legacy_system) + estimate_tokens(legacy_user),
+    )
+
+
+def _batch_bundle(
+    stage: str, system: str, cases: List[Dict[str, Any]], legacy_tokens: int
+) -> PromptBundle:
+    user = compact_json({"cases": cases})
+    return PromptBundle(
+        stage=stage,
+        system=system,
+        user=user,
+        est_tokens=estimate_tokens(system) + estimate_tokens(user),
+        est_tokens_uncompacted=legacy_tokens,
+    )
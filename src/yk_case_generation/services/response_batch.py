@@ -0,0 +1,176 @@
+"""Rebuild frontend responses for every ``*_case.json`` under a run tree.
+
+Cases are converted in a process pool. A manifest in the tree root records each case's
+sha256 and the builder fingerprint (hash of ``case_response_builder``, the response layout
+and its schema); cases whose hash and fingerprint are unchanged and whose output still exists are
+skipped, so a rerun after a builder change only pays for what changed.
+``compare_layouts`` measures the saved size of the v1 and v2 layouts over a tree.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+MANIFEST_NAME = ".build_response_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def builder_fingerprint(layout: str = "v1") -> str:
+    """Changes whenever the response builder code, layout or schema changes."""
+    from yk_case_generation.services import case_response_builder
+
+    digest = hashlib.sha256(layout.encode())
+    digest.update(Path(case_response_builder.__file__).read_bytes())
+    digest.update(case_response_builder.response_schema_path(layout).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def response_path(case_path: Path) -> Path:
+    """Pipeline layout: ``<run>/cases/X_case.json`` -> ``<run>/frontend/X_frontend.json``."""
+    name = case_path.name.replace("_case.json", "_frontend.json")
+    if case_path.parent.name == "cases":
+        return case_path.parent.parent / "frontend" / name
+    return case_path.with_name(name)
+
+
+def build_responses(
+    root: Path, workers: int | None = None, force: bool = False, layout: str = "v1"
+) -> Dict[str, Any]:
+    """Build the response of every changed case under ``root``; returns counts and throughput."""
+    started = time.perf_counter()
+    manifest_path = root / MANIFEST_NAME
+    manifest = _load_manifest(manifest_path)
+    fingerprint = builder_fingerprint(layout)
+    previous_entries: Dict[str, Dict[str, str]] = manifest["entries"]
+    # cases no longer in the tree drop out of the manifest
+    entries: Dict[str, Dict[str, str]] = {}
+    pending: List[Tuple[str, str, str, str]] = []
+    counts = {"total": 0, "built": 0, "skipped": 0, "failed": 0}
+    errors: Dict[str, str] = {}
+    for case_path in sorted(root.rglob("*_case.json")):
+        counts["total"] += 1
+        key = case_path.relative_to(root).as_posix()
+        target = response_path(case_path)
+        try:
+            digest = hashlib.sha256(case_path.read_bytes()).hexdigest()
+        except OSError as exc:
+            counts["failed"] += 1
+            errors[key] = str(exc)
+            continue
+        previous = previous_entries.get(key) or {}
+        if (
+            not force
+            and previous.get("case_sha256") == digest
+            and previous.get("builder") == fingerprint
+            and target.exists()
+        ):
+            counts["skipped"] += 1
+            entries[key] = previous
+            continue
+        pending.append((key, str(case_path), str(target), layout))
+        entries[key] = {"case_sha256": digest, "builder": ""}
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    if pending:
+        if workers == 1 or len(pending) == 1:
+            outcomes = list(map(_build_one, pending))
+        else:
+            # spawn: the parent may run threads (metrics flush), which fork does not survive
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(pending)),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as pool:
+                chunk = max(1, len(pending) // (workers * 8))
+                outcomes = list(pool.map(_build_one, pending, chunksize=chunk))
+        for key, error in outcomes:
+            if error is None:
+                counts["built"] += 1
+                entries[key]["builder"] = fingerprint
+            else:
+                counts["failed"] += 1
+                errors[key] = error
+                entries.pop(key, None)
+    if entries != previous_entries:
+        _save_manifest(manifest_path, {"version": MANIFEST_VERSION, "entries": entries})
+
+    elapsed = time.perf_counter() - started
+    return {
+        **counts,
+        "workers": workers,
+        "builder": fingerprint,
+        "elapsed_s": round(elapsed, 3),
+        "built_per_s": round(counts["built"] / elapsed, 1) if elapsed > 0 else None,
+        "errors": errors,
+    }
+
+
+def compare_layouts(root: Path, limit: int | None = None) -> Dict[str, Any]:
+    """Total bytes of every case's response in each layout, as saved (indented UTF-8)."""
+    from yk_case_generation.services.case_response_builder import (
+        RESPONSE_LAYOUTS,
+        build_case_response,
+    )
+
+    totals = {layout: 0 for layout in RESPONSE_LAYOUTS}
+    cases = skipped = 0
+    for case_path in sorted(root.rglob("*_case.json")):
+        if limit is not None and cases >= limit:
+            break
+        try:
+            case = json.loads(case_path.read_text(encoding="utf-8"))
+            sizes = {
+                layout: len(
+                    json.dumps(
+                        build_case_response(case, layout=layout), ensure_ascii=False, indent=2
+                    ).encode("utf-8")
+                )
+                for layout in RESPONSE_LAYOUTS
+            }
+        except Exception:  # noqa: BLE001 - invalid cases are counted, not fatal
+            skipped += 1
+            continue
+        cases += 1
+        for layout, size in sizes.items():
+            totals[layout] += size
+    return {
+        "cases": cases,
+        "skipped": skipped,
+        "bytes": totals,
+        "v2_vs_v1": round(totals["v2"] / totals["v1"], 3) if totals["v1"] else None,
+    }
+
+
+def _build_one(job: Tuple[str, str, str, str]) -> Tuple[str, str | None]:
+    key, case_path, target, layout = job
+    from yk_case_generation.services.case_response_builder import build_case_response
+    from yk_case_generation.services.storage import save_json
+
+    try:
+        case = json.loads(Path(case_path).read_text(encoding="utf-8"))
+        save_json(build_case_response(case, layout=layout), Path(target))
+    except Exception as exc:  # noqa: BLE001 - one bad case must not stop the batch
+        detail = str(exc).splitlines()[0] if str(exc) else ""
+        return key, f"{type(exc).__name__}: {detail}"
+    return key, None
+
+
+def _load_manifest(path: Path) -> Dict[str, Any]:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        manifest = {"version": MANIFEST_VERSION, "entries": {}}
+    return manifest
+
+
+def _save_manifest(path: Path, manifest: Dict[str, Any]) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
@@ -0,0 +1,253 @@
+"""SQLite catalog of pipeline runs for fast filtering across many run dirs.
+
+Each finished run is upserted (keyed by run dir) with its status, timing, stats, steps and
+artifact paths; ``backfill`` indexes existing ``run_meta.json`` files, skipping unchanged
+ones. ``query_runs`` filters on indexed columns, so it stays fast at 100k+ runs.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+CATALOG_NAME = "run_catalog.sqlite"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_dir TEXT PRIMARY KEY,
+    project_number TEXT NOT NULL,
+    status TEXT,
+    started_at TEXT,
+    ended_at TEXT,
+    duration_s REAL,
+    error TEXT,
+    attachments_total INTEGER,
+    attachments_downloaded INTEGER,
+    ocr_images_total INTEGER,
+    ocr_json_total INTEGER,
+    llm_calls INTEGER,
+    llm_prompt_tokens INTEGER,
+    llm_completion_tokens INTEGER,
+    meta_mtime REAL,
+    indexed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_status_started ON runs (status, started_at);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS runs_project ON runs (project_number);
+CREATE INDEX IF NOT EXISTS runs_duration ON runs (duration_s);
+CREATE TABLE IF NOT EXISTS steps (
+    run_dir TEXT NOT NULL REFERENCES runs (run_dir) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT,
+    started_at TEXT,
+    duration_s REAL,
+    error TEXT,
+    PRIMARY KEY (run_dir, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS steps_name_status ON steps (name, status, run_dir);
+CREATE INDEX IF NOT EXISTS steps_name_duration ON steps (name, duration_s, run_dir);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_dir TEXT NOT NULL REFERENCES runs (run_dir) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    path TEXT,
+    PRIMARY KEY (run_dir, name)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class RunQuery:
+    status: List[str] = field(default_factory=list)
+    failed_step: str | None = None  # runs where this step failed
+    slow_step: str | None = None  # with min_step_s: runs where this step took that long
+    min_step_s: float | None = None
+    min_duration_s: float | None = None
+    max_duration_s: float | None = None
+    since: str | None = None  # ISO date/time, compared with started_at (UTC)
+    until: str | None = None
+    project: str | None = None  # exact number, or a pattern with % wildcards
+    limit: int = 100
+    order: str = "started_at"  # started_at | duration_s
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(_SCHEMA)
+    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    return conn
+
+
+def upsert_run(
+    conn: sqlite3.Connection, meta: Dict[str, Any], run_dir: Path, meta_mtime: float | None = None
+) -> None:
+    key = str(run_dir.resolve())
+    stats = meta.get("stats") or {}
+    totals = ((meta.get("llm") or {}).get("usage") or {}).get("totals") or {}
+    conn.execute("DELETE FROM runs WHERE run_dir = ?", (key,))
+    conn.execute(
+        "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            key,
+            meta.get("project_number") or run_dir.name,
+            meta.get("status"),
+            _utc(meta.get("started_at")),
+            _utc(meta.get("ended_at")),
+            _duration_s(meta.get("started_at"), meta.get("ended_at")),
+            meta.get("error"),
+            stats.get("attachments_total"),
+            stats.get("attachments_downloaded"),
+            stats.get("ocr_images_total"),
+            stats.get("ocr_json_total"),
+            (meta.get("llm") or {}).get("total_calls"),
+            totals.get("prompt_tokens"),
+            totals.get("completion_tokens"),
+            meta_mtime,
+            datetime.now(timezone.utc).isoformat(),
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                key,
+                seq,
+                step.get("name"),
+                step.get("status"),
+                _utc(step.get("started_at")),
+                step.get("duration_s"),
+                step.get("error"),
+            )
+            for seq, step in enumerate(meta.get("steps", []))
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO artifacts VALUES (?, ?, ?)",
+        [(key, name, str(path)) for name, path in (meta.get("artifacts") or {}).items()],
+    )
+
+
+def record_run(catalog: Path, meta: Dict[str, Any], run_dir: Path) -> None:
+    """Upsert one finished run in its own transaction."""
+    with closing(connect(catalog)) as conn, conn:
+        upsert_run(conn, meta, run_dir, _mtime(run_dir / "run_meta.json"))
+
+
+def backfill(catalog: Path, roots: Iterable[Path], force: bool = False) -> Dict[str, int]:
+    """Index every ``run_meta.json`` under ``roots``; unchanged files are skipped."""
+    counts = {"indexed": 0, "unchanged": 0, "unreadable": 0}
+    with closing(connect(catalog)) as conn:
+        known = {
+            row["run_dir"]: row["meta_mtime"]
+            for row in conn.execute("SELECT run_dir, meta_mtime FROM runs")
+        }
+        with conn:
+            for root in roots:
+                for meta_path in root.rglob("run_meta.json"):
+                    run_dir = meta_path.parent
+                    mtime = _mtime(meta_path)
+                    if not force and known.get(str(run_dir.resolve())) == mtime:
+                        counts["unchanged"] += 1
+                        continue
+                    try:
+                        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                    except (OSError, ValueError):
+                        counts["unreadable"] += 1
+                        continue
+                    upsert_run(conn, meta, run_dir, mtime)
+                    counts["indexed"] += 1
+    return counts
+
+
+def query_runs(catalog: Path, query: RunQuery) -> List[Dict[str, Any]]:
+    where: List[str] = []
+    params: List[Any] = []
+    if query.status:
+        where.append(f"r.status IN ({','.join('?' * len(query.status))})")
+        params += query.status
+    if query.failed_step:
+        where.append(
+            "r.run_dir IN (SELECT run_dir FROM steps WHERE name = ? AND status = 'failed')"
+        )
+        params.append(query.failed_step)
+    if query.slow_step and query.min_step_s is not None:
+        where.append("r.run_dir IN (SELECT run_dir FROM steps WHERE name = ? AND duration_s >= ?)")
+        params += [query.slow_step, query.min_step_s]
+    if query.min_duration_s is not None:
+        where.append("r.duration_s >= ?")
+        params.append(query.min_duration_s)
+    if query.max_duration_s is not None:
+        where.append("r.duration_s <= ?")
+        params.append(query.max_duration_s)
+    if query.since:
+        where.append("r.started_at >= ?")
+        params.append(_utc(query.since))
+    if query.until:
+        where.append("r.started_at < ?")
+        params.append(_utc(query.until))
+    if query.project and "%" in query.project:
+        # GLOB (case-sensitive) can use the project index for prefix patterns; LIKE cannot
+        where.append("r.project_number GLOB ?")
+        params.append(query.project.replace("*", "[*]").replace("?", "[?]").replace("%", "*"))
+    elif query.project:
+        where.append("r.project_number = ?")
+        params.append(query.project)
+    order = "r.duration_s DESC" if query.order == "duration_s" else "r.started_at DESC"
+    sql = (
+        "SELECT r.project_number, r.status, r.started_at, r.duration_s, r.error, r.run_dir,"
+        " r.ocr_images_total,"
+        " (SELECT group_concat(name, ',') FROM steps s"
+        "  WHERE s.run_dir = r.run_dir AND s.status = 'failed') AS failed_steps"
+        " FROM runs r"
+        + (" WHERE " + " AND ".join(where) if where else "")
+        + f" ORDER BY {order} LIMIT ?"
+    )
+    params.append(max(1, query.limit))
+    if not catalog.exists():
+        return []
+    with closing(connect(catalog)) as conn:
+        return [dict(row) for row in conn.execute(sql, params)]
+
+
+def default_catalog(output_root: Path, configured: str | None = None) -> Path:
+    return Path(configured).expanduser() if configured else output_root / CATALOG_NAME
+
+
+def _utc(value: str | None) -> str | None:
+    """Normalise an ISO timestamp or date to UTC ``YYYY-MM-DDTHH:MM:SS.ffffff+00:00``."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _duration_s(started: str | None, ended: str | None) -> float | None:
+    if not started or not ended:
+        return None
+    try:
+        return round(
+            (datetime.fromisoformat(ended) - datetime.fromisoformat(started)).total_seconds(), 3
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def _mtime(path: Path) -> float | None:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
@@ -0,0 +1,398 @@
+"""Columnar export of run trees for analytics: one row per fact and one row per run.
+
+Each run dir (found by its ``run_meta.json``) contributes rows to two datasets under the
+export dir, ``facts/`` and ``runs/``, Hive-partitioned by run start date
+(``started_date=YYYY-MM-DD/part-*.parquet|jsonl``). Fact rows come from the case facts,
+joined with the frontend response (confidence level, response status) and the run's stats.
+Parquet needs pyarrow; without it the export falls back to JSONL.
+
+Runs are streamed one at a time and written in parts of at most ``rows_per_file`` rows.
+``_export_state.json`` remembers each exported run's file fingerprint and partition: new
+runs are appended as new parts, and a changed run makes its partitions be rewritten from
+the source run dirs, so the datasets never hold two versions of a run. Rows of runs that
+are not under the current roots (exported earlier from other roots, or since deleted) are
+carried over into the rewritten partition.
+
+Parts are written to a staging dir and moved into the datasets only after the state that
+lists them is saved; an export interrupted during the move is completed by the next one,
+and one interrupted before it leaves the datasets and state untouched.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+STATE_NAME = "_export_state.json"
+_STAGING_PREFIX = ".staging-"
+STATE_VERSION = 1
+EXPORT_FORMATS = ("parquet", "jsonl")
+PARTITION_KEY = "started_date"
+DEFAULT_ROWS_PER_FILE = 100_000
+
+_SECTIONS = (
+    "patient_info",
+    "chief_complaint",
+    "medical_history",
+    "family_history",
+    "diagnosis",
+    "tests_and_exams",
+)
+_RUN_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("project_number", "string"),
+    ("run_dir", "string"),
+    ("run_status", "string"),
+    ("started_at", "string"),
+    ("duration_s", "float64"),
+    ("attachments_total", "int64"),
+    ("ocr_images_total", "int64"),
+    ("llm_calls", "int64"),
+    ("llm_prompt_tokens", "int64"),
+    ("llm_completion_tokens", "int64"),
+    ("response_status", "string"),
+)
+COLUMNS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "facts": _RUN_COLUMNS
+    + (
+        ("section", "string"),
+        ("fact_index", "int64"),
+        ("text", "string"),
+        ("polarity", "string"),
+        ("confidence_level", "string"),
+        ("evidence_count", "int64"),
+        ("evidence_source_id", "string"),  # first evidence entry
+        ("evidence_source_type", "string"),  # e.g. lims_text, ocr_image
+        ("evidence_sources", "string"),  # distinct source ids, comma-separated
+    ),
+    "runs": _RUN_COLUMNS
+    + (
+        ("ended_at", "string"),
+        ("error", "string"),
+        ("failed_steps", "string"),
+        ("facts_total", "int64"),
+    ),
+}
+
+
+def default_format() -> str:
+    return "parquet" if importlib.util.find_spec("pyarrow") is not None else "jsonl"
+
+
+def export_runs(
+    roots: Iterable[Path],
+    out_dir: Path,
+    fmt: str | None = None,
+    force: bool = False,
+    rows_per_file: int = DEFAULT_ROWS_PER_FILE,
+) -> Dict[str, Any]:
+    """Export new and changed runs under ``roots``; returns run and row counts."""
+    fmt = fmt or default_format()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {EXPORT_FORMATS}")
+    if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise RuntimeError("parquet export needs pyarrow (extra: yk-case-generation[parquet])")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    state_path = out_dir / STATE_NAME
+    state = _load_state(state_path)
+    if state.get("pending"):
+        _commit_staged(out_dir, state.pop("pending"))
+        _save_state(state_path, state)
+    for stale in out_dir.glob(f"{_STAGING_PREFIX}*"):
+        shutil.rmtree(stale, ignore_errors=True)
+    if force or state.get("format") != fmt:
+        for dataset in COLUMNS:
+            shutil.rmtree(out_dir / dataset, ignore_errors=True)
+        state = {"version": STATE_VERSION, "format": fmt, "runs": {}}
+    known: Dict[str, Dict[str, str]] = state["runs"]
+
+    found: Dict[str, Tuple[Path, str]] = {}
+    for root in roots:
+        for meta_path in sorted(root.rglob("run_meta.json")):
+            run_dir = meta_path.parent
+            found[str(run_dir.resolve())] = (run_dir, _fingerprint(run_dir))
+    changed = {
+        key for key, (_, fp) in found.items() if key in known and known[key]["fingerprint"] != fp
+    }
+    rewrite = {known[key]["partition"] for key in changed}
+    pending = [
+        key
+        for key in sorted(found)
+        if key not in known or key in changed or known[key]["partition"] in rewrite
+    ]
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    staging = out_dir / f"{_STAGING_PREFIX}{stamp}"
+    writer = _PartWriter(staging, fmt, stamp, max(1, rows_per_file))
+    counts = {
+        "runs_found": len(found),
+        "runs_exported": 0,
+        "runs_carried_over": 0,
+        "unreadable": 0,
+    }
+    for partition in sorted(rewrite):
+        carried = {
+            v.get("run_dir", k): k
+            for k, v in known.items()
+            if v["partition"] == partition and k not in found
+        }
+        if not carried:
+            continue
+        counts["runs_carried_over"] += len(carried)
+        for dataset in COLUMNS:
+            for row in _partition_rows(out_dir, dataset, partition):
+                if row.get("run_dir") in carried:
+                    writer.add(dataset, partition, [row])
+    for key in pending:
+        run_dir, fp = found[key]
+        try:
+            run_row, fact_rows = run_rows(run_dir)
+        except (OSError, ValueError):
+            counts["unreadable"] += 1
+            known.pop(key, None)
+            continue
+        partition = _partition(run_row["started_at"])
+        writer.add("runs", partition, [run_row])
+        writer.add("facts", partition, fact_rows)
+        known[key] = {"fingerprint": fp, "partition": partition, "run_dir": str(run_dir)}
+        counts["runs_exported"] += 1
+    writer.close()
+    # the state names the staged parts before any is moved, so a crash mid-move is redone
+    state["pending"] = {"staging": staging.name, "stamp": stamp, "rewrite": sorted(rewrite)}
+    _save_state(state_path, state)
+    _commit_staged(out_dir, state.pop("pending"))
+    _save_state(state_path, state)
+    return {
+        **counts,
+        "runs_unchanged": len(found) - len(pending),
+        "partitions_rewritten": len(rewrite),
+        "rows": dict(writer.rows),
+        "files": writer.files,
+        "format": fmt,
+    }
+
+
+def run_rows(run_dir: Path) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """The run row and the fact rows of one run dir."""
+    meta = json.loads((run_dir / "run_meta.json").read_text(encoding="utf-8"))
+    case = _read_optional(next(iter(sorted(run_dir.glob("cases/*_case.json"))), None)) or {}
+    frontend = _read_optional(next(iter(sorted(run_dir.glob("frontend/*_frontend.json"))), None))
+    stats = meta.get("stats") or {}
+    llm = meta.get("llm") or {}
+    totals = (llm.get("usage") or {}).get("totals") or {}
+    base = {
+        "project_number": meta.get("project_number") or run_dir.name,
+        "run_dir": str(run_dir),
+        "run_status": meta.get("status"),
+        "started_at": meta.get("started_at"),
+        "duration_s": _duration_s(meta.get("started_at"), meta.get("ended_at")),
+        "attachments_total": stats.get("attachments_total"),
+        "ocr_images_total": stats.get("ocr_images_total"),
+        "llm_calls": llm.get("total_calls"),
+        "llm_prompt_tokens": totals.get("prompt_tokens"),
+        "llm_completion_tokens": totals.get("completion_tokens"),
+        "response_status": (frontend or {}).get("status"),
+    }
+    confidence = _confidence_by_text(frontend or {})
+    facts: List[Dict[str, Any]] = []
+    for section in _SECTIONS:
+        for idx, fact in enumerate(case.get(section) or []):
+            text = str(fact.get("text", "")).strip()
+            evidence = fact.get("evidence") or []
+            source_ids = [str(ev.get("source_id", "")) for ev in evidence]
+            facts.append(
+                {
+                    **base,
+                    "section": section,
+                    "fact_index": idx,
+                    "text": text,
+                    "polarity": fact.get("polarity"),
+                    "confidence_level": confidence.get((section, text)),
+                    "evidence_count": len(evidence),
+                    "evidence_source_id": source_ids[0] if source_ids else None,
+                    "evidence_source_type": _source_type(source_ids[0]) if source_ids else None,
+                    "evidence_sources": ",".join(dict.fromkeys(source_ids)) or None,
+                }
+            )
+    run = {
+        **base,
+        "ended_at": meta.get("ended_at"),
+        "error": meta.get("error"),
+        "failed_steps": ",".join(
+            s.get("name", "?") for s in meta.get("steps", []) if s.get("status") == "failed"
+        )
+        or None,
+        "facts_total": len(facts),
+    }
+    return run, facts
+
+
+class _PartWriter:
+    """Buffers rows per (dataset, partition) and writes them as numbered part files."""
+
+    def __init__(self, out_dir: Path, fmt: str, stamp: str, rows_per_file: int):
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.stamp = stamp
+        self.rows_per_file = rows_per_file
+        self.rows: Dict[str, int] = {dataset: 0 for dataset in COLUMNS}
+        self.files = 0
+        self._buffers: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+
+    def add(self, dataset: str, partition: str, rows: List[Dict[str, Any]]) -> None:
+        buffer = self._buffers.setdefault((dataset, partition), [])
+        buffer.extend(rows)
+        if len(buffer) >= self.rows_per_file:
+            self._flush(dataset, partition)
+
+    def close(self) -> None:
+        for dataset, partition in list(self._buffers):
+            self._flush(dataset, partition)
+
+    def _flush(self, dataset: str, partition: str) -> None:
+        rows = self._buffers.pop((dataset, partition), [])
+        if not rows:
+            return
+        target_dir = self.out_dir / dataset / f"{PARTITION_KEY}={partition}"
+        target_dir.mkdir(parents=True, exist_ok=True)
+        target = target_dir / f"part-{self.stamp}-{self.files:05d}.{self.fmt}"
+        # write-then-rename so readers never pick up a half-written part
+        tmp = target.with_name(f".{target.name}.tmp")
+        if self.fmt == "parquet":
+            _write_parquet(rows, COLUMNS[dataset], tmp)
+        else:
+            with tmp.open("w", encoding="utf-8") as fh:
+                for row in rows:
+                    fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+        os.replace(tmp, target)
+        self.rows[dataset] += len(rows)
+        self.files += 1
+
+
+def _write_parquet(rows: List[Dict[str, Any]], columns: Tuple[Tuple[str, str], ...], path: Path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"string": pa.string(), "int64": pa.int64(), "float64": pa.float64()}
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    table = pa.Table.from_pylist(rows, schema=schema)
+    pq.write_table(table, path, compression="zstd")
+
+
+def iter_rows(out_dir: Path, dataset: str) -> Iterator[Dict[str, Any]]:
+    """Read back an exported dataset row by row (JSONL or Parquet parts)."""
+    for part in sorted((out_dir / dataset).glob(f"{PARTITION_KEY}=*/part-*")):
+        yield from _part_rows(part)
+
+
+def _partition_rows(out_dir: Path, dataset: str, partition: str) -> Iterator[Dict[str, Any]]:
+    for part in sorted((out_dir / dataset / f"{PARTITION_KEY}={partition}").glob("part-*")):
+        yield from _part_rows(part)
+
+
+def _part_rows(part: Path) -> Iterator[Dict[str, Any]]:
+    if part.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        yield from pq.read_table(part).to_pylist()
+    else:
+        with part.open(encoding="utf-8") as fh:
+            for line in fh:
+                yield json.loads(line)
+
+
+def _commit_staged(out_dir: Path, pending: Dict[str, Any]) -> None:
+    """Replace the rewritten partitions' parts and move the staged ones in (idempotent)."""
+    staging = out_dir / pending["staging"]
+    current = f"part-{pending['stamp']}-"
+    for partition in pending["rewrite"]:
+        for dataset in COLUMNS:
+            for part in (out_dir / dataset / f"{PARTITION_KEY}={partition}").glob("part-*"):
+                if not part.name.startswith(current):
+                    part.unlink()
+    for part in sorted(staging.glob(f"*/{PARTITION_KEY}=*/part-*")):
+        target = out_dir / part.relative_to(staging)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(part, target)
+    for partition in pending["rewrite"]:
+        for dataset in COLUMNS:
+            try:
+                (out_dir / dataset / f"{PARTITION_KEY}={partition}").rmdir()
+            except OSError:  # not empty (or already gone)
+                pass
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def _confidence_by_text(frontend: Dict[str, Any]) -> Dict[Tuple[str, str], str]:
+    return {
+        (section, str(fact.get("text", "")).strip()): fact.get("confidence_level")
+        for section, facts in (frontend.get("sections") or {}).items()
+        for fact in facts or []
+    }
+
+
+def _source_type(source_id: str) -> str:
+    # source ids are "<type>_<n>", e.g. lims_text_1
+    head, _, tail = source_id.rpartition("_")
+    return head if head and tail.isdigit() else source_id
+
+
+def _partition(started_at: str | None) -> str:
+    try:
+        return datetime.fromisoformat(started_at or "").date().isoformat()
+    except ValueError:
+        return "unknown"
+
+
+def _duration_s(started: str | None, ended: str | None) -> float | None:
+    if not started or not ended:
+        return None
+    try:
+        return round(
+            (datetime.fromisoformat(ended) - datetime.fromisoformat(started)).total_seconds(), 3
+        )
+    except (TypeError, ValueError):  # unparsable, or naive vs aware timestamps
+        return None
+
+
+def _fingerprint(run_dir: Path) -> str:
+    """mtime and size of the run's exported artifacts."""
+    paths = [run_dir / "run_meta.json"]
+    paths += sorted(run_dir.glob("cases/*_case.json"))
+    paths += sorted(run_dir.glob("frontend/*_frontend.json"))
+    parts = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        parts.append(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}")
+    return "|".join(parts)
+
+
+def _read_optional(path: Path | None) -> Dict[str, Any] | None:
+    if path is None:
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _load_state(path: Path) -> Dict[str, Any]:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        state = {}
+    if state.get("version") != STATE_VERSION:
+        state = {"version": STATE_VERSION, "format": None, "runs": {}}
+    return state
+
+
+def _save_state(path: Path, state: Dict[str, Any]) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
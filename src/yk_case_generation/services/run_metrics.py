@@ -0,0 +1,206 @@
+"""Process-wide run counters and histograms, written as a node-exporter textfile.
+
+Metrics are derived from run events (``events.emit`` calls ``observe``), so call sites only
+emit events. ``MetricsTextfile`` rewrites the file atomically every ``interval_s`` seconds
+and once more on exit, so a textfile collector can scrape long batch runs while they run.
+Rates such as OCR QPS come from ``rate()`` over the counters.
+"""
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[_Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_label_text(key)} {_number(v)}" for key, v in items]
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, +Inf count, sum)
+        self._values: Dict[_Labels, Tuple[List[int], int, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts, total, sum_ = self._values.get(key) or ([0] * len(self.buckets), 0, 0.0)
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+            self._values[key] = (counts, total + 1, sum_ + value)
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            entry = self._values.get(_label_key(labels))
+        return entry[1] if entry else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(c), t, s)) for key, (c, t, s) in self._values.items())
+        for key, (counts, total, sum_) in items:
+            for bound, count in zip(self.buckets, counts):
+                bucket_key = key + (("le", _number(bound)),)
+                lines.append(f"{self.name}_bucket{_label_text(bucket_key)} {count}")
+            lines.append(f"{self.name}_bucket{_label_text(key + (('le', '+Inf'),))} {total}")
+            lines.append(f"{self.name}_count{_label_text(key)} {total}")
+            lines.append(f"{self.name}_sum{_label_text(key)} {_number(sum_)}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+PROJECTS = Counter("ykcg_projects_total", "Finished projects by status.")
+STEPS = Counter("ykcg_steps_total", "Finished pipeline steps by step and status.")
+STEP_SECONDS = Histogram("ykcg_step_duration_seconds", "Pipeline step wall time.")
+OCR_REQUESTS = Counter("ykcg_ocr_requests_total", "OCR requests by status.")
+OCR_SECONDS = Histogram("ykcg_ocr_request_duration_seconds", "OCR request wall time.")
+LLM_CALLS = Counter("ykcg_llm_calls_total", "LLM calls by stage and status.")
+LLM_SECONDS = Histogram("ykcg_llm_call_duration_seconds", "LLM call wall time by stage.")
+LLM_CACHE = Counter("ykcg_llm_cache_lookups_total", "LLM response cache lookups by result.")
+DOWNLOADS = Counter("ykcg_downloads_total", "Attachment downloads by status.")
+DOWNLOAD_BYTES = Counter("ykcg_download_bytes_total", "Bytes of downloaded attachments.")
+REGISTRY = (
+    PROJECTS,
+    STEPS,
+    STEP_SECONDS,
+    OCR_REQUESTS,
+    OCR_SECONDS,
+    LLM_CALLS,
+    LLM_SECONDS,
+    LLM_CACHE,
+    DOWNLOADS,
+    DOWNLOAD_BYTES,
+)
+
+
+def observe(event: str, fields: Dict[str, Any]) -> None:
+    """Update the metrics an event contributes to; unknown events are ignored."""
+    status = fields.get("status", "ok")
+    duration = fields.get("duration_s")
+    if event == "project_end":
+        PROJECTS.inc(status=status)
+    elif event == "step_end":
+        STEPS.inc(step=fields.get("step"), status=status)
+        if duration is not None:
+            STEP_SECONDS.observe(duration, step=fields.get("step"))
+    elif event == "ocr_request":
+        OCR_REQUESTS.inc(status=status)
+        if duration is not None:
+            OCR_SECONDS.observe(duration)
+    elif event == "llm_call":
+        LLM_CALLS.inc(stage=fields.get("stage"), status=status)
+        if fields.get("cache"):
+            LLM_CACHE.inc(result=fields["cache"])
+        if duration is not None and fields.get("cache") != "hit":
+            LLM_SECONDS.observe(duration, stage=fields.get("stage"))
+    elif event == "download":
+        DOWNLOADS.inc(status=status)
+        DOWNLOAD_BYTES.inc(fields.get("bytes") or 0)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines.append(f"ykcg_metrics_flush_timestamp_seconds {_number(round(time.time(), 3))}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: Path) -> None:
+    # write-then-rename so a scrape never sees a half-written file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(render(), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def reset() -> None:
+    for metric in REGISTRY:
+        metric.reset()
+
+
+class MetricsTextfile:
+    """Context manager that flushes the metrics to ``path`` periodically and on exit."""
+
+    def __init__(self, path: Path, interval_s: float = 15.0):
+        self.path = path
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "MetricsTextfile":
+        write_textfile(self.path)
+        self._thread = threading.Thread(target=self._loop, name="ykcg-metrics", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        write_textfile(self.path)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(max(0.1, self.interval_s)):
+            try:
+                write_textfile(self.path)
+            except OSError:
+                continue
+
+
+def _label_key(labels: Dict[str, Any]) -> _Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _label_text(key: _Labels) -> str:
+    if not key:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in key
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
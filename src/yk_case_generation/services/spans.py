@@ -0,0 +1,160 @@
+"""Lightweight nested spans for pipeline runs, with Chrome trace-event export.
+
+``with span("name", key=value):`` records monotonic wall time, CPU time of the calling
+thread (plus child processes waited for meanwhile, e.g. LibreOffice or poppler) and the
+RSS delta, nested under the enclosing span. Spans are collected only while a ``Trace`` is
+active (``with trace.activate():``); otherwise ``span`` is a no-op. Worker threads started
+with ``contextvars.copy_context()`` attach their spans to the submitting span.
+"""
+from __future__ import annotations
+
+import contextvars
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_STATM = Path("/proc/self/statm")
+
+_TRACE: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar("ykcg_trace", default=None)
+_PARENT: contextvars.ContextVar[int | None] = contextvars.ContextVar("ykcg_span", default=None)
+
+
+class Trace:
+    """Spans of one run; thread-safe."""
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._spans: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def activate(self) -> Iterator["Trace"]:
+        token = _TRACE.set(self)
+        parent = _PARENT.set(None)
+        try:
+            yield self
+        finally:
+            _PARENT.reset(parent)
+            _TRACE.reset(token)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._spans.append(record)
+
+    def next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def tree(self) -> List[Dict[str, Any]]:
+        """Finished spans as nested dicts (``children``), ordered by start time."""
+        with self._lock:
+            spans = [dict(s) for s in sorted(self._spans, key=lambda s: s["start_s"])]
+        by_id = {s["id"]: s for s in spans}
+        roots: List[Dict[str, Any]] = []
+        for s in spans:
+            parent = by_id.get(s.pop("parent"))
+            if parent is not None:
+                parent.setdefault("children", []).append(s)
+            else:
+                roots.append(s)
+        for s in spans:
+            del s["id"]
+        return roots
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[None]:
+    trace = _TRACE.get()
+    if trace is None:
+        yield
+        return
+    span_id = trace.next_id()
+    parent = _PARENT.get()
+    token = _PARENT.set(span_id)
+    rss_before = current_rss_mb()
+    children_before = _children_cpu_s()
+    cpu_before = time.thread_time()
+    started = time.perf_counter()
+    error: str | None = None
+    try:
+        yield
+    except BaseException as exc:
+        error = type(exc).__name__
+        raise
+    finally:
+        wall_s = time.perf_counter() - started
+        cpu_s = time.thread_time() - cpu_before
+        child_cpu_s = _children_cpu_s() - children_before
+        _PARENT.reset(token)
+        record: Dict[str, Any] = {
+            "id": span_id,
+            "parent": parent,
+            "name": name,
+            "start_s": round(started - trace.origin, 6),
+            "wall_s": round(wall_s, 6),
+            "cpu_s": round(cpu_s, 6),
+            "rss_delta_mb": round(current_rss_mb() - rss_before, 2),
+            "thread": threading.current_thread().name,
+        }
+        if child_cpu_s > 0:
+            record["child_cpu_s"] = round(child_cpu_s, 6)
+        if attrs:
+            record["attrs"] = attrs
+        if error:
+            record["error"] = error
+        trace.add(record)
+
+
+def to_chrome_trace(spans: List[Dict[str, Any]], process_name: str = "ykcg") -> Dict[str, Any]:
+    """Chrome trace-event JSON (complete "X" events) for a ``Trace.tree()`` result."""
+    threads: Dict[str, int] = {}
+    events: List[Dict[str, Any]] = [
+        {"ph": "M", "pid": 1, "tid": 0, "name": "process_name", "args": {"name": process_name}}
+    ]
+
+    def visit(node: Dict[str, Any]) -> None:
+        tid = threads.setdefault(node.get("thread", "main"), len(threads) + 1)
+        args = dict(node.get("attrs") or {})
+        for key in ("cpu_s", "child_cpu_s", "rss_delta_mb", "error"):
+            if key in node:
+                args[key] = node[key]
+        events.append(
+            {
+                "name": node["name"],
+                "cat": "pipeline",
+                "ph": "X",
+                "ts": round(node["start_s"] * 1e6, 1),
+                "dur": round(node["wall_s"] * 1e6, 1),
+                "pid": 1,
+                "tid": tid,
+                "args": args,
+            }
+        )
+        for child in node.get("children", []):
+            visit(child)
+
+    for root in spans:
+        visit(root)
+    for thread_name, tid in threads.items():
+        events.append(
+            {"ph": "M", "pid": 1, "tid": tid, "name": "thread_name", "args": {"name": thread_name}}
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def current_rss_mb() -> float:
+    try:
+        return int(_STATM.read_text().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def _children_cpu_s() -> float:
+    t = os.times()
+    return t.children_user + t.children_system
@@ -0,0 +1,146 @@
+"""Opt-in per-step cProfile / tracemalloc capture for pipeline runs.
+
+``StepProfiler`` is a ``probe_steps`` probe. For every step it writes into the run's
+``profile/`` directory:
+
+- ``NN_<step>.pstats`` (``cpu``): cProfile stats of the calling thread. Work done in
+  pool threads, such as concurrent downloads and OCR requests, is not included.
+- ``NN_<step>.tracemalloc`` (``mem``): a tracemalloc snapshot taken at the end of the
+  step.
+
+``index.json`` lists the steps, their files and the tracemalloc peak and net bytes.
+``summarize_profile`` turns a profile directory into the hottest functions and biggest
+allocations per step.
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import pstats
+import re
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+PROFILE_MODES = ("cpu", "mem")
+_INDEX = "index.json"
+_TRACE_FRAMES = 10
+
+
+def parse_profile_modes(value: str | None) -> tuple[str, ...]:
+    """``"cpu"``, ``"mem"`` or ``"cpu,mem"`` -> modes; ``None``/``""`` -> ()."""
+    modes = tuple(m.strip().lower() for m in (value or "").split(",") if m.strip())
+    unknown = [m for m in modes if m not in PROFILE_MODES]
+    if unknown:
+        raise ValueError(f"profile must be a comma list of {PROFILE_MODES}, got {value!r}")
+    return modes
+
+
+class StepProfiler:
+    def __init__(self, out_dir: Path, modes: tuple[str, ...]):
+        self.out_dir = out_dir
+        self.modes = modes
+        self._lock = threading.Lock()
+        self._steps: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def __call__(self, name: str) -> Iterator[None]:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            stem = f"{len(self._steps) + 1:02d}_{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}"
+            entry: Dict[str, Any] = {"step": name}
+            self._steps.append(entry)
+        started_tracing = False
+        before = None
+        if "mem" in self.modes:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(_TRACE_FRAMES)
+                started_tracing = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile() if "cpu" in self.modes else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            # read memory before dumping pstats so the dump's own allocations stay out
+            if before is not None:
+                current, peak = tracemalloc.get_traced_memory()
+                path = self.out_dir / f"{stem}.tracemalloc"
+                _filtered(tracemalloc.take_snapshot()).dump(str(path))
+                entry.update(
+                    {
+                        "tracemalloc": path.name,
+                        "peak_bytes": peak,
+                        "net_bytes": current - before,
+                    }
+                )
+                if started_tracing:
+                    tracemalloc.stop()
+            if profiler is not None:
+                path = self.out_dir / f"{stem}.pstats"
+                profiler.dump_stats(path)
+                entry["pstats"] = path.name
+            self._write_index()
+
+    def _write_index(self) -> None:
+        with self._lock:
+            payload = {"modes": list(self.modes), "steps": list(self._steps)}
+        (self.out_dir / _INDEX).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def summarize_profile(profile_dir: Path, top: int = 10) -> List[Dict[str, Any]]:
+    """Per step: hottest functions (by cumulative and own time) and biggest allocations."""
+    index = json.loads((profile_dir / _INDEX).read_text(encoding="utf-8"))
+    out: List[Dict[str, Any]] = []
+    for entry in index.get("steps", []):
+        row: Dict[str, Any] = {"step": entry["step"]}
+        if entry.get("pstats"):
+            row["cpu"] = _pstats_summary(profile_dir / entry["pstats"], top)
+        if entry.get("tracemalloc"):
+            snapshot = tracemalloc.Snapshot.load(str(profile_dir / entry["tracemalloc"]))
+            row["mem"] = {
+                "peak_bytes": entry.get("peak_bytes"),
+                "net_bytes": entry.get("net_bytes"),
+                "top_allocations": [
+                    {"where": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:top]
+                ],
+            }
+        out.append(row)
+    return out
+
+
+def _pstats_summary(path: Path, top: int) -> Dict[str, Any]:
+    stats = pstats.Stats(str(path))
+    rows = [
+        {
+            "function": f"{Path(filename).name}:{line}({func})",
+            "calls": nc,
+            "tottime_s": round(tt, 6),
+            "cumtime_s": round(ct, 6),
+        }
+        for (filename, line, func), (_, nc, tt, ct, _) in stats.stats.items()  # type: ignore[attr-defined]
+    ]
+    return {
+        "total_s": round(stats.total_tt, 6),  # type: ignore[attr-defined]
+        "by_cumulative": sorted(rows, key=lambda r: r["cumtime_s"], reverse=True)[:top],
+        "by_own_time": sorted(rows, key=lambda r: r["tottime_s"], reverse=True)[:top],
+    }
+
+
+def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    return snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        )
+    )
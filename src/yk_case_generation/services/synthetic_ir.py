@@ -0,0 +1,171 @@
+"""Deterministic synthetic ``DocumentIR`` generator for microbenchmarks and scaling tests.
+
+Produces LIMS text sources plus OCR attachment sources whose pages look like Tencent OCR
+output after ``ocr_normalizer``: positioned lines (bbox/polygon), confidences, checkbox
+lines (some split into symbol-only detections), vertical-text pages, repeated footers and
+a configurable mix of Chinese keyword categories. Flags are left as OCR produces them
+(only ``low_confidence``); ``ir_builder`` annotation runs on top.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List
+
+from yk_case_generation.models.document_ir import DocumentIR, Line, Page, Source
+
+_TEXTS: Dict[str, tuple[str, ...]] = {
+    "anchor": (
+        "临床诊断：{v}",
+        "主诉：{v}",
+        "现病史：{v}",
+        "家族史：{v}",
+        "检查结果：{v}",
+        "建议：{v}",
+        "送检原因：{v}",
+    ),
+    "clinical": (
+        "既往自然流产{n}次",
+        "否认家族遗传病史",
+        "IVF助孕{n}次失败，ICSI {n} 次",
+        "B超提示宫内早孕，未见胎心",
+        "染色体核型未见明显异常",
+        "胚胎停育{n}次，现孕{n}周",
+        "复发性流产",
+        "甲状腺功能检查阴性",
+        "AMH {n}.{n} ng/ml",
+    ),
+    "patient": ("姓名：某某{n}", "年龄：3{n}岁", "性别：女", "病历号：YK20240{n}{n}{n}"),
+    "noise": (
+        "检测项目：全外显子测序",
+        "样本类型：外周血",
+        "建库方式：探针捕获",
+        "测序深度 {n}00X",
+        "送检项目：CNV-seq 套餐",
+        "采样日期 2024-0{n}-1{n}",
+    ),
+    "form": (
+        "请在相应的□内打√",
+        "知情同意书 受检者确认",
+        "本知材料一式三联",
+        "医院地址：某市某路{n}号 电话：0{n}0-{n}{n}{n}{n}",
+    ),
+    "filler": (
+        "本报告仅对本次送检样本负责",
+        "第{n}页",
+        "以上结果仅供临床参考",
+        "报告日期：2024年{n}月{n}日",
+    ),
+    "english": ("The result should be interpreted together with clinical findings",),
+}
+_CHECKBOX_TEXTS = ("☑ 已婚", "□ 未婚", "☑ 有生育史", "□ 无", "☑ 自然流产", "□ 生化妊娠")
+_CHECKBOX_SYMBOLS = ("☑", "□", "√")
+_FOOTER = "版本号：V2.1 识别码：YK-FORM-01"
+DEFAULT_KEYWORD_MIX: Dict[str, float] = {
+    "anchor": 0.08,
+    "clinical": 0.30,
+    "patient": 0.07,
+    "noise": 0.15,
+    "form": 0.08,
+    "filler": 0.28,
+    "english": 0.04,
+}
+_ROW_HEIGHT = 34
+_COLUMN_X = (40, 430)
+
+
+@dataclass
+class IRSpec:
+    sources: int = 3  # OCR attachment sources
+    pages_per_source: int = 2
+    lines_per_page: int = 40
+    checkbox_density: float = 0.1  # share of lines that are checkbox options
+    symbol_only_ratio: float = 0.3  # share of checkbox lines OCR'd as a lone symbol
+    vertical_page_ratio: float = 0.1
+    low_confidence_ratio: float = 0.05
+    keyword_mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_KEYWORD_MIX))
+    lims_texts: int = 3
+    seed: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def generate_document_ir(spec: IRSpec, case_id: str = "SYN0001") -> DocumentIR:
+    rng = random.Random(spec.seed)
+    sources: List[Source] = []
+    for idx in range(1, spec.lims_texts + 1):
+        parts = [_text(rng, rng.choice(("clinical", "patient", "anchor"))) for _ in range(3)]
+        text = "；".join(parts)
+        sources.append(
+            Source(
+                source_id=f"lims_text_{idx}",
+                source_type="lims_text",
+                pages=[Page(page_number=None, lines=[Line(line_id=1, text=text, confidence=1.0)])],
+            )
+        )
+    categories = list(spec.keyword_mix)
+    weights = [max(0.0, spec.keyword_mix[c]) for c in categories]
+    for src_idx in range(1, spec.sources + 1):
+        pages = []
+        for page_no in range(1, spec.pages_per_source + 1):
+            vertical = rng.random() < spec.vertical_page_ratio
+            texts = [
+                _line_text(rng, spec, categories, weights) for _ in range(spec.lines_per_page)
+            ]
+            pages.append(_page(rng, page_no, texts + [_FOOTER], vertical, spec))
+        source_id = f"{case_id}/attach{src_idx}"
+        sources.append(Source(source_id=source_id, source_type="ocr_attachment", pages=pages))
+    return DocumentIR(case_id=case_id, sources=sources)
+
+
+def _line_text(
+    rng: random.Random, spec: IRSpec, categories: List[str], weights: List[float]
+) -> str:
+    if rng.random() < spec.checkbox_density:
+        if rng.random() < spec.symbol_only_ratio:
+            return rng.choice(_CHECKBOX_SYMBOLS)
+        return rng.choice(_CHECKBOX_TEXTS)
+    return _text(rng, rng.choices(categories, weights)[0] if categories else "filler")
+
+
+def _text(rng: random.Random, category: str) -> str:
+    template = rng.choice(_TEXTS.get(category, _TEXTS["filler"]))
+    value = _text(rng, "clinical") if "{v}" in template else ""
+    return template.format(n=rng.randint(1, 9), v=value)
+
+
+def _page(
+    rng: random.Random, page_no: int, texts: List[str], vertical: bool, spec: IRSpec
+) -> Page:
+    lines: List[Line] = []
+    for idx, text in enumerate(texts):
+        if vertical:
+            # one tall, narrow detection per text column, right to left
+            x, y = 2400 - (idx % 50) * 44, 60 + (idx // 50) * 1300
+            w, h = 30, 24 * len(text) + 20
+        else:
+            # two-column rows, e.g. a form label next to its value
+            x, y = _COLUMN_X[idx % 2], 40 + (idx // 2) * _ROW_HEIGHT
+            w, h = min(380, 20 * len(text) + 10), 28
+        if rng.random() < spec.low_confidence_ratio:
+            confidence = rng.uniform(0.35, 0.59)
+        else:
+            confidence = rng.uniform(0.8, 0.99)
+        lines.append(
+            Line(
+                line_id=idx + 1,
+                text=text,
+                confidence=round(confidence, 3),
+                polygon=[
+                    {"X": x, "Y": y},
+                    {"X": x + w, "Y": y},
+                    {"X": x + w, "Y": y + h},
+                    {"X": x, "Y": y + h},
+                ],
+                bbox=[x, y, w, h],
+                parag_no=idx // 4 + 1,
+                flags={"low_confidence": True} if confidence < 0.6 else {},
+            )
+        )
+    return Page(page_number=page_no, lines=lines)
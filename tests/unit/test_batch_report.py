@@ -0,0 +1,51 @@
+import json
+
+from yk_case_generation.services.batch_report import (
+    build_batch_report,
+    compare_reports,
+    failure_category,
+)
+
+
+def _write_run(root, pid, minute, pages, ocr_s, status="success", error=None):
+    steps = [
+        {"name": "fetch_project", "status": "ok", "duration_s": 0.2},
+        {"name": "ocr", "status": "failed" if error else "ok", "duration_s": ocr_s, "error": error},
+    ]
+    meta = {
+        "project_number": pid,
+        "status": status,
+        "started_at": f"2026-01-01T10:{minute:02d}:00+00:00",
+        "ended_at": f"2026-01-01T10:{minute:02d}:{int(ocr_s) + 1:02d}+00:00",
+        "steps": steps,
+        "stats": {"ocr_images_total": pages, "attachments_total": 1},
+    }
+    (root / pid).mkdir(parents=True)
+    (root / pid / "run_meta.json").write_text(json.dumps(meta))
+
+
+def test_batch_report_aggregates_runs_and_flags_regressions(tmp_path):
+    fast, slow = tmp_path / "fast", tmp_path / "slow"
+    for idx in range(4):
+        _write_run(fast, f"P{idx}", minute=idx * 5, pages=idx + 1, ocr_s=float(idx + 1))
+        _write_run(slow, f"P{idx}", minute=idx * 5, pages=idx + 1, ocr_s=float(idx + 1) * 3)
+    _write_run(slow, "P9", minute=30, pages=2, ocr_s=1.0, status="failed", error="timeout: 30s")
+
+    report = build_batch_report(fast, bucket_minutes=10)
+    assert report["projects"] == 4
+    assert report["steps"]["ocr"]["p50"] == 2.0 and report["steps"]["ocr"]["max"] == 4.0
+    assert report["slowest_projects"][0]["project_number"] == "P3"
+    assert report["correlation"]["pages_vs_duration"] == 1.0
+    assert [b["finished"] for b in report["throughput"]["buckets"]] == [2, 2]
+
+    current = build_batch_report(slow)
+    assert current["failure_categories"] == {"ocr: timeout": 1}
+    regressions = {(r["scope"], r["metric"]) for r in compare_reports(current, report)}
+    assert ("step:ocr", "p50") in regressions
+    assert ("projects", "failure_rate") in regressions
+    assert compare_reports(report, report) == []
+
+
+def test_failure_category_masks_digits():
+    assert failure_category("HTTP 503 from upstream") == "HTTP N from upstream"
+    assert failure_category(None) == "unknown"
@@ -0,0 +1,69 @@
+import zipfile
+
+from yk_case_generation.config import settings
+from yk_case_generation.services.bench_fixtures import (
+    LIMS_ROUTE,
+    FixtureSpec,
+    create_stand_in_app,
+    generate_fixtures,
+)
+from yk_case_generation.services.benchmark import compare_results, run_benchmark
+from yk_case_generation.services.lims_api import fetch_project_info, project_payload_to_inputs
+from yk_case_generation.services.mock_llm_server import serve_app
+from yk_case_generation.services.ocr_clients.tencent import TencentOCRClient
+
+
+def test_fixtures_are_served_by_the_stand_ins(tmp_path, monkeypatch):
+    spec = FixtureSpec(projects=2, pdf_pages=2, docx_paragraphs=5, ocr_lines=7)
+    assert generate_fixtures(tmp_path, spec) == ["BENCH0001", "BENCH0002"]
+    files = tmp_path / "files" / "BENCH0001"
+    assert sorted(p.name for p in files.iterdir()) == [
+        "bundle1.zip",
+        "order1.docx",
+        "report1.pdf",
+        "scan1.png",
+        "scan2.png",
+    ]
+    assert (files / "report1.pdf").read_bytes().count(b"/Type /Page\n") == 2
+    members = zipfile.ZipFile(files / "bundle1.zip").namelist()
+    assert members == ["inner_report.pdf", "inner_scan.png"]
+
+    with serve_app(create_stand_in_app(tmp_path)) as base_url:
+        monkeypatch.setattr(settings, "lims_base_url", base_url + LIMS_ROUTE)
+        _, urls = project_payload_to_inputs(fetch_project_info("BENCH0001"))
+        assert urls[0] == f"{base_url}/files/BENCH0001/order1.docx"
+        ocr = TencentOCRClient("id", "key", endpoint=base_url).general_accurate_image(b"img")
+    assert len(ocr["TextDetections"]) == 7
+
+
+def test_run_benchmark_measures_every_step(tmp_path):
+    spec = FixtureSpec(projects=1, pdfs=0, docx=0, images=1, archives=0, ocr_lines=5)
+    results = run_benchmark(tmp_path, spec)
+    assert results["projects"][0]["status"] == "success"
+    assert list(results["steps"]) == [
+        "fetch_project",
+        "download_attachments",
+        "prepare_ocr_inputs",
+        "run_ocr",
+        "build_ir",
+        "build_case",
+        "build_frontend_response",
+    ]
+    assert results["steps"]["download_attachments"]["bytes_written"] > 0
+    assert results["total"]["peak_rss_mb"] > 0
+    assert compare_results(results, results) == []
+
+
+def test_compare_results_applies_thresholds_and_noise_floor():
+    baseline = {
+        "steps": {"run_ocr": {"wall_s": 1.0, "cpu_s": 0.01}},
+        "total": {"wall_s": 2.0, "bytes_written": 1000},
+    }
+    current = {
+        "steps": {"run_ocr": {"wall_s": 1.5, "cpu_s": 0.03}},
+        "total": {"wall_s": 2.2, "bytes_written": 5000},
+    }
+    regressions = compare_results(current, baseline)
+    assert [(r["scope"], r["metric"]) for r in regressions] == [("step:run_ocr", "wall_s")]
+    assert compare_results(current, {**baseline, "thresholds": {"wall_s": 0.6}}) == []
+    assert compare_results(current, baseline, {"wall_s": 0.05})[-1]["scope"] == "total"
@@ -0,0 +1,44 @@
+from yk_case_generation.models.document_ir import DocumentIR, Line, Page, Source
+from yk_case_generation.services.candidate_fact_builder import (
+    build_budgeted_candidate_facts,
+    build_candidate_facts,
+    chunk_candidate_facts,
+)
+
+
+def _doc(ocr_lines: int) -> DocumentIR:
+    lims = Source(
+        source_id="lims_text_1",
+        source_type="lims_text",
+        pages=[Page(page_number=None, lines=[Line(line_id=1, text="既往史：IVF失败2次" * 20)])],
+    )
+    lines = [
+        Line(line_id=i, text=f"检查结果 {i} 未见异常", bbox=[10, 40 * i, 300, 20])
+        for i in range(1, ocr_lines + 1)
+    ]
+    ocr = Source(
+        source_id="C1/a", source_type="ocr_attachment", pages=[Page(page_number=1, lines=lines)]
+    )
+    return DocumentIR(case_id="C1", sources=[lims, ocr])
+
+
+def test_budget_keeps_lims_facts_and_records_dropped():
+    doc = _doc(200)
+    selection = build_budgeted_candidate_facts(doc, token_budget=400)
+    assert selection.kept[0]["source_id"] == "lims_text_1"
+    assert selection.kept_tokens <= 400
+    assert len(selection.kept) + len(selection.dropped) == len(build_candidate_facts(doc))
+    assert selection.audit()["dropped_count"] == len(selection.dropped) > 0
+
+
+def test_zero_budget_disables_trimming():
+    doc = _doc(50)
+    selection = build_budgeted_candidate_facts(doc, token_budget=0)
+    assert selection.dropped == []
+
+
+def test_chunks_cover_all_candidates_in_order():
+    facts = build_candidate_facts(_doc(120))
+    chunks = chunk_candidate_facts(facts, chunk_tokens=300)
+    assert len(chunks) > 1
+    assert [f for chunk in chunks for f in chunk] == facts
@@ -0,0 +1,132 @@
+import json
+from dataclasses import asdict
+
+from yk_case_generation.models.document_ir import DocumentIR, Line, Page, Source
+from yk_case_generation.services.case_builder import generate_case
+from yk_case_generation.services.llm_metrics import (
+    LLMCallRecord,
+    collect_llm_metrics,
+    record_llm_call,
+    summarize_llm_calls,
+)
+
+
+def test_hybrid_mode_finishes_lims_only_project_without_llm():
+    lims = Source(
+        source_id="lims_text_1",
+        source_type="lims_text",
+        pages=[
+            Page(page_number=None, lines=[Line(line_id=1, text="既往史：IVF失败2次，否认家族史")])
+        ],
+    )
+    doc = DocumentIR(case_id="C1", sources=[lims])
+    with collect_llm_metrics() as metrics:
+        case = generate_case(doc, mode="hybrid")
+    assert metrics.calls == []
+    assert metrics.audit["hybrid"]["escalated_sections"] == []
+    assert case["medical_history"][0]["evidence"][0]["source_id"] == "lims_text_1"
+
+
+def _lims_doc(case_id: str) -> DocumentIR:
+    lims = Source(
+        source_id="lims_text_1",
+        source_type="lims_text",
+        pages=[
+            Page(page_number=None, lines=[Line(line_id=1, text="既往史：IVF失败2次，否认家族史")])
+        ],
+    )
+    return DocumentIR(case_id=case_id, sources=[lims])
+
+
+def test_batched_generation_shares_calls_and_falls_back_per_project(monkeypatch):
+    from yk_case_generation.services import case_builder
+
+    docs = [_lims_doc("C1"), _lims_doc("C2")]
+    rule_cases = {doc.case_id: generate_case(doc, mode="rule") for doc in docs}
+    requests = []
+
+    class FakeClient:
+        def generate_json(self, system_prompt, user_prompt, temperature=0.0, stage="llm"):
+            data = json.loads(user_prompt)
+            record_llm_call(
+                LLMCallRecord(stage, "m", "t0", duration_s=2.0, status="ok", prompt_tokens=100)
+            )
+            if "cases" in data:
+                requests.append((stage, sorted(c["case_id"] for c in data["cases"])))
+            else:
+                requests.append((stage, data["case_id"]))
+            if stage == "stage1":
+                # batched answer only covers C1; C2 must be retried on its own
+                return {"results": [{"case_id": "C1", "selected_facts": [], "quality": {}}]}
+            if "cases" in data:
+                return {"results": [rule_cases[c["case_id"]] for c in data["cases"]]}
+            return rule_cases[data["case_id"]]
+
+    monkeypatch.setattr(case_builder.settings, "llm_endpoint", "http://llm.test")
+    monkeypatch.setattr(case_builder.settings, "llm_api_key", "k")
+    monkeypatch.setattr(case_builder, "get_llm_client", lambda use_cache=None: FakeClient())
+    results, metrics = case_builder.generate_cases_batched(docs)
+
+    assert requests == [("stage1", ["C1", "C2"]), ("stage1", "C2"), ("stage2", ["C1", "C2"])]
+    assert all(isinstance(results[c], dict) for c in ("C1", "C2"))
+    assert metrics["C1"].audit["batch"]["stage1_batch_size"] == 2
+    assert metrics["C2"].audit["batch"]["stage1_batch_size"] == 1
+    # the shared calls are recorded for each member but summarize as one
+    usage = summarize_llm_calls(asdict(c) for m in metrics.values() for c in m.calls)
+    assert usage["by_stage"]["stage1"]["calls"] == 2
+    stage2 = usage["by_stage"]["stage2"]
+    assert (stage2["calls"], stage2["prompt_tokens"], stage2["latency_s"]["total"]) == (1, 100, 2.0)
+
+
+def test_stage1_map_merges_chunks_and_survives_a_failed_chunk(monkeypatch):
+    from yk_case_generation.services import case_builder
+
+    texts = ["既往史：IVF失败2次", "家族史：否认", "临床诊断：复发性流产"]
+    lines = [Line(line_id=i, text=t) for i, t in enumerate(texts, 1)]
+    page = Page(page_number=None, lines=lines)
+    doc = DocumentIR(
+        case_id="C1",
+        sources=[Source(source_id="lims_text_1", source_type="lims_text", pages=[page])],
+    )
+
+    def ev(line_id):
+        return {"source_id": "lims_text_1", "page": None, "line_id": line_id, "quote": "q"}
+
+    answers = {
+        1: {
+            "selected_facts": [{"section": "medical_history", "text": "IVF", "evidence": [ev(1)]}],
+            "quality": {"warnings": ["w1"], "missing_critical": ["m1"]},
+        },
+        2: {
+            "selected_facts": [
+                # same section and evidence as chunk 1: dropped; other section: kept
+                {"section": "medical_history", "text": "IVF失败", "evidence": [ev(1)]},
+                {"section": "family_history", "text": "否认", "evidence": [ev(1), ev(2)]},
+            ],
+            "quality": {"warnings": ["w1", "w2"], "missing_critical": []},
+        },
+    }
+
+    class FakeClient:
+        def generate_json(self, system_prompt, user_prompt, temperature=0.0, stage="llm"):
+            line_id = json.loads(user_prompt)["candidate_facts"][0]["line_id"]
+            if line_id not in answers:
+                raise RuntimeError("chunk failed")
+            return answers[line_id]
+
+    monkeypatch.setattr(case_builder.settings, "llm_stage1_chunk_tokens", 1)
+    monkeypatch.setattr(
+        case_builder, "chunk_candidate_facts", lambda facts, tokens: [[f] for f in facts]
+    )
+    with collect_llm_metrics() as metrics:
+        stage1 = case_builder._llm_stage1_select_facts(FakeClient(), doc)
+
+    assert [(f["section"], f["text"]) for f in stage1["selected_facts"]] == [
+        ("medical_history", "IVF"),
+        ("family_history", "否认"),
+    ]
+    assert stage1["quality"] == {
+        "warnings": ["w1", "w2", "stage1_chunks_failed:1/3"],
+        "missing_critical": ["m1"],
+    }
+    assert metrics.audit["stage1_map_reduce"]["failed_chunks"] == [2]
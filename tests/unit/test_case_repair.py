@@ -0,0 +1,50 @@
+from jsonschema import Draft7Validator
+
+from yk_case_generation.models.case_schema import load_schema
+from yk_case_generation.services.case_repair import repair_case_structure
+
+_EVIDENCE = {"source_id": "lims_text_1", "page": None, "line_id": 1, "quote": "既往史：IVF失败2次"}
+
+
+def test_local_repair_fixes_mechanical_errors_without_adding_facts():
+    schema = load_schema()
+    case = {
+        "case_id": "C1",
+        "source_summary": {
+            "lims_sources": 1,
+            "ocr_sources": 0,
+            "total_pages": "1",
+            "total_lines": 1,
+        },
+        "patient_info": {"text": "女，32岁", "polarity": "asserted", "evidence": _EVIDENCE},
+        "chief_complaint": "",
+        "medical_history": [
+            {
+                "text": "IVF失败2次",
+                "polarity": "yes",
+                "evidence": [dict(_EVIDENCE, line_id="1")],
+                "note": "x",
+            },
+            {"text": "无证据事实", "polarity": "asserted", "evidence": []},
+        ],
+        "diagnosis": [],
+        "quality": {"warnings": "low_confidence_lines:3"},
+    }
+    result = repair_case_structure(case, schema)
+    assert result.valid, result.remaining_errors
+    assert not list(Draft7Validator(schema).iter_errors(result.case))
+    assert result.case["family_history"] == []
+    assert result.case["chief_complaint"] == []
+    assert [f["text"] for f in result.case["medical_history"]] == ["IVF失败2次"]
+    assert result.case["medical_history"][0]["polarity"] == "unknown"
+    assert result.case["patient_info"][0]["evidence"][0]["line_id"] == 1
+    assert result.case["quality"] == {
+        "warnings": ["low_confidence_lines:3"],
+        "missing_critical": [],
+    }
+
+
+def test_local_repair_reports_unfixable_case():
+    result = repair_case_structure({"medical_history": []}, load_schema())
+    assert not result.valid
+    assert any("case_id" in err for err in result.remaining_errors)
@@ -0,0 +1,27 @@
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from yk_case_generation.models.case_schema import (
+    load_schema,
+    schema_errors,
+    schema_path,
+    validate_instance,
+    validator_for,
+)
+
+
+def test_schemas_and_validators_are_loaded_once():
+    schema = load_schema()
+    assert load_schema() is schema
+    assert load_schema(schema_path("case_schema_v1")) is schema
+    assert validator_for(schema) is validator_for(load_schema())
+    response_schema = load_schema(schema_path("case_response_v1"))
+    assert validator_for(response_schema) is not validator_for(schema)
+
+
+def test_schema_errors_lists_every_violation_in_one_pass():
+    schema = load_schema()
+    errors = schema_errors({"case_id": 1, "unexpected": True}, schema)
+    assert len(errors) > 2
+    with pytest.raises(ValidationError):
+        validate_instance({"case_id": 1}, schema)
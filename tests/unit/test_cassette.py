@@ -0,0 +1,63 @@
+import pytest
+
+from yk_case_generation.config import settings
+from yk_case_generation.services.cassette import (
+    ReplayedError,
+    content_key,
+    project_cassette,
+    through_cassette,
+)
+from yk_case_generation.services.lims_api import ProjectInfoError
+
+
+@pytest.fixture
+def cassette_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "io_cassette_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "io_replay_latency", "zero")
+    return tmp_path
+
+
+def _failing():
+    raise ProjectInfoError("LIMS returned 503", status_code=503)
+
+
+def test_record_then_replay_without_calling_services(cassette_dir, monkeypatch):
+    image = b"\x89PNG fake image"
+    monkeypatch.setattr(settings, "io_cassette_mode", "record")
+    with project_cassette("P001"):
+        assert through_cassette("lims", "P001", lambda: {"name": "demo"}) == {"name": "demo"}
+        with pytest.raises(ProjectInfoError):
+            through_cassette("lims", "P002", _failing)
+        through_cassette(
+            "download",
+            "http://files.test/a.png",
+            lambda: image,
+            encode=lambda cassette, data: cassette.put_blob(data),
+        )
+    assert (cassette_dir / "P001" / "cassette.json").exists()
+    assert (cassette_dir / "blobs" / content_key(image)[:2] / content_key(image)).exists()
+
+    def unexpected():
+        raise AssertionError("live call during replay")
+
+    monkeypatch.setattr(settings, "io_cassette_mode", "replay")
+    with project_cassette("P001"):
+        assert through_cassette("lims", "P001", unexpected) == {"name": "demo"}
+        with pytest.raises(ReplayedError) as err:
+            through_cassette("lims", "P002", unexpected)
+        assert err.value.status_code == 503
+        data = through_cassette(
+            "download",
+            "http://files.test/a.png",
+            unexpected,
+            decode=lambda cassette, digest: cassette.get_blob(digest),
+        )
+    assert data == image
+
+
+def test_off_mode_calls_through(cassette_dir, monkeypatch):
+    monkeypatch.setattr(settings, "io_cassette_mode", "off")
+    with project_cassette("P001") as cassette:
+        assert cassette is None
+        assert through_cassette("lims", "P001", lambda: 1) == 1
+    assert not (cassette_dir / "P001").exists()
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from yk_case_generation.services.concurrency import AdaptiveLimiter, is_overload
+from yk_case_generation.services.lims_api import ProjectInfoError
+
+
+def _overloaded() -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "http://svc.test")
+    response = httpx.Response(429, request=request)
+    return httpx.HTTPStatusError("busy", request=request, response=response)
+
+
+def test_limiter_grows_on_success_and_halves_on_overload():
+    limiter = AdaptiveLimiter("svc", max_limit=8, initial=2)
+    for _ in range(10):
+        with limiter.slot():
+            pass
+    assert limiter.limit > 2
+    grown = limiter.limit
+    with pytest.raises(httpx.HTTPStatusError):
+        with limiter.slot():
+            raise _overloaded()
+    assert limiter.limit == max(1, grown // 2)
+    assert limiter.snapshot()["overloads"] == 1
+
+
+def test_limiter_bounds_in_flight_calls():
+    limiter = AdaptiveLimiter("svc", max_limit=2, initial=2)
+
+    def work():
+        with limiter.slot():
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert limiter.snapshot()["peak_in_flight"] == 2
+
+
+def test_overload_detection_follows_wrapped_causes():
+    try:
+        raise ProjectInfoError("request_failed") from httpx.ReadTimeout("slow")
+    except ProjectInfoError as exc:
+        assert is_overload(exc)
+    assert is_overload(ProjectInfoError("http_status_503", status_code=503))
+    assert not is_overload(ProjectInfoError("http_status_404", status_code=404))
@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Cumulative `python -X importtime` budget for importing the CLI module.
+CLI_IMPORT_BUDGET_US = 300_000
+HEAVY = (
+    "pydantic",
+    "pydantic_settings",
+    "httpx",
+    "tencentcloud",
+    "PIL",
+    "docx",
+    "pdf2image",
+    "jsonschema",
+    "structlog",
+    "fastapi",
+)
+
+
+def _importtime(code):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        if cum.strip().isdigit():
+            cumulative[name.strip()] = int(cum)
+    return proc.stdout, cumulative
+
+
+def test_cli_import_does_not_load_heavy_modules():
+    _, cumulative = _importtime("import yk_case_generation.cli.__main__")
+    assert not [m for m in cumulative if m.split(".")[0] in HEAVY]
+
+
+@pytest.mark.skipif(
+    not os.environ.get("YKCG_PERF_TESTS"), reason="timing-based; set YKCG_PERF_TESTS=1"
+)
+def test_cli_import_within_budget():
+    _, cumulative = _importtime("import yk_case_generation.cli.__main__")
+    assert cumulative["yk_case_generation.cli.__main__"] < CLI_IMPORT_BUDGET_US
+
+
+def test_inspect_run_does_not_load_pipeline_dependencies(tmp_path):
+    run_dir = tmp_path / "P1"
+    run_dir.mkdir()
+    (run_dir / "run_meta.json").write_text(json.dumps({"status": "success", "steps": []}))
+    code = (
+        "import sys, json\n"
+        "from typer.testing import CliRunner\n"
+        "from yk_case_generation.cli.__main__ import app\n"
+        f"args = ['inspect-run', 'P1', '--output-dir', {str(tmp_path)!r}]\n"
+        "result = CliRunner().invoke(app, args)\n"
+        "assert result.exit_code == 0, result.output\n"
+        "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules})))\n"
+    )
+    stdout, _ = _importtime(code)
+    loaded = set(json.loads(stdout.strip().splitlines()[-1]))
+    assert not loaded & set(HEAVY)
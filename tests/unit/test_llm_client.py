@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+from tenacity import wait_none
+
+from yk_case_generation.config import settings
+from yk_case_generation.services.llm_cache import LLMResponseCache
+from yk_case_generation.services.llm_client import AsyncLLMClient, LLMClient, get_llm_client
+from yk_case_generation.services.llm_metrics import collect_llm_metrics
+from yk_case_generation.services.llm_stream import StreamAborted
+
+ENDPOINT = "http://llm.test/v1/chat/completions"
+
+
+def _completion(content: dict) -> dict:
+    return {"choices": [{"message": {"content": json.dumps(content, ensure_ascii=False)}}]}
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    return httpx.Response(200, json=_completion({"echo": body["messages"][1]["content"]}))
+
+
+def test_sync_client_records_stage_timing():
+    http = httpx.Client(transport=httpx.MockTransport(_handler))
+    client = LLMClient(
+        endpoint=ENDPOINT, api_key="k", http_client=http, use_cache=False
+    )
+    with collect_llm_metrics() as metrics:
+        out = client.generate_json("sys", "hello", stage="stage1")
+    assert out == {"echo": "hello"}
+    assert [c.stage for c in metrics.calls] == ["stage1"]
+    assert metrics.calls[0].status == "ok"
+
+
+def test_shared_client_follows_endpoint_overrides(monkeypatch):
+    monkeypatch.setattr(settings, "llm_endpoint", "http://first.test/v1")
+    first = get_llm_client(use_cache=False)
+    assert get_llm_client(use_cache=False) is first
+    monkeypatch.setattr(settings, "llm_endpoint", "http://second.test/v1")
+    assert get_llm_client(use_cache=False).endpoint == "http://second.test/v1"
+
+
+def test_async_client_runs_requests_concurrently():
+    in_flight = {"now": 0, "max": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.02)
+        in_flight["now"] -= 1
+        return _handler(request)
+
+    async def run():
+        client = AsyncLLMClient(endpoint=ENDPOINT, api_key="k", max_concurrency=2, use_cache=False)
+        async with client:
+            await client._http.aclose()
+            client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            return await asyncio.gather(*(client.generate_json("sys", str(i)) for i in range(5)))
+
+    with collect_llm_metrics() as metrics:
+        results = asyncio.run(run())
+    assert [r["echo"] for r in results] == ["0", "1", "2", "3", "4"]
+    assert len(metrics.calls) == 5
+    assert in_flight["max"] == 2
+
+
+def test_response_cache_serves_repeated_deterministic_requests(tmp_path):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return _handler(request)
+
+    http = httpx.Client(transport=httpx.MockTransport(handler))
+    client = LLMClient(
+        endpoint=ENDPOINT,
+        api_key="k",
+        http_client=http,
+        cache=LLMResponseCache(tmp_path),
+        use_cache=True,
+    )
+    with collect_llm_metrics() as metrics:
+        first = client.generate_json("sys", "same")
+        second = client.generate_json("sys", "same")
+        client.generate_json("sys", "other")
+    assert first == second
+    assert len(calls) == 2
+    assert metrics.to_dict()["cache"] == {"hits": 1, "misses": 2}
+
+
+def test_response_cache_evicts_oldest_entries_over_size_bound(tmp_path):
+    cache = LLMResponseCache(tmp_path, max_bytes=200)
+    cache.put("aa1", {"v": "x" * 100})
+    cache.put("bb2", {"v": "y" * 100})
+    os.utime(tmp_path / "aa" / "aa1.json", (1, 1))
+    assert cache.evict() == 1
+    assert cache.get("aa1") is None
+    assert cache.get("bb2") is not None
+
+
+def _sse(*chunks: str) -> bytes:
+    events = [{"choices": [{"delta": {"content": c}}]} for c in chunks]
+    events.append({"choices": [], "usage": {"completion_tokens": 7}})
+    lines = [f"data: {json.dumps(e, ensure_ascii=False)}\n\n" for e in events]
+    return ("".join(lines) + "data: [DONE]\n\n").encode()
+
+
+def test_streaming_client_parses_sse_and_records_ttft():
+    body = _sse('{"a":', ' "x}"', "}")
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    http = httpx.Client(transport=transport)
+    client = LLMClient(
+        endpoint=ENDPOINT, api_key="k", http_client=http, use_cache=False, stream=True
+    )
+    with collect_llm_metrics() as metrics:
+        out = client.generate_json("sys", "u", stage="stage2")
+    assert out == {"a": "x}"}
+    call = metrics.calls[0]
+    assert call.ttft_s is not None and call.completion_tokens == 7
+    assert metrics.to_dict()["streaming"]["stage2"]["streamed_calls"] == 1
+
+
+def test_streaming_client_aborts_on_non_json_output():
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(200, content=_sse("好的，", '{"a": 1}'))
+
+    http = httpx.Client(transport=httpx.MockTransport(handler))
+    client = LLMClient(
+        endpoint=ENDPOINT, api_key="k", http_client=http, use_cache=False, stream=True
+    )
+    with collect_llm_metrics() as metrics:
+        with pytest.raises(StreamAborted):
+            client.generate_json("sys", "u")
+    assert len(sent) == 1
+    assert metrics.calls[0].status == "aborted"
+
+
+def test_usage_and_retries_are_recorded_and_summarized(monkeypatch):
+    monkeypatch.setattr(LLMClient._request_json.retry, "wait", wait_none())
+    responses = [
+        httpx.Response(429),
+        httpx.Response(
+            200,
+            json={
+                **_completion({"ok": True}),
+                "usage": {
+                    "prompt_tokens": 120,
+                    "completion_tokens": 30,
+                    "prompt_tokens_details": {"cached_tokens": 100},
+                },
+            },
+        ),
+    ]
+    http = httpx.Client(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+    client = LLMClient(endpoint=ENDPOINT, api_key="k", http_client=http, use_cache=False)
+    with collect_llm_metrics() as metrics:
+        client.generate_json("sys", "u", stage="stage1")
+    call = metrics.calls[0]
+    assert (call.prompt_tokens, call.completion_tokens, call.cached_tokens) == (120, 30, 100)
+    assert call.retries == 1
+    usage = metrics.to_dict()["usage"]
+    assert usage["by_stage"]["stage1"]["cached_tokens"] == 100
+    assert usage["totals"]["latency_s"]["p50"] == call.duration_s
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from yk_case_generation.services.ir_builder import _annotate_template_and_checkbox
+from yk_case_generation.services.microbench import run_microbench, scaling_exponent
+from yk_case_generation.services.synthetic_ir import IRSpec, generate_document_ir
+
+
+def test_generator_honours_spec():
+    spec = IRSpec(sources=2, pages_per_source=3, lines_per_page=30, vertical_page_ratio=1.0)
+    doc = generate_document_ir(spec)
+    ocr = [s for s in doc.sources if s.source_type == "ocr_attachment"]
+    assert len(ocr) == 2 and all(len(s.pages) == 3 for s in ocr)
+    assert all(len(p.lines) == 31 for s in ocr for p in s.pages)  # + repeated footer
+    assert all(line.bbox[3] > line.bbox[2] for line in ocr[0].pages[0].lines)
+    assert generate_document_ir(spec) == doc
+
+    dense = generate_document_ir(IRSpec(checkbox_density=0.5, vertical_page_ratio=0.0))
+    _annotate_template_and_checkbox(dense)
+    flagged = [
+        line
+        for s in dense.sources
+        for p in s.pages
+        for line in p.lines
+        if line.flags.get("checkbox_linked_from_line_id")
+    ]
+    assert flagged
+
+
+def test_scaling_exponent():
+    assert round(scaling_exponent([10, 20, 40], [1.0, 2.0, 4.0]), 6) == 1.0
+    assert round(scaling_exponent([10, 20, 40], [1.0, 4.0, 16.0]), 6) == 2.0
+
+
+@pytest.mark.skipif(
+    not os.environ.get("YKCG_PERF_TESTS"), reason="timing-based; set YKCG_PERF_TESTS=1"
+)
+def test_ir_and_case_stages_scale_linearly_with_lines_per_page():
+    # Guard against all-pairs line searches creeping back into per-page code.
+    report = run_microbench(
+        IRSpec(sources=1, pages_per_source=2, checkbox_density=0.3),
+        "lines",
+        [100, 400, 800],
+        repeat=3,
+        max_exponent=1.4,
+    )
+    assert report["superlinear"] == [], report["targets"]
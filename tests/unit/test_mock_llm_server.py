@@ -0,0 +1,38 @@
+from yk_case_generation.models.document_ir import DocumentIR, Line, Page, Source
+from yk_case_generation.services import case_builder
+from yk_case_generation.services.llm_client import LLMClient
+from yk_case_generation.services.llm_metrics import collect_llm_metrics
+from yk_case_generation.services.load_test import llm_endpoint_settings
+from yk_case_generation.services.mock_llm_server import MockLLMConfig, serve_mock_llm
+
+
+def test_llm_mode_runs_end_to_end_against_mock_server(monkeypatch):
+    lims = Source(
+        source_id="lims_text_1",
+        source_type="lims_text",
+        pages=[
+            Page(page_number=None, lines=[Line(line_id=1, text="既往史：IVF失败2次，否认家族史")])
+        ],
+    )
+    doc = DocumentIR(case_id="C1", sources=[lims])
+    with serve_mock_llm(MockLLMConfig(latency_ms=5, jitter_ms=0, seed=1)) as endpoint:
+        client = LLMClient(endpoint=endpoint, api_key="k", use_cache=False)
+        monkeypatch.setattr(case_builder.settings, "llm_endpoint", endpoint)
+        monkeypatch.setattr(case_builder.settings, "llm_api_key", "k")
+        monkeypatch.setattr(case_builder, "get_llm_client", lambda use_cache=None: client)
+        with collect_llm_metrics() as metrics:
+            case = case_builder.generate_case(doc, mode="llm", llm_cache=False)
+    assert case["case_id"] == "C1"
+    assert case["medical_history"][0]["evidence"][0]["source_id"] == "lims_text_1"
+    assert [c.stage for c in metrics.calls] == ["stage1", "stage2"]
+    assert all(c.prompt_tokens for c in metrics.calls)
+
+
+def test_load_test_endpoint_override_is_restored(monkeypatch):
+    settings = case_builder.settings
+    monkeypatch.setattr(settings, "llm_endpoint", "http://real.test")
+    monkeypatch.setattr(settings, "llm_api_key", None)
+    with serve_mock_llm(MockLLMConfig(latency_ms=0, jitter_ms=0)) as endpoint:
+        with llm_endpoint_settings(endpoint):
+            assert (settings.llm_endpoint, settings.llm_api_key) == (endpoint, "mock")
+    assert (settings.llm_endpoint, settings.llm_api_key) == ("http://real.test", None)
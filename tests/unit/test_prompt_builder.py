@@ -0,0 +1,44 @@
+from yk_case_generation.services.prompt_builder import (
+    build_repair_prompt,
+    build_stage1_prompt,
+    build_stage2_prompt,
+    estimate_tokens,
+)
+
+SCHEMA = {"type": "object", "properties": {"case_id": {"type": "string"}}}
+FACTS = [
+    {"section": "medical_history", "text": "既往史：IVF失败2次", "source_id": "s1"},
+    {"section": "diagnosis", "text": "复发性流产", "source_id": "s1"},
+]
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("既往史") == 3
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("abcde") == 2  # partial groups round up
+    assert estimate_tokens("IVF失败2次") == 3 + 1  # 失败次, then "IVF2" as one token
+    assert estimate_tokens("，：") == 2  # CJK punctuation
+
+
+def test_stage_prompts_keep_static_content_in_a_stable_system_prefix():
+    one = build_stage1_prompt("选择事实", "C1", FACTS)
+    two = build_stage1_prompt("选择事实", "C2", FACTS[:1])
+    assert one.system == two.system == "选择事实"
+    assert "选择事实" not in one.user and '"case_id":"C1"' in one.user
+
+    first = build_stage2_prompt("生成病例", SCHEMA, "C1", {}, FACTS, {"warnings": []})
+    second = build_stage2_prompt("生成病例", SCHEMA, "C2", {"n": 1}, FACTS[:1], {"warnings": []})
+    assert first.system == second.system
+    assert first.system.startswith("生成病例") and '"properties"' in first.system
+    assert '"properties"' not in first.user
+
+
+def test_compacted_prompts_are_estimated_smaller():
+    bundles = [
+        build_stage1_prompt("选择事实，只输出JSON。", "C1", FACTS),
+        build_stage2_prompt("生成病例，只输出JSON。", SCHEMA, "C1", {}, FACTS, {"warnings": []}),
+        build_repair_prompt(SCHEMA, {"case_id": "C1", "diagnosis": FACTS}, "missing field"),
+    ]
+    for bundle in bundles:
+        assert 0 < bundle.est_tokens < bundle.est_tokens_uncompacted, bundle.stage
@@ -0,0 +1,60 @@
+import json
+
+from yk_case_generation.services import response_batch
+from yk_case_generation.services.response_batch import build_responses
+
+
+def _case(case_id, text="既往史：IVF失败2次"):
+    fact = {
+        "text": text,
+        "polarity": "asserted",
+        "evidence": [{"source_id": "lims_text_1", "page": None, "line_id": 1, "quote": text}],
+    }
+    return {"case_id": case_id, "medical_history": [fact], "quality": {"warnings": []}}
+
+
+def _write_case(runs, pid, case):
+    path = runs / pid / "cases" / f"{pid}_case.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(case, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def test_directory_mode_builds_changed_cases_only(tmp_path, monkeypatch):
+    runs = tmp_path / "runs"
+    for pid in ("P1", "P2", "P3"):
+        _write_case(runs, pid, _case(pid))
+    (runs / "P4" / "cases").mkdir(parents=True)
+    (runs / "P4" / "cases" / "P4_case.json").write_text("{not json", encoding="utf-8")
+
+    first = build_responses(runs, workers=2)
+    assert (first["total"], first["built"], first["failed"]) == (4, 3, 1)
+    assert "P4/cases/P4_case.json" in first["errors"]
+    frontend = json.loads((runs / "P1" / "frontend" / "P1_frontend.json").read_text("utf-8"))
+    assert frontend["case_id"] == "P1"
+
+    _write_case(runs, "P2", _case("P2", text="既往史：IVF失败3次"))
+    (runs / "P3" / "frontend" / "P3_frontend.json").unlink()
+    second = build_responses(runs, workers=1)
+    assert (second["built"], second["skipped"], second["failed"]) == (2, 1, 1)
+
+    # a builder change invalidates every entry
+    monkeypatch.setattr(response_batch, "builder_fingerprint", lambda layout: "changed")
+    assert build_responses(runs, workers=1)["built"] == 3
+
+
+def test_v2_layout_stores_each_quote_once(tmp_path):
+    from yk_case_generation.services.case_response_builder import build_case_response
+
+    case = _case("C1")
+    case["chief_complaint"] = [dict(case["medical_history"][0], text="主诉：IVF失败")]
+    response = build_case_response(case, layout="v2")
+    assert response["schema_version"] == "case_response_v2"
+    assert list(response["evidence"]) == ["e1"]
+    facts = response["sections"]["medical_history"] + response["sections"]["chief_complaint"]
+    assert [fact["evidence_ids"] for fact in facts] == [["e1"], ["e1"]]
+    assert "evidence" not in facts[0]
+
+    _write_case(tmp_path, "C1", case)
+    sizes = response_batch.compare_layouts(tmp_path)
+    assert sizes["cases"] == 1 and sizes["bytes"]["v2"] < sizes["bytes"]["v1"]
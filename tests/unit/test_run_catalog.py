@@ -0,0 +1,48 @@
+import json
+
+from yk_case_generation.services.run_catalog import RunQuery, backfill, query_runs, record_run
+
+
+def _meta(pid, status, day, ocr_status="ok", ocr_s=1.0):
+    return {
+        "project_number": pid,
+        "status": status,
+        "started_at": f"2026-03-{day:02d}T08:00:00+08:00",
+        "ended_at": f"2026-03-{day:02d}T08:01:00+08:00",
+        "steps": [
+            {"name": "fetch_project", "status": "ok", "duration_s": 0.1},
+            {"name": "ocr", "status": ocr_status, "duration_s": ocr_s, "error": None},
+        ],
+        "stats": {"ocr_images_total": 3},
+        "artifacts": {"case_json": f"runs/{pid}/cases/{pid}_case.json"},
+    }
+
+
+def test_backfill_and_query_filter_runs(tmp_path):
+    runs = tmp_path / "runs"
+    for meta in (
+        _meta("P1", "success", 1),
+        _meta("P2", "failed", 10, ocr_status="failed"),
+        _meta("P3", "partial", 12, ocr_s=90.0),
+    ):
+        (runs / meta["project_number"]).mkdir(parents=True)
+        (runs / meta["project_number"] / "run_meta.json").write_text(json.dumps(meta))
+    catalog = tmp_path / "catalog.sqlite"
+
+    assert backfill(catalog, [runs]) == {"indexed": 3, "unchanged": 0, "unreadable": 0}
+    assert backfill(catalog, [runs])["unchanged"] == 3
+
+    def pids(**kwargs):
+        return [row["project_number"] for row in query_runs(catalog, RunQuery(**kwargs))]
+
+    assert pids(failed_step="ocr") == ["P2"]
+    assert pids(slow_step="ocr", min_step_s=60) == ["P3"]
+    # started_at is compared in UTC: 2026-03-10T08:00+08:00 is 00:00Z
+    assert pids(since="2026-03-10T00:00:00+00:00") == ["P3", "P2"]
+    assert pids(status=["success", "partial"], project="P%") == ["P3", "P1"]
+    assert pids(min_duration_s=60, max_duration_s=60, limit=1) == ["P3"]
+
+    # a re-run of the same dir replaces its steps
+    record_run(catalog, _meta("P2", "success", 20), runs / "P2")
+    assert pids(failed_step="ocr") == []
+    assert pids(status=["success"]) == ["P2", "P1"]
@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from yk_case_generation.services.run_export import export_runs, iter_rows
+
+
+def _write_run(runs, pid, day, texts=("IVF失败2次",), status="success"):
+    run_dir = runs / pid
+    (run_dir / "cases").mkdir(parents=True, exist_ok=True)
+    (run_dir / "frontend").mkdir(exist_ok=True)
+    meta = {
+        "project_number": pid,
+        "status": status,
+        "started_at": f"2026-03-{day:02d}T08:00:00+08:00",
+        "ended_at": f"2026-03-{day:02d}T08:01:30+08:00",
+        "steps": [{"name": "ocr", "status": "ok", "duration_s": 1.0}],
+        "stats": {"ocr_images_total": 4, "attachments_total": 2},
+        "llm": {"total_calls": 2, "usage": {"totals": {"prompt_tokens": 900}}},
+    }
+    facts = [
+        {
+            "text": text,
+            "polarity": "asserted",
+            "evidence": [{"source_id": "lims_text_1", "page": None, "line_id": 1, "quote": text}],
+        }
+        for text in texts
+    ]
+    frontend = {
+        "status": "partial",
+        "sections": {
+            "medical_history": [dict(f, confidence_level="high") for f in facts],
+        },
+    }
+    (run_dir / "run_meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    (run_dir / "cases" / f"{pid}_case.json").write_text(
+        json.dumps({"case_id": pid, "medical_history": facts}, ensure_ascii=False), encoding="utf-8"
+    )
+    (run_dir / "frontend" / f"{pid}_frontend.json").write_text(
+        json.dumps(frontend, ensure_ascii=False), encoding="utf-8"
+    )
+
+
+def test_export_appends_new_runs_and_rewrites_changed_partitions(tmp_path):
+    runs, out = tmp_path / "runs", tmp_path / "export"
+    _write_run(runs, "P1", 1)
+    _write_run(runs, "P2", 2, texts=("IVF失败2次", "否认家族史"))
+
+    first = export_runs([runs], out, fmt="jsonl")
+    assert (first["runs_exported"], first["rows"]) == (2, {"facts": 3, "runs": 2})
+    fact = next(r for r in iter_rows(out, "facts") if r["project_number"] == "P1")
+    assert fact["section"] == "medical_history"
+    assert fact["confidence_level"] == "high"
+    assert fact["evidence_source_type"] == "lims_text"
+    assert fact["duration_s"] == 90.0 and fact["llm_prompt_tokens"] == 900
+    assert (out / "facts" / "started_date=2026-03-01").is_dir()
+
+    assert export_runs([runs], out, fmt="jsonl")["runs_unchanged"] == 2
+
+    _write_run(runs, "P1", 1, texts=("IVF失败3次，ICSI 1次",))
+    _write_run(runs, "P3", 2)
+    third = export_runs([runs], out, fmt="jsonl")
+    assert (third["runs_exported"], third["partitions_rewritten"]) == (2, 1)
+    facts = sorted((r["project_number"], r["text"]) for r in iter_rows(out, "facts"))
+    assert facts == [
+        ("P1", "IVF失败3次，ICSI 1次"),
+        ("P2", "IVF失败2次"),
+        ("P2", "否认家族史"),
+        ("P3", "IVF失败2次"),
+    ]
+
+
+def test_parquet_export_round_trips(tmp_path):
+    pytest.importorskip("pyarrow")
+    _write_run(tmp_path / "runs", "P1", 1)
+    result = export_runs([tmp_path / "runs"], tmp_path / "export", fmt="parquet")
+    assert result["files"] == 2
+    rows = list(iter_rows(tmp_path / "export", "runs"))
+    assert rows[0]["facts_total"] == 1 and rows[0]["ended_at"].startswith("2026-03-01")
+
+
+def test_rewrite_keeps_runs_exported_from_other_roots(tmp_path):
+    root_a, root_b, out = tmp_path / "a", tmp_path / "b", tmp_path / "export"
+    _write_run(root_a, "P1", 1)
+    _write_run(root_b, "P2", 1)
+    export_runs([root_a], out, fmt="jsonl")
+    export_runs([root_b], out, fmt="jsonl")
+
+    _write_run(root_a, "P1", 1, texts=("IVF失败3次",))
+    result = export_runs([root_a], out, fmt="jsonl")
+    assert (result["runs_exported"], result["runs_carried_over"]) == (1, 1)
+    facts = sorted((r["project_number"], r["text"]) for r in iter_rows(out, "facts"))
+    assert facts == [("P1", "IVF失败3次"), ("P2", "IVF失败2次")]
+
+
+def test_interrupted_export_neither_loses_nor_duplicates_parts(tmp_path, monkeypatch):
+    from yk_case_generation.services import run_export
+
+    runs, out = tmp_path / "runs", tmp_path / "export"
+    _write_run(runs, "P1", 1)
+    export_runs([runs], out, fmt="jsonl")
+    _write_run(runs, "P1", 1, texts=("IVF失败3次",))
+    _write_run(runs, "P2", 2)
+
+    def crash(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    # before the state is saved: the export is left as it was
+    with monkeypatch.context() as m:
+        m.setattr(run_export._PartWriter, "close", crash)
+        with pytest.raises(KeyboardInterrupt):
+            export_runs([runs], out, fmt="jsonl")
+    assert [r["text"] for r in iter_rows(out, "facts")] == ["IVF失败2次"]
+
+    # while moving staged parts in: the next export finishes the move
+    with monkeypatch.context() as m:
+        m.setattr(run_export, "_commit_staged", crash)
+        with pytest.raises(KeyboardInterrupt):
+            export_runs([runs], out, fmt="jsonl")
+    assert export_runs([runs], out, fmt="jsonl")["runs_unchanged"] == 2
+    facts = sorted((r["project_number"], r["text"]) for r in iter_rows(out, "facts"))
+    assert facts == [("P1", "IVF失败3次"), ("P2", "IVF失败2次")]
+    assert not list(out.glob(".staging-*"))
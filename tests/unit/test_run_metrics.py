@@ -0,0 +1,32 @@
+import json
+
+from yk_case_generation.services import run_metrics
+from yk_case_generation.services.events import bind_events, configure_events, emit
+from yk_case_generation.services.run_metrics import MetricsTextfile
+
+
+def test_events_are_logged_as_json_and_feed_the_metrics_textfile(tmp_path, capsys):
+    run_metrics.reset()
+    configure_events(fmt="json", level="info")
+    target = tmp_path / "ykcg.prom"
+    with MetricsTextfile(target, interval_s=60):
+        with bind_events(project="P1"):
+            emit("step_end", step="ocr", status="ok", duration_s=0.3)
+            emit("ocr_request", file="a.jpg", bytes=10, status="failed", duration_s=1.2)
+            emit("llm_call", stage="stage1", status="ok", duration_s=0.0, cache="hit")
+            emit("download", file="a.pdf", status="ok", bytes=2048, duration_s=0.1)
+        emit("project_end", project="P1", status="partial", duration_s=2.0)
+
+    events = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert [e["event"] for e in events][:2] == ["step_end", "ocr_request"]
+    assert events[0]["project"] == "P1" and events[1]["level"] == "warning"
+
+    text = target.read_text()
+    assert 'ykcg_projects_total{status="partial"} 1' in text
+    assert 'ykcg_step_duration_seconds_bucket{step="ocr",le="0.5"} 1' in text
+    assert 'ykcg_ocr_requests_total{status="failed"} 1' in text
+    assert 'ykcg_llm_cache_lookups_total{result="hit"} 1' in text
+    assert "ykcg_download_bytes_total 2048" in text
+    # cache hits cost no request time and stay out of the latency histogram
+    assert run_metrics.LLM_SECONDS.count(stage="stage1") == 0
+    run_metrics.reset()
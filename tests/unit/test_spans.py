@@ -0,0 +1,45 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from yk_case_generation.services.spans import Trace, span, to_chrome_trace
+
+
+def test_spans_nest_across_worker_threads_and_export_to_chrome_trace():
+    trace = Trace()
+    with trace.activate():
+        with span("prepare_ocr_inputs"):
+            with span("attachment", file="a.pdf"):
+                ctx = contextvars.copy_context()
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    list(pool.map(lambda n: ctx.copy().run(_page, n), [1, 2]))
+        with pytest.raises(ValueError):
+            with span("build_ir"):
+                raise ValueError("boom")
+
+    roots = trace.tree()
+    assert [r["name"] for r in roots] == ["prepare_ocr_inputs", "build_ir"]
+    attachment = roots[0]["children"][0]
+    assert attachment["attrs"] == {"file": "a.pdf"}
+    pages = attachment["children"]
+    assert sorted(p["attrs"]["page"] for p in pages) == [1, 2]
+    assert all(p["children"][0]["name"] == "jpeg_encode" for p in pages)
+    assert {"wall_s", "cpu_s", "rss_delta_mb", "start_s"} <= set(pages[0])
+    assert roots[1]["error"] == "ValueError"
+
+    events = [e for e in to_chrome_trace(roots)["traceEvents"] if e["ph"] == "X"]
+    assert len(events) == 7
+    assert events[0]["name"] == "prepare_ocr_inputs" and events[0]["dur"] >= events[1]["dur"]
+
+
+def test_span_is_a_no_op_without_an_active_trace():
+    with span("orphan"):
+        pass
+    assert Trace().tree() == []
+
+
+def _page(page_no):
+    with span("preprocess_page", page=page_no):
+        with span("jpeg_encode"):
+            sum(range(1000))
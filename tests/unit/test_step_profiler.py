@@ -0,0 +1,57 @@
+import json
+import tracemalloc
+
+import pytest
+
+from yk_case_generation.services.pipeline_runner import _probe, probe_steps
+from yk_case_generation.services.step_profiler import (
+    StepProfiler,
+    parse_profile_modes,
+    summarize_profile,
+)
+
+
+def test_step_profiler_writes_pstats_and_tracemalloc_per_step(tmp_path):
+    profiler = StepProfiler(tmp_path / "profile", parse_profile_modes("cpu,mem"))
+    seen = []
+    with probe_steps(profiler), probe_steps(lambda name: _Recorder(seen, name)):
+        with _probe("build_ir"):
+            _allocate()
+        with _probe("build_case"):
+            sum(range(1000))
+
+    assert seen == ["build_ir", "build_case"]
+    assert not tracemalloc.is_tracing()
+    index = json.loads((tmp_path / "profile" / "index.json").read_text())
+    assert [s["pstats"] for s in index["steps"]] == ["01_build_ir.pstats", "02_build_case.pstats"]
+    assert index["steps"][0]["peak_bytes"] >= 100_000
+
+    summary = summarize_profile(tmp_path / "profile", top=5)
+    assert summary[0]["step"] == "build_ir"
+    assert any("_allocate" in f["function"] for f in summary[0]["cpu"]["by_cumulative"])
+    assert len(summary[0]["mem"]["top_allocations"]) <= 5
+
+
+def test_parse_profile_modes_rejects_unknown_modes():
+    assert parse_profile_modes(None) == ()
+    assert parse_profile_modes("mem") == ("mem",)
+    with pytest.raises(ValueError):
+        parse_profile_modes("cpu,io")
+
+
+_KEEP = []
+
+
+def _allocate():
+    _KEEP.append([bytes(1000) for _ in range(200)])
+
+
+class _Recorder:
+    def __init__(self, seen, name):
+        self.seen, self.name = seen, name
+
+    def __enter__(self):
+        self.seen.append(self.name)
+
+    def __exit__(self, *exc):
+        return False